@@ -0,0 +1,60 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv
+
+
+class ExecLatency:
+    ROUNDS: int = 20
+
+    @classmethod
+    def measure(cls, fn: Callable[[], None], rounds: int) -> float:
+        start: float = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+
+        return (time.perf_counter() - start) / rounds
+
+    @classmethod
+    def run(cls, rounds: int = ROUNDS) -> Dict[str, float]:
+        with tempfile.TemporaryDirectory() as tmp:
+            home: Path = Path(tmp) / 'venv'
+            subprocess.run(
+                [sys.executable, '-m', 'venv', '--without-pip', str(home)],
+                check=True,
+            )
+            # Move away from any project so the settings file is untouched.
+            os.chdir(tmp)
+            Settings.set('venv', 'home', val=str(home))
+
+            return {
+                'shell': cls.measure(
+                    lambda: Virtualenv.run('python -c pass', quiet=True),
+                    rounds,
+                ),
+                'direct': cls.measure(
+                    lambda: Virtualenv.exec(
+                        'python', '-c', 'pass', quiet=True
+                    ),
+                    rounds,
+                ),
+            }
+
+
+if __name__ == '__main__':
+    results: Dict[str, float] = ExecLatency.run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else ExecLatency.ROUNDS
+    )
+
+    for mode, latency in results.items():
+        print(f'{mode:<8}{latency * 1000:>10.2f} ms/call')
+
+    print(
+        f'{"saved":<8}'
+        f'{(results["shell"] - results["direct"]) * 1000:>10.2f} ms/call'
+    )
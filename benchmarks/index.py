@@ -0,0 +1,166 @@
+import csv
+import io
+import base64
+import hashlib
+import zipfile
+import importlib.metadata
+from pathlib import Path
+from typing import Dict, List, Set, Tuple
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+
+
+class LocalIndex:
+    PREFIX: str = 'bench-pkg'
+    VERSION: str = '1.0.0'
+    # Stand-ins for the basic packages Pipa installs in every project.
+    STUBS: Dict[str, List[str]] = {
+        'pytest': [],
+        'black': [],
+        'python-dotenv': ['cli'],
+    }
+    # Pipa runs pip-tools for real, it is repacked from this interpreter.
+    REAL: List[str] = ['pip-tools']
+    _DATE: Tuple[int, ...] = (1980, 1, 1, 0, 0, 0)
+
+    @classmethod
+    def name(cls, i: int) -> str:
+        return f'{cls.PREFIX}-{i:03d}'
+
+    @classmethod
+    def build(cls, path: Path, size: int) -> Path:
+        path.mkdir(parents=True, exist_ok=True)
+
+        for i in range(size):
+            # Every other package pulls the next one, for the resolver.
+            cls.stub(
+                path,
+                cls.name(i),
+                requires=(
+                    [cls.name(i + 1)] if i % 2 == 0 and i + 1 < size else []
+                ),
+            )
+        for name, extras in cls.STUBS.items():
+            cls.stub(path, name, extras=extras)
+        for name in cls.closure(cls.REAL):
+            cls.repack(path, name)
+
+        return path
+
+    @classmethod
+    def stub(
+        cls,
+        path: Path,
+        name: str,
+        requires: List[str] = (),
+        extras: List[str] = (),
+    ) -> Path:
+        module: str = name.replace('-', '_')
+        dist_info: str = f'{module}-{cls.VERSION}.dist-info'
+        files: Dict[str, bytes] = {
+            f'{module}/__init__.py': f'NAME = {name!r}\n'.encode(),
+            f'{dist_info}/METADATA': (
+                '\n'.join(
+                    [
+                        'Metadata-Version: 2.1',
+                        f'Name: {name}',
+                        f'Version: {cls.VERSION}',
+                        *[f'Requires-Dist: {_}' for _ in requires],
+                        *[f'Provides-Extra: {_}' for _ in extras],
+                    ]
+                )
+                + '\n'
+            ).encode(),
+            f'{dist_info}/WHEEL': (
+                'Wheel-Version: 1.0\nGenerator: pipa-bench\n'
+                'Root-Is-Purelib: true\nTag: py3-none-any\n'
+            ).encode(),
+        }
+
+        return cls._write(
+            path / f'{module}-{cls.VERSION}-py3-none-any.whl', dist_info, files
+        )
+
+    @classmethod
+    def closure(cls, names: List[str]) -> List[str]:
+        seen: Set[str] = set()
+        pending: List[str] = list(names)
+
+        while pending:
+            if (name := canonicalize_name(pending.pop())) in seen:
+                continue
+
+            seen.add(name)
+            for line in importlib.metadata.distribution(name).requires or []:
+                req: Requirement = Requirement(line)
+                if not req.marker or req.marker.evaluate({'extra': ''}):
+                    pending.append(req.name)
+
+        return sorted(seen)
+
+    @classmethod
+    def repack(cls, path: Path, name: str) -> Path:
+        dist: importlib.metadata.Distribution = (
+            importlib.metadata.distribution(name)
+        )
+        tag: str = next(
+            line.split(':', 1)[1].strip()
+            for line in dist.read_text('WHEEL').splitlines()
+            if line.startswith('Tag:')
+        )
+        dist_info: str = next(
+            str(_).split('/')[0]
+            for _ in dist.files
+            if str(_).split('/')[0].endswith('.dist-info')
+        )
+        files: Dict[str, bytes] = {}
+
+        for file in dist.files:
+            rel: str = file.as_posix()
+            if (
+                rel.startswith('..')
+                or '__pycache__' in rel
+                or rel
+                in (
+                    f'{dist_info}/RECORD',
+                    f'{dist_info}/INSTALLER',
+                    f'{dist_info}/REQUESTED',
+                    f'{dist_info}/direct_url.json',
+                )
+            ):
+                continue
+            if (src := Path(dist.locate_file(file))).is_file():
+                files[rel] = src.read_bytes()
+
+        return cls._write(
+            path / f'{dist_info[: -len(".dist-info")]}-{tag}.whl',
+            dist_info,
+            files,
+        )
+
+    @classmethod
+    def _write(
+        cls, path: Path, dist_info: str, files: Dict[str, bytes]
+    ) -> Path:
+        record: io.StringIO = io.StringIO()
+        writer = csv.writer(record, lineterminator='\n')
+
+        for name, content in files.items():
+            digest: str = (
+                base64.urlsafe_b64encode(hashlib.sha256(content).digest())
+                .rstrip(b'=')
+                .decode()
+            )
+            writer.writerow([name, f'sha256={digest}', len(content)])
+        writer.writerow([f'{dist_info}/RECORD', '', ''])
+
+        with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for name, content in [
+                *files.items(),
+                (f'{dist_info}/RECORD', record.getvalue().encode()),
+            ]:
+                info: zipfile.ZipInfo = zipfile.ZipInfo(name, cls._DATE)
+                info.external_attr = 0o644 << 16
+                zf.writestr(info, content, zipfile.ZIP_DEFLATED)
+
+        return path
@@ -0,0 +1,64 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict
+from pipa.packager import Packager
+from pipa.settings import Settings
+
+
+class LockInstall:
+    @classmethod
+    def measure(cls, wkdir: Path, parallel: bool) -> float:
+        home: Path = wkdir / f'venv-{"parallel" if parallel else "pip"}'
+        subprocess.run([sys.executable, '-m', 'venv', str(home)], check=True)
+        Settings.set('venv', 'home', val=str(home))
+        Settings.set('installer', 'parallel', val=parallel)
+
+        start: float = time.perf_counter()
+        Packager.req_install(from_lock=True)
+        elapsed: float = time.perf_counter() - start
+
+        shutil.rmtree(home)
+
+        return elapsed
+
+    @classmethod
+    def run(cls, lock: Path) -> Dict[str, float]:
+        lock = lock.resolve()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            # Move away from any project so the settings file is untouched.
+            os.chdir(tmp)
+            shutil.copyfile(lock, Packager.REQUIREMENTS_LOCK_FILE)
+            # Warm the pip cache so both paths download from it.
+            subprocess.run(
+                [
+                    sys.executable,
+                    '-m',
+                    'pip',
+                    'download',
+                    '-q',
+                    '--no-deps',
+                    '-d',
+                    'cache',
+                    '-r',
+                    Packager.REQUIREMENTS_LOCK_FILE,
+                ],
+                check=True,
+            )
+
+            return {
+                'pip': cls.measure(Path(tmp), parallel=False),
+                'parallel': cls.measure(Path(tmp), parallel=True),
+            }
+
+
+if __name__ == '__main__':
+    for name, elapsed in LockInstall.run(
+        Path(sys.argv[1] if len(sys.argv) > 1 else 'requirements.lock')
+    ).items():
+        print(f'{name:<10}{elapsed:>10.2f} s')
@@ -0,0 +1,58 @@
+import os
+import sys
+import time
+import shutil
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict
+import toml
+from pipa.pipa import Pipa
+from pipa.settings import Settings
+from pipa.snapshot import Snapshot
+
+
+class NewSnapshot:
+    _ROOT: Path = Path(__file__).resolve().parent.parent
+
+    @classmethod
+    def new(cls, wkdir: Path, name: str) -> float:
+        env: Dict[str, str] = {
+            **os.environ,
+            'PYTHONPATH': str(cls._ROOT),
+            'GIT_AUTHOR_NAME': 'bench',
+            'GIT_AUTHOR_EMAIL': 'bench@localhost',
+            'GIT_COMMITTER_NAME': 'bench',
+            'GIT_COMMITTER_EMAIL': 'bench@localhost',
+        }
+        start: float = time.perf_counter()
+        subprocess.run(
+            [sys.executable, '-m', 'pipa', 'new', name],
+            cwd=wkdir,
+            env=env,
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        elapsed: float = time.perf_counter() - start
+
+        if (settings := wkdir / name / Settings.FILE).exists():
+            shutil.rmtree(
+                toml.load(settings)['venv']['home'], ignore_errors=True
+            )
+
+        return elapsed
+
+    @classmethod
+    def run(cls) -> Dict[str, float]:
+        shutil.rmtree(Snapshot.path(Pipa.basic_packages()), ignore_errors=True)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            return {
+                'cold': cls.new(Path(tmp), 'bench_cold'),
+                'warm': cls.new(Path(tmp), 'bench_warm'),
+            }
+
+
+if __name__ == '__main__':
+    for mode, elapsed in NewSnapshot.run().items():
+        print(f'{mode:<8}{elapsed:>10.2f} s')
@@ -0,0 +1,63 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Dict, List
+
+
+class RunStartup:
+    ROUNDS: int = 20
+    _ROOT: Path = Path(__file__).resolve().parent.parent
+
+    @classmethod
+    def measure(cls, args: List[str], wkdir: Path, rounds: int) -> float:
+        env: Dict[str, str] = {**os.environ, 'PYTHONPATH': str(cls._ROOT)}
+        start: float = time.perf_counter()
+
+        for _ in range(rounds):
+            subprocess.run(
+                args,
+                cwd=wkdir,
+                env=env,
+                check=True,
+                stdout=subprocess.DEVNULL,
+            )
+
+        return (time.perf_counter() - start) / rounds
+
+    @classmethod
+    def run(cls, rounds: int = ROUNDS) -> Dict[str, float]:
+        with tempfile.TemporaryDirectory() as tmp:
+            wkdir: Path = Path(tmp)
+            home: Path = wkdir / 'venv'
+            subprocess.run(
+                [sys.executable, '-m', 'venv', '--without-pip', str(home)],
+                check=True,
+            )
+            (wkdir / '.pipa.toml').write_text(
+                f'[project]\nname = "bench"\n\n[venv]\nhome = "{home}"\n',
+                encoding='utf-8',
+            )
+            (wkdir / '.env').write_text(
+                'BENCH=1\nexport BENCH_QUOTED="a ${BENCH}"\n', encoding='utf-8'
+            )
+
+            direct: float = cls.measure(
+                [str(home / 'bin' / 'python'), '-c', 'pass'], wkdir, rounds
+            )
+            pipa: float = cls.measure(
+                [sys.executable, '-m', 'pipa', 'run', 'python', '-c', 'pass'],
+                wkdir,
+                rounds,
+            )
+
+        return {'direct': direct, 'pipa run': pipa, 'overhead': pipa - direct}
+
+
+if __name__ == '__main__':
+    for name, elapsed in RunStartup.run(
+        int(sys.argv[1]) if len(sys.argv) > 1 else RunStartup.ROUNDS
+    ).items():
+        print(f'{name:<10}{elapsed * 1000:>10.2f} ms')
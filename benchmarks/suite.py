@@ -0,0 +1,185 @@
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List
+from benchmarks.index import LocalIndex
+
+
+class Suite:
+    SIZES: List[int] = [1, 20, 200]
+    RUN_ROUNDS: int = 5
+    _ROOT: Path = Path(__file__).resolve().parent.parent
+
+    def __init__(self, wkdir: Path, sizes: List[int]):
+        self.wkdir: Path = wkdir
+        self.sizes: List[int] = sizes
+        self.index: Path = LocalIndex.build(wkdir / 'index', max(sizes) + 1)
+        (wkdir / 'home').mkdir()
+        (wkdir / 'tmp').mkdir()
+        self.env: Dict[str, str] = {
+            **{
+                key: val
+                for key, val in os.environ.items()
+                if not key.startswith(('PIP_', 'PIPA_'))
+            },
+            # Caches, snapshots and venvs all stay in the working directory.
+            'HOME': str(wkdir / 'home'),
+            'TMPDIR': str(wkdir / 'tmp'),
+            'PYTHONPATH': str(self._ROOT),
+            'PIP_NO_INDEX': '1',
+            'PIP_FIND_LINKS': str(self.index),
+            'PIP_DISABLE_PIP_VERSION_CHECK': '1',
+            'GIT_AUTHOR_NAME': 'bench',
+            'GIT_AUTHOR_EMAIL': 'bench@localhost',
+            'GIT_COMMITTER_NAME': 'bench',
+            'GIT_COMMITTER_EMAIL': 'bench@localhost',
+        }
+
+    def pipa(self, *args: str, cwd: Path, rounds: int = 1) -> Dict[str, Any]:
+        trace: Path = self.wkdir / 'trace.json'
+        since: float = time.time()
+        start: float = time.perf_counter()
+
+        for _ in range(rounds):
+            process: subprocess.CompletedProcess = subprocess.run(
+                [sys.executable, '-m', 'pipa', *args],
+                cwd=cwd,
+                env={**self.env, 'PIPA_TRACE': str(trace)},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+            )
+            if process.returncode:
+                raise RuntimeError(
+                    f'pipa {" ".join(args)} failed:\n'
+                    + process.stdout.decode(errors='replace')
+                )
+
+        wall: float = (time.perf_counter() - start) / rounds
+        events: List[Dict[str, Any]] = (
+            json.loads(trace.read_text())['traceEvents']
+            if trace.exists()
+            else []
+        )
+        trace.unlink(missing_ok=True)
+
+        return {
+            'wall': wall,
+            'subprocesses': len([_ for _ in events if 'argv' in _['args']]),
+            'bytes_written': self._written(since),
+        }
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        results: Dict[str, Dict[str, Any]] = {}
+
+        for size in self.sizes:
+            name: str = f'bench_{size}'
+            project: Path = self.wkdir / name
+            locked: Path = self.wkdir / f'{name}_locked'
+
+            results[f'new@{size}'] = self.pipa('new', name, cwd=self.wkdir)
+            (project / 'requirements.txt').write_text(
+                '\n'.join(LocalIndex.name(i) for i in range(size)) + '\n'
+            )
+            results[f'install@{size}'] = self.pipa('install', cwd=project)
+            results[f'add@{size}'] = self.pipa(
+                'install', LocalIndex.name(max(self.sizes)), cwd=project
+            )
+            results[f'lock@{size}'] = self.pipa(
+                'lock', '--upgrade', cwd=project
+            )
+
+            locked.mkdir()
+            for file in ('requirements.txt', 'requirements.lock'):
+                shutil.copyfile(project / file, locked / file)
+            results[f'init-locked@{size}'] = self.pipa('init', cwd=locked)
+
+            results[f'run@{size}'] = self.pipa(
+                'run',
+                'python',
+                '-c',
+                'pass',
+                cwd=project,
+                rounds=self.RUN_ROUNDS,
+            )
+
+        return results
+
+    def _written(self, since: float) -> int:
+        written: int = 0
+
+        for path, _, files in os.walk(self.wkdir):
+            for file in files:
+                try:
+                    st: os.stat_result = os.lstat(os.path.join(path, file))
+                except OSError:
+                    continue
+                # ctime, unlike mtime, cannot be set back by extractors.
+                if st.st_ctime >= since:
+                    written += st.st_size
+
+        return written
+
+    @classmethod
+    def compare(
+        cls, results: Dict[str, Dict[str, Any]], baseline: Dict[str, Any]
+    ) -> None:
+        print(f'{"benchmark":<20}{"baseline":>12}{"current":>12}{"delta":>10}')
+
+        for key, result in results.items():
+            if not (before := baseline['results'].get(key)):
+                continue
+
+            print(
+                f'{key:<20}{before["wall"]:>11.2f}s{result["wall"]:>11.2f}s'
+                f'{(result["wall"] / before["wall"] - 1) * 100:>+9.1f}%'
+            )
+
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser(
+        description='Benchmark Pipa commands against a local offline index.'
+    )
+    parser.add_argument(
+        '--sizes',
+        type=lambda _: [int(size) for size in _.split(',')],
+        default=Suite.SIZES,
+        help='Comma separated numbers of dependencies per project.',
+    )
+    parser.add_argument('--out', type=Path, default=Path('bench-results.json'))
+    parser.add_argument(
+        '--baseline', type=Path, help='Previous results to compare with.'
+    )
+    args: argparse.Namespace = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results: Dict[str, Dict[str, Any]] = Suite(Path(tmp), args.sizes).run()
+
+    args.out.write_text(
+        json.dumps(
+            {
+                'meta': {
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                },
+                'results': results,
+            },
+            indent=2,
+        )
+    )
+
+    for key, result in results.items():
+        print(
+            f'{key:<20}{result["wall"]:>10.2f} s'
+            f'{result["subprocesses"]:>6} procs'
+            f'{result["bytes_written"] / (1 << 10):>12.1f} KiB'
+        )
+    if args.baseline:
+        Suite.compare(results, json.loads(args.baseline.read_text()))
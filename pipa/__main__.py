@@ -1,9 +1,33 @@
+import sys
+
+# `pipa run` is latency sensitive: hand over to the command before click
+# and the rest of Pipa are even imported.
+if __name__ == '__main__' and sys.argv[1:2] == ['run']:
+    warm: bool = sys.argv[2:3] == ['--warm']
+    if sys.argv[2 + warm : 3 + warm] and sys.argv[2 + warm] != '--help':
+        from pipa.runner import Runner
+
+        Runner.exec(sys.argv[2 + warm :], warm=warm)
+
+import contextlib
 from pathlib import Path
-from pipa.packager import Packager
-from typing import List, Set
+from pipa.packager import Packager, PackagerError
+from typing import ContextManager, List, Tuple
 import click
+from pipa.coalesce import Outcome, Request
+from pipa.compiler import CompileReport, Compiler
+from pipa.envs import GcReport
+from pipa.hashes import VerifyReport
+from pipa.pack import PackReport
 from pipa.pipa import Pipa
 from pipa.settings import Settings
+from pipa.store import StoreStats
+from pipa.sync import SyncPlan
+from pipa.template import DeployReport
+from pipa.tasks import TaskGraph
+from pipa.trace import Trace
+from pipa.wheelhouse import WheelhouseReport
+from pipa.workspace import ProjectReport, Workspace
 
 
 class Main:
@@ -14,42 +38,86 @@ class Main:
     @click.group(
         help='The Python managing tools based on native pip and venv tools.'
     )
-    def run() -> None:
-        pass
+    @click.option(
+        '--profile',
+        is_flag=True,
+        type=bool,
+        default=False,
+        help='Time every phase and subprocess, print a summary and write '
+        f'a Chrome trace file (also enabled by {Trace.ENV}=1|<path>).',
+    )
+    @click.pass_context
+    def run(ctx: click.Context, profile: bool) -> None:
+        if profile or Trace.requested():
+            Trace.start(f'pipa {ctx.invoked_subcommand}')
+            ctx.call_on_close(Trace.finish)
 
     @run.command(help='Create a new project.')
     @click.argument('name', required=True, nargs=1, type=str)
-    def new(name: str, install: str) -> None:
-        try:
-            click.secho('Deploying template...', fg=Main._INFO_COLOR)
-            Pipa.init_template(name)
-
-            click.secho('Deploying venv...', fg=Main._INFO_COLOR)
-            Pipa.init_venv()
-
-            click.secho('Deployed settings...', fg=Main._INFO_COLOR)
-            Pipa.init_settings()
-
-            click.secho('Installing basic packages...', fg=Main._INFO_COLOR)
-            Pipa.init_requirements()
-
-            click.secho('Initializing git...', fg=Main._INFO_COLOR)
-            Pipa.init_git()
+    @click.option(
+        '--template',
+        'source',
+        default=None,
+        help='Template directory or archive (zip, tar) to deploy instead '
+        'of the built-in one.',
+    )
+    def new(name: str, source: str) -> None:
+        Settings.set('project', 'name', val=name)
+        graph: TaskGraph = Main._graph()
+        graph.add(
+            'template',
+            lambda: Pipa.init_template(name, source=source),
+            label='Deploying template...',
+        )
+        graph.add('venv', Pipa.init_venv, label='Deploying venv...')
+        graph.add(
+            'settings',
+            Pipa.init_settings,
+            'template',
+            'venv',
+            label='Deploying settings...',
+        )
+        graph.add(
+            'requirements',
+            Pipa.init_requirements,
+            'template',
+            'venv',
+            label='Installing basic packages...',
+        )
+        graph.add(
+            'git', Pipa.init_git, 'template', label='Initializing git...'
+        )
+        graph.add(
+            'commit',
+            Pipa.commit_git,
+            'git',
+            'settings',
+            'requirements',
+            label='Committing project structure...',
+        )
 
-            click.secho(
-                f'Done! Use: cd {name}/ and having fun!',
-                fg=Main._SUCCESS_COLOR,
-                bold=True,
-            )
+        try:
+            graph.run()
         except Exception as e:
-            click.secho(e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True)
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        Main._print_timings(graph)
+        click.secho(
+            f'Done! Use: cd {name}/ and having fun!',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
 
     @run.command(help='Initialize Pipa in an existing project.')
     def init() -> None:
         try:
             Main._init()
         except Exception as e:
-            click.secho(e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True)
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
 
         click.secho('Done! Have fun!', fg=Main._SUCCESS_COLOR, bold=True)
 
@@ -78,100 +146,694 @@ class Main:
         default=False,
         help='Specify if Pipa should not install the dependencies from the locked file.',
     )
-    def install(pkgs: List[str], dev: bool, nolock: bool) -> None:
+    @click.option(
+        '--offline',
+        is_flag=True,
+        type=bool,
+        default=False,
+        help='Install the locked dependencies from the wheelhouse only.',
+    )
+    @click.option(
+        '--compile',
+        'precompile',
+        is_flag=True,
+        type=bool,
+        default=None,
+        help='Byte-compile the environment and the project afterwards '
+        '(defaults to the compile.enabled setting).',
+    )
+    def install(
+        pkgs: List[str],
+        dev: bool,
+        nolock: bool,
+        offline: bool,
+        precompile: bool,
+    ) -> None:
+        if precompile is None:
+            precompile = Settings.get('compile', 'enabled')
+
         try:
             if not pkgs:
-                return Main._init(nolock=nolock, dev=dev)
+                return Main._init(
+                    nolock=nolock,
+                    dev=dev,
+                    offline=offline,
+                    precompile=precompile,
+                )
 
-            for pkg in pkgs:
-                click.secho(f'Installing {pkg}...', fg=Main._INFO_COLOR)
-                Pipa.install(pkg, is_dev=dev)
+            click.secho(
+                f'Installing {", ".join(pkgs)}...', fg=Main._INFO_COLOR
+            )
+            outcome: Outcome = Pipa.enqueue(
+                Request.INSTALL, *pkgs, is_dev=dev, on_wait=Main._on_wait
+            )
+            if outcome.failed:
+                click.secho(
+                    f'Failed to install: {", ".join(outcome.failed)}',
+                    err=True,
+                    fg=Main._ERR_COLOR,
+                    bold=True,
+                )
+            Main._print_outcome(outcome)
 
-            if not dev:
-                click.secho('Locking dependencies...', fg=Main._INFO_COLOR)
-                Pipa.lock()
+            if precompile:
+                click.secho('Compiling bytecode...', fg=Main._INFO_COLOR)
+                with Main._exclusive():
+                    Main._print_compile(Pipa.compile())
         except Exception as e:
             click.secho(e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True)
 
     @run.command('remove', help='Uninstall packages.')
     @click.argument('pkgs', required=True, nargs=-1, type=str)
     def uninstall(pkgs: List[str]) -> None:
-        for pkg in pkgs:
-            click.secho(f'Removing {pkg}...', fg=Main._INFO_COLOR)
-            Pipa.uninstall(pkg)
+        try:
+            click.secho(f'Removing {", ".join(pkgs)}...', fg=Main._INFO_COLOR)
+            outcome: Outcome = Pipa.enqueue(
+                Request.REMOVE, *pkgs, on_wait=Main._on_wait
+            )
+            if outcome.orphans:
+                click.secho(
+                    'Removed orphaned dependencies: '
+                    f'{", ".join(outcome.orphans)}.',
+                    fg=Main._INFO_COLOR,
+                )
+            Main._print_outcome(outcome)
+        except Exception as e:
+            click.secho(e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True)
 
-        click.secho('Locking dependencies...', fg=Main._INFO_COLOR)
-        Pipa.lock()
+    @run.command(
+        'lock',
+        help='Lock the dependencies. The resolution is skipped when the '
+        'requirements did not change since the last lock.',
+    )
+    @click.option(
+        '--upgrade',
+        is_flag=True,
+        type=bool,
+        default=False,
+        help='Re-resolve every dependency to its latest allowed version.',
+    )
+    def lock(upgrade: bool) -> None:
+        try:
+            click.secho('Locking dependencies...', fg=Main._INFO_COLOR)
+            with Main._exclusive():
+                locked: bool = Pipa.lock(upgrade=upgrade)
+            if not locked:
+                click.secho(
+                    'Requirements unchanged, lock is up to date.',
+                    fg=Main._INFO_COLOR,
+                )
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        click.secho('Done!', fg=Main._SUCCESS_COLOR, bold=True)
 
     @run.command(
-        'run',
-        context_settings={'ignore_unknown_options': True},
-        help='Run a command through the virtual environment.',
+        'sync',
+        help='Synchronize the virtual environment with the locked file, '
+        'installing and removing only what differs.',
     )
-    @click.argument('cmd', required=True, nargs=-1, type=str)
-    def exec(cmd: List[str]) -> None:
-        if not Settings.FILE.exists():
+    @click.option(
+        '--offline',
+        is_flag=True,
+        type=bool,
+        default=False,
+        help='Install from the wheelhouse only, without any package index.',
+    )
+    @click.option(
+        '--dev',
+        is_flag=True,
+        type=bool,
+        default=False,
+        help='Also install the locked development dependencies.',
+    )
+    def sync(offline: bool, dev: bool) -> None:
+        if not Packager.REQUIREMENTS_LOCK_FILE.exists():
+            return click.secho(
+                'No locked file found.', err=True, fg=Main._ERR_COLOR
+            )
+
+        try:
+            with Main._exclusive():
+                plan: SyncPlan = Pipa.sync(offline=offline, dev=dev)
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        if plan.empty:
+            return click.secho(
+                'Already synchronized.', fg=Main._SUCCESS_COLOR, bold=True
+            )
+
+        for name in plan.uninstall:
+            click.secho(f'Removed {name}', fg=Main._INFO_COLOR)
+        for name in plan.install:
+            click.secho(f'Installed {name}', fg=Main._INFO_COLOR)
+
+        click.secho('Done!', fg=Main._SUCCESS_COLOR, bold=True)
+
+    @run.command(
+        'compile',
+        help='Byte-compile site-packages and the project packages in '
+        'parallel, skipping the files whose bytecode is still valid.',
+    )
+    @click.option(
+        '--invalidation',
+        type=click.Choice(Compiler.MODES),
+        default=None,
+        help='Bytecode invalidation mode, hash based ones give reproducible '
+        'images (defaults to the compile.invalidation setting).',
+    )
+    @click.option(
+        '-j',
+        '--jobs',
+        type=click.IntRange(min=1),
+        default=None,
+        help='Number of worker processes (defaults to the number of CPUs).',
+    )
+    @click.option(
+        '--measure/--no-measure',
+        default=True,
+        help='Time importing the project packages and requirements before '
+        'and after compiling, a proxy for the pipa run startup.',
+    )
+    def compile(invalidation: str, jobs: int, measure: bool) -> None:
+        try:
+            with Main._exclusive():
+                report: CompileReport = Pipa.compile(
+                    invalidation=invalidation, jobs=jobs, measure=measure
+                )
+        except Exception as e:
             return click.secho(
-                f'You are not in a Pipa project. Command aborted.',
-                err=True,
-                fg=Main._ERR_COLOR,
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
             )
 
+        Main._print_compile(report)
+
+    @run.command(
+        'pack',
+        help='Export the virtual environment as a compressed archive that '
+        'can be unpacked to any path, with a manifest of file hashes.',
+    )
+    @click.option(
+        '-o',
+        '--output',
+        type=click.Path(dir_okay=False, path_type=Path),
+        default=None,
+        help='Archive path (defaults to <project>.venv.zip).',
+    )
+    def pack(output: Path) -> None:
+        try:
+            with Main._exclusive():
+                report: PackReport = Pipa.pack(path=output)
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        click.secho(
+            f'Packed {report.files} files, {Main._format_size(report.size)} '
+            f'into {report.path} ({Main._format_size(report.compressed)}) '
+            f'in {report.elapsed:.2f}s.',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.command(
+        'unpack',
+        help='Restore a packed virtual environment, checking every file '
+        'against the manifest, and use it for the current project.',
+    )
+    @click.argument(
+        'archive',
+        type=click.Path(exists=True, dir_okay=False, path_type=Path),
+    )
+    @click.option(
+        '--home',
+        type=click.Path(file_okay=False, path_type=Path),
+        default=None,
+        help='Where to restore the environment (defaults to a new '
+        'environment of the pool).',
+    )
+    @click.option(
+        '-j',
+        '--jobs',
+        type=click.IntRange(min=1),
+        default=None,
+        help='Number of extraction threads (defaults to the number of CPUs).',
+    )
+    def unpack(archive: Path, home: Path, jobs: int) -> None:
+        try:
+            # Outside of a project there is nothing to guard.
+            with (
+                Main._exclusive()
+                if Settings.FILE.exists()
+                else contextlib.nullcontext()
+            ):
+                report: PackReport = Pipa.unpack(archive, home=home, jobs=jobs)
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        click.secho(
+            f'Unpacked {report.files} files, '
+            f'{Main._format_size(report.size)} to {report.home} '
+            f'in {report.elapsed:.2f}s.',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.group('store', help='Manage the shared package store.')
+    def store() -> None:
+        pass
+
+    @store.command('stats', help='Show the package store usage.')
+    def store_stats() -> None:
+        stats: StoreStats = Pipa.store_stats()
+
         click.secho(
-            f'Running in {Path(Settings.get("venv", "home")).name} '
-            f'environment...',
+            f'{stats.entries} entries ({stats.referenced} referenced), '
+            f'{stats.files} files, {Main._format_size(stats.size)} stored, '
+            f'{Main._format_size(stats.deduplicated)} deduplicated.',
             fg=Main._INFO_COLOR,
         )
 
+    @store.command(
+        'prune', help='Evict the store entries no environment uses.'
+    )
+    def store_prune() -> None:
+        stats: StoreStats = Pipa.store_prune()
+
+        click.secho(
+            f'Evicted {stats.entries} entries, '
+            f'{Main._format_size(stats.size)} freed.',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.group(
+        'wheelhouse', help='Manage the local wheelhouse of the project.'
+    )
+    def wheelhouse() -> None:
+        pass
+
+    @wheelhouse.command(
+        'build',
+        help='Fetch or build a wheel for every locked dependency into the '
+        'wheelhouse, for offline installs.',
+    )
+    @click.option(
+        '--find-links',
+        multiple=True,
+        type=click.Path(exists=True, file_okay=False, path_type=Path),
+        help='Only look for packages in this directory, without any index.',
+    )
+    def wheelhouse_build(find_links: Tuple[Path]) -> None:
         try:
-            Pipa.run(' '.join(cmd))
+            click.secho('Building wheelhouse...', fg=Main._INFO_COLOR)
+            with Main._exclusive():
+                report: WheelhouseReport = Pipa.build_wheelhouse(
+                    find_links=list(find_links)
+                )
         except Exception as e:
-            click.secho(e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True)
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
 
-    def _init(nolock: bool = True, dev: bool = False) -> None:
-        # If not, consider that the project has not been initialized.
-        if not Settings.FILE.exists():
-            Settings.set('project', 'name', val=Path('.').resolve().name)
-            click.secho('Deploying settings...', fg=Main._INFO_COLOR)
-            Pipa.init_settings(root=Path('.'))
+        click.secho(
+            f'{len(report.fetched)} fetched, {len(report.built)} built, '
+            f'{len(report.reused)} reused in {report.path}.',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.command(
+        help='Show the installed dependency tree, of PKGS or of the whole '
+        'environment.'
+    )
+    @click.argument('pkgs', nargs=-1, type=str)
+    def tree(pkgs: List[str]) -> None:
+        for line in Pipa.tree(*pkgs):
+            click.echo(line)
 
-            click.secho('Deploying venv...', fg=Main._INFO_COLOR)
-            Pipa.init_venv()
+    @run.command(help='Show why PKG is installed.')
+    @click.argument('pkg', required=True, type=str)
+    def why(pkg: str) -> None:
+        if not (chains := Pipa.why(pkg)):
+            return click.secho(
+                f'{pkg} is not installed.', err=True, fg=Main._ERR_COLOR
+            )
 
-            click.secho('Installing basic packages...', fg=Main._INFO_COLOR)
-            Pipa.init_requirements(root=Path('.'))
+        for chain in chains:
+            click.echo(' -> '.join(chain))
 
-        if nolock or not Packager.REQUIREMENTS_LOCK_FILE.exists():
-            has_req: bool = False
+    @run.command(
+        help='Evict the least recently used environments until the pool '
+        'fits in its disk budget. Environments in use are never removed.'
+    )
+    @click.option(
+        '--budget',
+        default=None,
+        help='Disk budget, like 5GiB or 500M, instead of the settings.',
+    )
+    @click.option(
+        '--dry-run',
+        is_flag=True,
+        default=False,
+        help='Only show what would be evicted.',
+    )
+    def gc(budget: str, dry_run: bool) -> None:
+        try:
+            report: GcReport = Pipa.gc(budget=budget, dry_run=dry_run)
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
 
-            click.secho('Installing requirements...', fg=Main._INFO_COLOR)
-            if not Pipa.req_install():
-                click.secho('No requirements file found.', fg=Main._INFO_COLOR)
-            else:
-                has_req = True
+        for path, size in report.evicted:
+            click.echo(f'{path} ({Main._format_size(size)})')
+        for path in report.in_use:
+            click.secho(f'{path}: in use, kept', fg=Main._INFO_COLOR)
 
-            if dev:
+        click.secho(
+            f'{"Would evict" if dry_run else "Evicted"} '
+            f'{len(report.evicted)} environments, '
+            f'{Main._format_size(report.size)} used of '
+            f'{Main._format_size(report.budget)}.',
+            fg=(
+                Main._ERR_COLOR
+                if report.size > report.budget
+                else Main._SUCCESS_COLOR
+            ),
+            bold=True,
+        )
+
+    @run.command(
+        'template',
+        help='Re-apply the project template, or upgrade to SOURCE. Only the '
+        'files that changed are rewritten, local edits are kept.',
+    )
+    @click.argument('source', required=False, default=None, type=str)
+    def template(source: str) -> None:
+        try:
+            with Main._exclusive():
+                report: DeployReport = Pipa.apply_template(source)
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        for rel in report.files(DeployReport.KEPT):
+            click.secho(f'{rel}: kept local changes', fg=Main._INFO_COLOR)
+
+        click.secho(
+            f'Template {report.version}: '
+            f'{len(report.files(DeployReport.WRITTEN))} written, '
+            f'{len(report.files(DeployReport.UNCHANGED))} unchanged, '
+            f'{len(report.files(DeployReport.REMOVED))} removed.',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.command(
+        'verify',
+        help='Check the artifacts of the locked dependencies against the '
+        'locked hashes, in the wheelhouse unless a directory is given.',
+    )
+    @click.option(
+        '--path',
+        type=click.Path(exists=True, file_okay=False, path_type=Path),
+        default=None,
+        help='Directory of wheels and sdists to check instead.',
+    )
+    def verify(path: Path) -> None:
+        try:
+            report: VerifyReport = Pipa.verify(path=path)
+        except Exception as e:
+            return click.secho(
+                e.__str__(), err=True, fg=Main._ERR_COLOR, bold=True
+            )
+
+        for name in report.failed:
+            click.secho(
+                f'{name}: {report.results[name]}', err=True, fg=Main._ERR_COLOR
+            )
+
+        click.secho(
+            f'{len(report.results) - len(report.failed)}/'
+            f'{len(report.results)} artifacts verified.',
+            fg=Main._ERR_COLOR if report.failed else Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.command(
+        'workspace',
+        help='Run install, lock or sync across every Pipa project found '
+        'under a root directory, in parallel.',
+    )
+    @click.argument('action', type=click.Choice(Workspace.ACTIONS))
+    @click.option(
+        '--root',
+        type=click.Path(exists=True, file_okay=False, path_type=Path),
+        default=Path('.'),
+        help='Directory to search for projects.',
+    )
+    @click.option(
+        '-j',
+        '--jobs',
+        type=click.IntRange(min=1),
+        default=None,
+        help='Maximum number of projects processed at once '
+        '(defaults to the number of CPUs).',
+    )
+    def workspace(action: str, root: Path, jobs: int) -> None:
+        reports: List[ProjectReport] = Pipa.workspace(
+            action, root=root, jobs=jobs
+        )
+
+        if not reports:
+            return click.secho(
+                'No project found.', err=True, fg=Main._ERR_COLOR
+            )
+
+        width: int = max(
+            len(str(_.path.relative_to(root.resolve()))) for _ in reports
+        )
+        for report in sorted(reports, key=lambda _: -_.total):
+            name: str = str(report.path.relative_to(root.resolve()))
+            timings: str = ', '.join(
+                f'{phase} {elapsed:.2f}s'
+                for phase, elapsed in report.timings.items()
+            )
+
+            if report.error:
+                click.secho(
+                    f'{name:<{width}}  {report.error}',
+                    err=True,
+                    fg=Main._ERR_COLOR,
+                )
+            else:
                 click.secho(
-                    'Installing dev requirements...', fg=Main._INFO_COLOR
+                    f'{name:<{width}}  {report.total:6.2f}s  {timings}'
+                    + (' (shared lock)' if report.shared else '')
                 )
-                if not Pipa.req_install(dev=True):
+
+        failed: int = len([_ for _ in reports if _.error])
+        click.secho(
+            f'{len(reports) - failed}/{len(reports)} projects done.',
+            fg=Main._ERR_COLOR if failed else Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    @run.command(
+        'run',
+        context_settings={'ignore_unknown_options': True},
+        help='Run a command through the virtual environment.',
+    )
+    @click.option(
+        '--warm',
+        is_flag=True,
+        help='Fork the command from a running `pipa serve` process.',
+    )
+    @click.argument('cmd', required=True, nargs=-1, type=str)
+    def exec(cmd: List[str], warm: bool) -> None:
+        Pipa.run(*cmd, warm=warm)
+
+    @run.command(
+        help='Keep a warm interpreter for `pipa run --warm`, restarted when '
+        'the lock, .env or settings change.'
+    )
+    @click.option(
+        '--preload',
+        multiple=True,
+        help='Module to import before forking, on top of the settings.',
+    )
+    def serve(preload: Tuple[str]) -> None:
+        sys.exit(Pipa.serve(*preload))
+
+    def _format_size(size: float) -> str:
+        for unit in ('B', 'KiB', 'MiB', 'GiB'):
+            if size < 1024:
+                break
+            size /= 1024
+
+        return f'{size:.1f} {unit}'
+
+    def _graph() -> TaskGraph:
+        return TaskGraph(
+            on_start=lambda task: task.label
+            and click.secho(task.label, fg=Main._INFO_COLOR)
+        )
+
+    def _print_timings(graph: TaskGraph) -> None:
+        click.secho(
+            ', '.join(
+                f'{name} {elapsed:.2f}s'
+                for name, elapsed in graph.timings.items()
+            ),
+            dim=True,
+        )
+
+    def _exclusive() -> ContextManager[None]:
+        return Pipa.exclusive(on_wait=Main._on_wait)
+
+    def _on_wait() -> None:
+        click.secho(
+            'Waiting for another Pipa process in this project...',
+            fg=Main._INFO_COLOR,
+        )
+
+    def _print_outcome(outcome: Outcome) -> None:
+        if outcome.batch > 1:
+            click.secho(
+                f'Merged with {outcome.batch - 1} queued request(s).',
+                fg=Main._INFO_COLOR,
+            )
+        if outcome.error:
+            raise PackagerError(outcome.error)
+        if outcome.locked:
+            click.secho('Dependencies locked.', fg=Main._INFO_COLOR)
+
+    def _print_compile(report: CompileReport) -> None:
+        for path in report.failed:
+            click.secho(f'{path}: not compiled', err=True, fg=Main._ERR_COLOR)
+        if report.startup:
+            click.secho(
+                f'Imports: {report.startup["before"] * 1000:.0f} ms before, '
+                f'{report.startup["after"] * 1000:.0f} ms after.',
+                fg=Main._INFO_COLOR,
+            )
+
+        click.secho(
+            f'{report.compiled}/{report.checked} files compiled '
+            f'({report.invalidation}) in {report.elapsed:.2f}s.',
+            fg=Main._SUCCESS_COLOR,
+            bold=True,
+        )
+
+    def _init(
+        nolock: bool = True,
+        dev: bool = False,
+        offline: bool = False,
+        precompile: bool = False,
+    ) -> None:
+        graph: TaskGraph = Main._graph()
+        basics: Tuple[str] = ()
+        installed: str = 'locked'
+
+        # If not, consider that the project has not been initialized.
+        if not Settings.FILE.exists():
+            Settings.set('project', 'name', val=Path('.').resolve().name)
+            graph.add(
+                'venv',
+                lambda: Pipa.init_venv(root=Path('.')),
+                label='Deploying venv...',
+            )
+            graph.add(
+                'settings',
+                lambda: Pipa.init_settings(root=Path('.')),
+                'venv',
+                label='Deploying settings...',
+            )
+            graph.add(
+                'basics',
+                lambda: Pipa.init_requirements(root=Path('.')),
+                'venv',
+                label='Installing basic packages...',
+            )
+            basics = ('basics',)
+
+        if offline and not Packager.REQUIREMENTS_LOCK_FILE.exists():
+            raise PackagerError('Offline installs require a locked file.')
+
+        if (
+            nolock and not offline
+        ) or not Packager.REQUIREMENTS_LOCK_FILE.exists():
+
+            def req_install(dev: bool = False) -> bool:
+                if not (done := Pipa.req_install(dev=dev)):
                     click.secho(
-                        'No dev requirements file found.', fg=Main._INFO_COLOR
+                        f'No {"dev " if dev else ""}requirements file found.',
+                        fg=Main._INFO_COLOR,
                     )
 
-            if has_req:
-                click.secho('Locking packages...', fg=Main._INFO_COLOR)
-                Pipa.lock()
+                return done
+
+            graph.add(
+                'requirements',
+                req_install,
+                *basics,
+                label='Installing requirements...',
+            )
+            if dev:
+                graph.add(
+                    'dev',
+                    lambda: req_install(dev=True),
+                    'requirements',
+                    label='Installing dev requirements...',
+                )
+            graph.add(
+                'lock',
+                lambda: graph.result('requirements') and Pipa.lock(),
+                'dev' if dev else 'requirements',
+                label='Locking packages...',
+            )
+            installed = 'lock'
         else:
-            click.secho(
-                'Installing locked dependencies...', fg=Main._INFO_COLOR
+
+            def lock_install() -> None:
+                if not Pipa.req_install(
+                    from_lock=True, offline=offline, dev=dev
+                ):
+                    click.secho('No locked file found.', fg=Main._INFO_COLOR)
+
+            graph.add(
+                'locked',
+                lock_install,
+                *basics,
+                label='Installing locked dependencies...',
             )
-            if not Pipa.req_install(from_lock=True):
-                click.secho('No locked file found.', fg=Main._INFO_COLOR)
 
+        if precompile:
+            graph.add(
+                'compile',
+                Pipa.compile,
+                installed,
+                label='Compiling bytecode...',
+            )
 
-if __name__ == '__main__':
-    import sys
+        with Main._exclusive(), Settings.transaction():
+            graph.run()
+
+        Main._print_timings(graph)
+        if precompile:
+            Main._print_compile(graph.result('compile'))
 
+
+if __name__ == '__main__':
     sys.argv[0] = 'python -m pipa'
     Main.run()
@@ -0,0 +1,151 @@
+# Runs inside the project venv, so it must only depend on the stdlib.
+import os
+import sys
+import json
+import time
+import argparse
+import py_compile
+import importlib.util
+from typing import Dict, Iterator, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+
+
+class Bytecode:
+    MODES: Dict[str, py_compile.PycInvalidationMode] = {
+        'timestamp': py_compile.PycInvalidationMode.TIMESTAMP,
+        'checked-hash': py_compile.PycInvalidationMode.CHECKED_HASH,
+        'unchecked-hash': py_compile.PycInvalidationMode.UNCHECKED_HASH,
+    }
+    # PEP 552 flags: bit 0 for hash based, bit 1 for checked.
+    _FLAGS: Dict[str, int] = {
+        'timestamp': 0b00,
+        'checked-hash': 0b11,
+        'unchecked-hash': 0b01,
+    }
+    _BATCH: int = 256
+    _TESTS: Tuple[str, ...] = ('test', 'tests')
+
+    def __init__(self, invalidation: str, jobs: int = None):
+        self.invalidation: str = invalidation
+        self.jobs: int = jobs or os.cpu_count() or 1
+
+    def compile(self, paths: List[str], projects: List[str] = ()) -> Dict:
+        start: float = time.perf_counter()
+        sources: List[str] = [
+            *[_ for path in paths for _ in self.sources(path)],
+            *[_ for root in projects for _ in self.sources(root, True)],
+        ]
+        batches: List[List[str]] = [
+            sources[i : i + self._BATCH]
+            for i in range(0, len(sources), self._BATCH)
+        ]
+        results: List[Tuple[int, List[str]]] = []
+
+        if self.jobs > 1 and len(batches) > 1:
+            with ProcessPoolExecutor(
+                max_workers=min(self.jobs, len(batches))
+            ) as pool:
+                results = list(pool.map(self._batch, batches))
+        else:
+            results = [self._batch(batch) for batch in batches]
+
+        return {
+            'checked': len(sources),
+            'compiled': sum(compiled for compiled, _ in results),
+            'failed': [path for _, failed in results for path in failed],
+            'elapsed': time.perf_counter() - start,
+        }
+
+    def sources(self, path: str, project: bool = False) -> Iterator[str]:
+        if os.path.isfile(path):
+            if path.endswith('.py'):
+                yield path
+            return
+
+        for parent, dirs, files in os.walk(path):
+            # Nested venvs and caches are never part of the sources, nor
+            # are the tests of a project.
+            dirs[:] = sorted(
+                _
+                for _ in dirs
+                if not _.startswith('.')
+                and _ != '__pycache__'
+                and not (project and _ in self._TESTS)
+                and not os.path.exists(os.path.join(parent, _, 'pyvenv.cfg'))
+            )
+            for file in sorted(files):
+                if file.endswith('.py') and not (
+                    project and file.startswith('test_')
+                ):
+                    yield os.path.join(parent, file)
+
+    def valid(self, source: str) -> bool:
+        try:
+            with open(importlib.util.cache_from_source(source), 'rb') as fh:
+                header: bytes = fh.read(16)
+        except OSError:
+            return False
+
+        if len(header) < 16 or header[:4] != importlib.util.MAGIC_NUMBER:
+            return False
+        # A pyc of another invalidation mode is rewritten, for reproducible
+        # images it must be the requested one.
+        if (
+            int.from_bytes(header[4:8], 'little')
+            != self._FLAGS[self.invalidation]
+        ):
+            return False
+
+        try:
+            if self.invalidation == 'timestamp':
+                st: os.stat_result = os.stat(source)
+                return header[8:16] == (
+                    (int(st.st_mtime) & 0xFFFFFFFF).to_bytes(4, 'little')
+                    + (st.st_size & 0xFFFFFFFF).to_bytes(4, 'little')
+                )
+
+            with open(source, 'rb') as fh:
+                return header[8:16] == importlib.util.source_hash(fh.read())
+        except OSError:
+            return False
+
+    def _batch(self, sources: List[str]) -> Tuple[int, List[str]]:
+        compiled: int = 0
+        failed: List[str] = []
+
+        for source in sources:
+            if self.valid(source):
+                continue
+
+            try:
+                py_compile.compile(
+                    source,
+                    doraise=True,
+                    invalidation_mode=self.MODES[self.invalidation],
+                )
+                compiled += 1
+            except (py_compile.PyCompileError, OSError, ValueError):
+                # Like compileall, broken or read-only files are reported,
+                # they do not fail the whole run.
+                failed.append(source)
+
+        return compiled, failed
+
+
+if __name__ == '__main__':
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--invalidation', choices=list(Bytecode.MODES), default='timestamp'
+    )
+    parser.add_argument('--jobs', type=int, default=None)
+    # Walked here, a project's file list would not fit on the command line.
+    parser.add_argument('--project', action='append', default=[])
+    parser.add_argument('paths', nargs='*')
+    args: argparse.Namespace = parser.parse_args()
+
+    json.dump(
+        Bytecode(args.invalidation, jobs=args.jobs).compile(
+            args.paths, projects=args.project
+        ),
+        sys.stdout,
+    )
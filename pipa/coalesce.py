@@ -0,0 +1,180 @@
+from __future__ import annotations
+import os
+import json
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from pathlib import Path
+from pipa.mutex import ProjectLock
+from pipa.packager import Packager
+from pipa.settings import Settings
+
+
+class Request:
+    INSTALL: str = 'install'
+    REMOVE: str = 'remove'
+
+    def __init__(
+        self, action: str, pkgs: List[str], dev: bool = False, id: str = None
+    ):
+        self.action: str = action
+        self.pkgs: List[str] = list(dict.fromkeys(pkgs))
+        self.dev: bool = dev
+        self.id: str = id or f'{time.time_ns():020d}-{os.getpid()}'
+
+
+class Outcome:
+    def __init__(self, batch: int = 1):
+        self.batch: int = batch
+        self.failed: List[str] = []
+        self.orphans: List[str] = []
+        self.locked: bool = False
+        self.error: str = None
+
+
+class InstallQueue:
+    DIR: Path = Path('.pipa-queue')
+    # Results nobody came back for, like an interrupted waiter's.
+    _EXPIRES: int = 3600
+
+    @classmethod
+    def submit(
+        cls, request: Request, on_wait: Callable[[], None] = None
+    ) -> Outcome:
+        pending: Path = cls.DIR / f'{request.id}.json'
+        done: Path = cls.DIR / f'{request.id}.done'
+        cls._write(pending, request.__dict__)
+
+        try:
+            with ProjectLock().held(on_wait=on_wait):
+                # Merged into the run that held the lock while we waited.
+                if done.exists():
+                    return cls._outcome(done)
+
+                return cls._drain()[request.id]
+        finally:
+            pending.unlink(missing_ok=True)
+            done.unlink(missing_ok=True)
+
+    @classmethod
+    def _drain(cls) -> Dict[str, Outcome]:
+        requests: List[Request] = []
+
+        for path in sorted(cls.DIR.glob('*.json')):
+            try:
+                requests.append(
+                    Request(**json.loads(path.read_text(encoding='utf-8')))
+                )
+            except (OSError, ValueError, TypeError):
+                path.unlink(missing_ok=True)
+
+        outcomes: Dict[str, Outcome] = cls._process(requests)
+        for request in requests:
+            cls._write(
+                cls.DIR / f'{request.id}.done', outcomes[request.id].__dict__
+            )
+            (cls.DIR / f'{request.id}.json').unlink(missing_ok=True)
+
+        for path in cls.DIR.glob('*.done'):
+            try:
+                if time.time() - path.stat().st_mtime > cls._EXPIRES:
+                    path.unlink()
+            except OSError:
+                pass
+
+        return outcomes
+
+    @classmethod
+    def _process(cls, requests: List[Request]) -> Dict[str, Outcome]:
+        outcomes: Dict[str, Outcome] = {
+            _.id: Outcome(batch=len(requests)) for _ in requests
+        }
+        upgrade_pkgs: List[str] = []
+        to_lock: List[Request] = []
+
+        # Consecutive requests of the same kind make one pip call.
+        for (action, dev), group in cls._groups(requests):
+            if action == Request.REMOVE:
+                # Checked only now, earlier installs of the batch count.
+                for request in group:
+                    if missing := Packager.unregistered(*request.pkgs):
+                        outcomes[request.id].error = (
+                            f'Package: {missing[0]} not found in '
+                            'requirements files.'
+                        )
+                if not (
+                    group := [_ for _ in group if not outcomes[_.id].error]
+                ):
+                    continue
+
+            pkgs: List[str] = list(
+                dict.fromkeys(pkg for _ in group for pkg in _.pkgs)
+            )
+
+            try:
+                if action == Request.INSTALL:
+                    failed: List[str] = Packager.install(
+                        *pkgs, is_dev=dev, quiet=True
+                    )
+                    for request in group:
+                        outcomes[request.id].failed = [
+                            _ for _ in request.pkgs if _ in failed
+                        ]
+                    upgrade_pkgs += [_ for _ in pkgs if _ not in failed]
+                else:
+                    orphans: List[str] = Packager.uninstall(*pkgs, quiet=True)
+                    for request in group:
+                        outcomes[request.id].orphans = orphans
+            except Exception as e:
+                for request in group:
+                    outcomes[request.id].error = e.__str__()
+                continue
+
+            to_lock += [
+                _ for _ in group if len(outcomes[_.id].failed) < len(_.pkgs)
+            ]
+
+        if to_lock:
+            # One resolution for everything the batch changed.
+            try:
+                Packager.lock(
+                    *dict.fromkeys(upgrade_pkgs),
+                    allow_unsafe=False,
+                    upgrade=False,
+                )
+                for request in to_lock:
+                    outcomes[request.id].locked = True
+            except Exception as e:
+                for request in to_lock:
+                    outcomes[request.id].error = e.__str__()
+
+        return outcomes
+
+    @classmethod
+    def _groups(
+        cls, requests: List[Request]
+    ) -> List[Tuple[Tuple[str, bool], List[Request]]]:
+        groups: List[Tuple[Tuple[str, bool], List[Request]]] = []
+
+        for request in requests:
+            kind: Tuple[str, bool] = (
+                request.action,
+                request.dev and request.action == Request.INSTALL,
+            )
+            if groups and groups[-1][0] == kind:
+                groups[-1][1].append(request)
+            else:
+                groups.append((kind, [request]))
+
+        return groups
+
+    @classmethod
+    def _outcome(cls, path: Path) -> Outcome:
+        outcome: Outcome = Outcome()
+        outcome.__dict__.update(json.loads(path.read_text(encoding='utf-8')))
+
+        return outcome
+
+    @classmethod
+    def _write(cls, path: Path, data: Dict[str, Any]) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Settings.atomic_write(path, json.dumps(data))
@@ -0,0 +1,170 @@
+from __future__ import annotations
+import sys
+import json
+import time
+import subprocess
+from typing import Dict, List
+from pathlib import Path
+from pipa.bytecode import Bytecode
+from pipa.distribution import Distribution
+from pipa.requirements import RequirementsFile
+from pipa.settings import Settings
+from pipa.trace import Trace
+from pipa.virtualenv import Virtualenv
+
+
+class CompileReport:
+    def __init__(self, invalidation: str):
+        self.invalidation: str = invalidation
+        self.checked: int = 0
+        self.compiled: int = 0
+        self.failed: List[str] = []
+        self.elapsed: float = 0.0
+        self.startup: Dict[str, float] = {}
+
+
+class Compiler:
+    ROUNDS: int = 3
+    MODES: List[str] = list(Bytecode.MODES)
+
+    @classmethod
+    def compile(
+        cls,
+        invalidation: str = None,
+        jobs: int = None,
+        measure: bool = False,
+        root: Path = Path('.'),
+    ) -> CompileReport:
+        invalidation = invalidation or Settings.get('compile', 'invalidation')
+        if invalidation not in cls.MODES:
+            raise CompilerError(f'Invalid invalidation mode: {invalidation}')
+        if not (site_packages := Virtualenv.site_packages()):
+            raise CompilerError('No virtual environment found.')
+
+        report: CompileReport = CompileReport(invalidation)
+        modules: List[str] = cls.modules(root) if measure else []
+
+        if measure:
+            report.startup['before'] = cls.startup(modules, root=root)
+
+        # Isolated, or the pipa directory would come first on sys.path and
+        # its modules shadow the stdlib and site-packages ones.
+        cmd: List[str] = [
+            str(Virtualenv.python()),
+            '-I',
+            str(Path(sys.modules[Bytecode.__module__].__file__)),
+            '--invalidation',
+            invalidation,
+            *(
+                ['--jobs', str(jobs)]
+                if (jobs := jobs or Settings.get('compile', 'jobs'))
+                else []
+            ),
+            '--project',
+            str(root.resolve()),
+            str(site_packages),
+        ]
+        with Trace.span('bytecode compile', argv=cmd):
+            process: subprocess.CompletedProcess = subprocess.run(
+                cmd,
+                env=Virtualenv.environ(),
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            )
+        if process.returncode:
+            raise CompilerError(
+                process.stderr.decode(errors='replace').strip()
+                or f'Bytecode compilation exited with {process.returncode}.'
+            )
+
+        result: Dict = json.loads(process.stdout)
+        report.checked = result['checked']
+        report.compiled = result['compiled']
+        report.failed = result['failed']
+        report.elapsed = result['elapsed']
+
+        if measure:
+            report.startup['after'] = cls.startup(modules, root=root)
+
+        return report
+
+    @classmethod
+    def modules(cls, root: Path = Path('.')) -> List[str]:
+        dists: Dict[str, Distribution] = Distribution.scan(
+            Virtualenv.site_packages()
+        )
+        # Only packages, importing a script would run it.
+        modules: List[str] = [
+            path.name
+            for parent in (root, root / 'src')
+            if parent.is_dir()
+            for path in sorted(parent.iterdir())
+            if not path.name.startswith('.')
+            and (path / '__init__.py').is_file()
+        ]
+
+        for line in RequirementsFile(root / 'requirements.txt').lines:
+            if line.name in dists:
+                modules += cls._top_level(dists[line.name])
+
+        return list(dict.fromkeys(modules))
+
+    @classmethod
+    def startup(
+        cls, modules: List[str], root: Path = Path('.'), rounds: int = None
+    ) -> float:
+        code: str = (
+            f'for m in {modules!r}:\n'
+            '    try:\n'
+            '        __import__(m)\n'
+            '    except Exception:\n'
+            '        pass\n'
+        )
+        # Nothing is written while measuring, every round sees the same
+        # bytecode the previous run of the project left behind.
+        env: Dict[str, str] = {
+            **Virtualenv.environ(with_env=True),
+            'PYTHONDONTWRITEBYTECODE': '1',
+        }
+        best: float = None
+
+        for _ in range(rounds or cls.ROUNDS):
+            start: float = time.perf_counter()
+            subprocess.run(
+                [str(Virtualenv.python()), '-c', code],
+                cwd=root,
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            elapsed: float = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best
+
+    @classmethod
+    def _top_level(cls, dist: Distribution) -> List[str]:
+        if (top_level := dist.path / 'top_level.txt').exists():
+            return [
+                _.strip()
+                for _ in top_level.read_text(encoding='utf-8').split('\n')
+                if _.strip() and not _.strip().startswith('_')
+            ]
+
+        modules: List[str] = []
+        if (record := dist.path / 'RECORD').exists():
+            for line in record.read_text(encoding='utf-8').split('\n'):
+                head, sep, _ = line.split(',')[0].partition('/')
+                name: str = head if sep else head.rpartition('.py')[0]
+                if (
+                    name.isidentifier()
+                    and not name.startswith('_')
+                    and (sep or head.endswith('.py'))
+                ):
+                    modules.append(name)
+
+        return list(dict.fromkeys(modules))
+
+
+class CompilerError(Exception):
+    pass
@@ -0,0 +1,163 @@
+from __future__ import annotations
+import json
+from typing import Dict, List, Set
+from pathlib import Path
+from packaging.utils import canonicalize_name
+from pipa.distribution import Distribution
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv
+
+
+class DependencyGraph:
+    VERSION: int = 1
+    CACHE_FILE: str = 'pipa-graph.json'
+    PROTECTED: List[str] = ['pip', 'setuptools', 'wheel']
+
+    def __init__(
+        self, versions: Dict[str, str], requires: Dict[str, List[str]]
+    ):
+        self.versions: Dict[str, str] = versions
+        self.requires: Dict[str, List[str]] = requires
+        self.required_by: Dict[str, List[str]] = {
+            name: [] for name in versions
+        }
+
+        for name, deps in requires.items():
+            for dep in deps:
+                self.required_by[dep].append(name)
+
+    @classmethod
+    def load(cls) -> DependencyGraph:
+        site_packages: Path = Virtualenv.site_packages()
+        cache: Path = Path(Settings.get('venv', 'home')) / cls.CACHE_FILE
+        # Installs and uninstalls add or drop metadata directories.
+        stamp: List = (
+            [cls.VERSION, str(site_packages), site_packages.stat().st_mtime_ns]
+            if site_packages
+            else None
+        )
+
+        try:
+            data: Dict = json.loads(cache.read_text(encoding='utf-8'))
+            if data['stamp'] == stamp:
+                return cls(data['versions'], data['requires'])
+        except (OSError, ValueError, KeyError):
+            pass
+
+        graph: DependencyGraph = cls.scan(site_packages)
+        if stamp:
+            cls._save(
+                cache,
+                {
+                    'stamp': stamp,
+                    'versions': graph.versions,
+                    'requires': graph.requires,
+                },
+            )
+
+        return graph
+
+    @classmethod
+    def scan(cls, site_packages: Path) -> DependencyGraph:
+        dists: Dict[str, Distribution] = Distribution.scan(site_packages)
+        env: Dict[str, str] = Virtualenv.marker_env()
+        extras: Dict[str, Set[str]] = {name: set() for name in dists}
+        requires: Dict[str, Set[str]] = {name: set() for name in dists}
+
+        # Extras asked by a dependent pull more edges, until nothing moves.
+        changed: bool = True
+        while changed:
+            changed = False
+            for name, dist in dists.items():
+                for req in dist.depends_on(extras=extras[name], env=env):
+                    if (dep := canonicalize_name(req.name)) not in dists:
+                        continue
+                    requires[name].add(dep)
+                    if not req.extras <= extras[dep]:
+                        extras[dep] |= req.extras
+                        changed = True
+
+        return cls(
+            {name: dist.version for name, dist in dists.items()},
+            {name: sorted(deps) for name, deps in requires.items()},
+        )
+
+    def closure(self, names: List[str]) -> Set[str]:
+        seen: Set[str] = set()
+        stack: List[str] = [_ for _ in names if _ in self.versions]
+
+        while stack:
+            if (name := stack.pop()) in seen:
+                continue
+
+            seen.add(name)
+            stack += self.requires.get(name, [])
+
+        return seen
+
+    def orphans(self, names: List[str], keep: List[str] = ()) -> Set[str]:
+        removed: Set[str] = {_ for _ in names if _ in self.versions}
+        orphans: Set[str] = self.closure(list(removed)) - (
+            {*keep, *self.PROTECTED} - removed
+        )
+
+        # Anything still required from outside the orphans survives.
+        while survivors := {
+            name
+            for name in orphans - removed
+            if any(_ not in orphans for _ in self.required_by[name])
+        }:
+            orphans -= self.closure(list(survivors)) - removed
+
+        return orphans
+
+    def roots(self) -> List[str]:
+        return sorted(name for name, by in self.required_by.items() if not by)
+
+    def tree(self, names: List[str]) -> List[str]:
+        lines: List[str] = []
+        shown: Set[str] = set()
+
+        def walk(name: str, depth: int, path: Set[str]) -> None:
+            line: str = f'{"  " * depth}{name} {self.versions[name]}'
+
+            if name in shown and self.requires[name]:
+                # Already expanded above, or a dependency cycle.
+                lines.append(f'{line} (*)')
+                return
+
+            lines.append(line)
+            shown.add(name)
+            for dep in self.requires[name]:
+                if dep not in path:
+                    walk(dep, depth + 1, path | {dep})
+
+        for name in names:
+            if name in self.versions:
+                walk(name, 0, {name})
+
+        return lines
+
+    def why(self, name: str) -> List[List[str]]:
+        chains: List[List[str]] = []
+        stack: List[List[str]] = [[name]] if name in self.versions else []
+
+        while stack:
+            chain: List[str] = stack.pop()
+            parents: List[str] = [
+                _ for _ in self.required_by[chain[0]] if _ not in chain
+            ]
+
+            if not parents:
+                chains.append(chain)
+            stack += [[parent, *chain] for parent in parents]
+
+        return sorted(chains)
+
+    @classmethod
+    def _save(cls, path: Path, data: Dict) -> None:
+        # Only a cache, a read-only environment just rebuilds it each time.
+        try:
+            Settings.atomic_write(path, json.dumps(data))
+        except OSError:
+            pass
@@ -0,0 +1,95 @@
+from __future__ import annotations
+from typing import Dict, List, Set
+from pathlib import Path
+from email.parser import HeaderParser
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+
+
+class Distribution:
+    _SUFFIXES: List[str] = ['.dist-info', '.egg-info']
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        name, version = path.stem.split('-')[:2]
+        self.name: str = canonicalize_name(name)
+        self.version: str = version
+        self._requires: List[Requirement] = None
+
+    @property
+    def metadata_file(self) -> Path:
+        return self.path / (
+            'METADATA' if self.path.suffix == '.dist-info' else 'PKG-INFO'
+        )
+
+    @property
+    def requires(self) -> List[Requirement]:
+        if self._requires is None:
+            self._requires = []
+
+            if self.metadata_file.exists():
+                for line in (
+                    HeaderParser()
+                    .parsestr(
+                        self.metadata_file.read_text(
+                            encoding='utf-8', errors='replace'
+                        )
+                    )
+                    .get_all('Requires-Dist', [])
+                ):
+                    try:
+                        self._requires.append(Requirement(line))
+                    except InvalidRequirement:
+                        continue
+
+        return self._requires
+
+    def depends_on(
+        self, extras: Set[str] = (), env: Dict[str, str] = None
+    ) -> List[Requirement]:
+        return [
+            req
+            for req in self.requires
+            if not req.marker
+            or any(
+                req.marker.evaluate({**(env or {}), 'extra': extra})
+                for extra in ('', *extras)
+            )
+        ]
+
+    @classmethod
+    def scan(cls, site_packages: Path) -> Dict[str, Distribution]:
+        dists: Dict[str, Distribution] = {}
+
+        if not site_packages or not site_packages.exists():
+            return dists
+
+        for path in site_packages.iterdir():
+            if path.suffix in cls._SUFFIXES and '-' in path.stem:
+                dist: Distribution = cls(path)
+                dists[dist.name] = dist
+
+        return dists
+
+    @classmethod
+    def closure(
+        cls,
+        roots: List[Requirement],
+        dists: Dict[str, Distribution],
+        env: Dict[str, str] = None,
+    ) -> Dict[str, Set[str]]:
+        seen: Dict[str, Set[str]] = {}
+        stack: List[Requirement] = list(roots)
+
+        while stack:
+            req: Requirement = stack.pop()
+
+            if (name := canonicalize_name(req.name)) not in dists:
+                continue
+            if name in seen and req.extras <= seen[name]:
+                continue
+
+            seen[name] = seen.get(name, set()) | req.extras
+            stack += dists[name].depends_on(extras=seen[name], env=env)
+
+        return seen
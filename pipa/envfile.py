@@ -0,0 +1,67 @@
+import os
+import re
+from typing import Dict
+from pathlib import Path
+
+
+class EnvFile:
+    _ENTRY: re.Pattern = re.compile(
+        r'''^[ \t]*(?:export[ \t]+)?(?P<key>[A-Za-z_][A-Za-z0-9_.-]*)[ \t]*
+        (?:=[ \t]*(?:
+            '(?P<single>(?:[^'\\]|\\.)*)'[ \t]*(?:\#[^\n]*)?
+            |"(?P<double>(?:[^"\\]|\\.)*)"[ \t]*(?:\#[^\n]*)?
+            |(?P<bare>[^\r\n]*)
+        ))?[ \t]*\r?$''',
+        re.MULTILINE | re.VERBOSE,
+    )
+    _ESCAPES: Dict[str, str] = {
+        'n': '\n',
+        'r': '\r',
+        't': '\t',
+        '"': '"',
+        '\'': '\'',
+        '\\': '\\',
+        '$': '$',
+    }
+    _ESCAPE: re.Pattern = re.compile(r'\\(.)')
+    _VAR: re.Pattern = re.compile(
+        r'\$\{(?P<name>[^}:]+)(?::-(?P<default>[^}]*))?\}'
+    )
+    _COMMENT: re.Pattern = re.compile(r'[ \t]+#')
+
+    @classmethod
+    def load(cls, path: Path, encoding: str = 'utf-8') -> Dict[str, str]:
+        return cls.parse(path.read_text(encoding=encoding))
+
+    @classmethod
+    def parse(cls, content: str) -> Dict[str, str]:
+        values: Dict[str, str] = {}
+
+        for match in cls._ENTRY.finditer(content):
+            key: str = match.group('key')
+
+            if (value := match.group('single')) is not None:
+                values[key] = value.replace('\\\'', '\'').replace('\\\\', '\\')
+            elif (value := match.group('double')) is not None:
+                values[key] = cls._interpolate(
+                    cls._ESCAPE.sub(
+                        lambda m: cls._ESCAPES.get(m[1], m[0]), value
+                    ),
+                    values,
+                )
+            elif (value := match.group('bare')) is not None:
+                values[key] = cls._interpolate(
+                    cls._COMMENT.split(value, 1)[0].strip(), values
+                )
+
+        return values
+
+    @classmethod
+    def _interpolate(cls, value: str, values: Dict[str, str]) -> str:
+        return cls._VAR.sub(
+            lambda m: values.get(m['name'])
+            or os.environ.get(m['name'])
+            or m['default']
+            or '',
+            value,
+        )
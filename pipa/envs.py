@@ -0,0 +1,326 @@
+from __future__ import annotations
+import os
+import re
+import sys
+import json
+import shutil
+import socket
+import hashlib
+import time
+from typing import Dict, List, Set, Tuple
+from pathlib import Path
+from pipa.mutex import FileLock
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv
+from pipa.warm import WarmServer
+
+
+class GcReport:
+    def __init__(self, budget: int):
+        self.budget: int = budget
+        self.size: int = 0
+        self.evicted: List[Tuple[Path, int]] = []
+        self.in_use: List[Path] = []
+
+
+class EnvPool:
+    VERSION: int = 1
+    MARKER: str = '.pipa-env'
+    REFS_DIR: str = '.pipa-refs'
+    LOCK_FILE: str = 'requirements.lock'
+    DEV_LOCK_FILE: str = 'requirements-dev.lock'
+    DEV_FILE: str = 'requirements-dev.txt'
+    POOL_LOCK: str = '.pipa-envs.lock'
+    # An environment without marker yet may still be under construction.
+    _GRACE: int = 3600
+    _SIZE: re.Pattern = re.compile(r'\s*(\d+(?:\.\d+)?)\s*([a-zA-Z]*)\s*')
+    _UNITS: Dict[str, int] = {
+        '': 1,
+        'b': 1,
+        'k': 1 << 10,
+        'kib': 1 << 10,
+        'm': 1 << 20,
+        'mib': 1 << 20,
+        'g': 1 << 30,
+        'gib': 1 << 30,
+        't': 1 << 40,
+        'tib': 1 << 40,
+    }
+
+    @classmethod
+    def home(cls) -> Path:
+        return Path(Settings.get('envs', 'home')).expanduser()
+
+    @classmethod
+    def key(cls, root: Path = Path('.'), dev: bool = False) -> str:
+        python: Path = Path(shutil.which('python') or sys.executable).resolve()
+
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    'version': cls.VERSION,
+                    'python': [
+                        str(python),
+                        python.stat().st_size,
+                        python.stat().st_mtime_ns,
+                    ],
+                    'lock': cls._digest(root / cls.LOCK_FILE),
+                    # Only the layers installed in the environment count.
+                    'dev': cls._digest(root / cls.DEV_FILE) if dev else None,
+                    'dev_lock': (
+                        cls._digest(root / cls.DEV_LOCK_FILE) if dev else None
+                    ),
+                }
+            ).encode('utf-8')
+        ).hexdigest()[:16]
+
+    @classmethod
+    def private(cls, name: str) -> Path:
+        return cls.home() / f'{name}-{Virtualenv.gen_hash()}'
+
+    @classmethod
+    def keyed(cls, home: Path) -> str:
+        try:
+            return json.loads(
+                (home / cls.MARKER).read_text(encoding='utf-8')
+            ).get('key')
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def attach(cls, home: Path, root: Path = Path('.')) -> None:
+        with cls._mutex().held():
+            if (current := Path(Settings.get('venv', 'home'))) != home:
+                (current / cls.REFS_DIR / cls._ref_name(root)).unlink(
+                    missing_ok=True
+                )
+
+            Settings.set('venv', 'home', val=str(home))
+            if not (home / cls.MARKER).exists():
+                cls._mark(home, None)
+
+            (refs := home / cls.REFS_DIR).mkdir(exist_ok=True)
+            (refs / cls._ref_name(root)).write_text(
+                str(root.resolve()), encoding='utf-8'
+            )
+            cls.touch(home)
+
+    @classmethod
+    def checkout(cls, root: Path = Path('.'), dev: bool = False) -> bool:
+        if not (root / cls.LOCK_FILE).exists():
+            return False
+
+        # Held until the ref is written, so gc cannot evict it meanwhile.
+        with cls._mutex().held():
+            if not (
+                (path := cls.home() / cls.key(root, dev=dev)) / cls.MARKER
+            ).exists():
+                return False
+
+            cls.attach(path, root=root)
+
+        return True
+
+    @classmethod
+    def detach(cls) -> None:
+        # Keyed environments match their lock, they are never mutated.
+        if cls.keyed(current := Path(Settings.get('venv', 'home'))) is None:
+            return
+
+        with cls._mutex().held():
+            target: Path = cls.private(Settings.get('project', 'name'))
+            if cls.refs(current) - {str(Path('.').resolve())}:
+                cls._copy(current, target)
+            else:
+                current.rename(target)
+                Virtualenv.relocate(current, home=target)
+                shutil.rmtree(target / cls.REFS_DIR, ignore_errors=True)
+
+            cls._mark(target, None)
+            cls.attach(target)
+
+    @classmethod
+    def publish(cls, dev: bool = False) -> None:
+        if cls.keyed(current := Path(Settings.get('venv', 'home'))):
+            return
+
+        path: Path = cls.home() / cls.key(dev=dev)
+        with cls._mutex().held():
+            if not (path / cls.MARKER).exists():
+                try:
+                    current.rename(path)
+                except OSError:
+                    # On another file system.
+                    return
+                Virtualenv.relocate(current, home=path)
+                cls._mark(path, path.name)
+
+            cls.attach(path)
+
+    @classmethod
+    def refs(cls, home: Path) -> Set[str]:
+        import toml
+
+        live: Set[str] = set()
+
+        for ref in (
+            (home / cls.REFS_DIR).iterdir()
+            if (home / cls.REFS_DIR).is_dir()
+            else []
+        ):
+            try:
+                root: str = ref.read_text(encoding='utf-8')
+                settings: Dict = toml.loads(
+                    (Path(root) / Settings.FILE).read_text(encoding='utf-8')
+                )
+                if Path(settings['venv']['home']) == home:
+                    live.add(root)
+                    continue
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            ref.unlink(missing_ok=True)
+
+        return live
+
+    @classmethod
+    def in_use(cls, home: Path) -> bool:
+        if cls.refs(home):
+            return True
+        if (
+            not (home / cls.MARKER).exists()
+            and time.time() - home.stat().st_mtime < cls._GRACE
+        ):
+            return True
+
+        # A warm server keeps the environment busy even without a project.
+        probe: socket.socket = socket.socket(socket.AF_UNIX)
+        try:
+            probe.connect(str(home / WarmServer.SOCKET_FILE))
+        except OSError:
+            return False
+        finally:
+            probe.close()
+
+        return True
+
+    @classmethod
+    def touch(cls, home: Path) -> None:
+        try:
+            os.utime(home / cls.MARKER)
+        except OSError:
+            pass
+
+    @classmethod
+    def gc(cls, budget: int = None, dry_run: bool = False) -> GcReport:
+        report: GcReport = GcReport(
+            budget
+            if budget is not None
+            else cls.parse_size(Settings.get('envs', 'budget'))
+        )
+
+        with cls._mutex().held():
+            envs: List[Path] = (
+                [
+                    path
+                    for path in cls.home().iterdir()
+                    if path.is_dir() and not path.name.startswith('.')
+                ]
+                if cls.home().is_dir()
+                else []
+            )
+            sizes: Dict[Path, int] = {path: cls._size(path) for path in envs}
+            report.size = sum(sizes.values())
+
+            for path in sorted(envs, key=cls._last_used):
+                if report.size <= report.budget:
+                    break
+                if cls.in_use(path):
+                    report.in_use.append(path)
+                    continue
+
+                if not dry_run:
+                    shutil.rmtree(path, ignore_errors=True)
+                report.evicted.append((path, sizes[path]))
+                report.size -= sizes[path]
+
+        return report
+
+    @classmethod
+    def parse_size(cls, size: str) -> int:
+        if isinstance(size, int):
+            return size
+
+        match: re.Match = cls._SIZE.fullmatch(str(size))
+        if not match or match.group(2).lower() not in cls._UNITS:
+            raise EnvPoolError(f'Invalid size: {size}')
+
+        return int(float(match.group(1)) * cls._UNITS[match.group(2).lower()])
+
+    @classmethod
+    def _copy(cls, src: Path, dest: Path) -> None:
+        from pipa.store import Store
+
+        shutil.copytree(
+            src,
+            dest,
+            symlinks=True,
+            ignore=shutil.ignore_patterns(
+                '__pycache__', cls.REFS_DIR, WarmServer.SOCKET_FILE
+            ),
+            copy_function=lambda s, d: Store.link(Path(s), Path(d)),
+        )
+        Virtualenv.relocate(src, home=dest)
+
+    @classmethod
+    def _mutex(cls) -> FileLock:
+        return FileLock(cls.home() / cls.POOL_LOCK)
+
+    @classmethod
+    def _mark(cls, home: Path, key: str) -> None:
+        (home / cls.MARKER).write_text(
+            json.dumps({'version': cls.VERSION, 'key': key}), encoding='utf-8'
+        )
+
+    @classmethod
+    def _last_used(cls, home: Path) -> float:
+        try:
+            return (home / cls.MARKER).stat().st_mtime
+        except OSError:
+            return home.stat().st_mtime
+
+    @classmethod
+    def _size(cls, home: Path) -> int:
+        size: int = 0
+        seen: Set[Tuple[int, int]] = set()
+
+        for path, _, files in os.walk(home):
+            for file in files:
+                try:
+                    st: os.stat_result = os.lstat(os.path.join(path, file))
+                except OSError:
+                    continue
+                # Files hardlinked from the store or a sibling count once.
+                if (st.st_dev, st.st_ino) in seen:
+                    continue
+                seen.add((st.st_dev, st.st_ino))
+                size += getattr(st, 'st_blocks', 0) * 512 or st.st_size
+
+        return size
+
+    @classmethod
+    def _ref_name(cls, root: Path) -> str:
+        path: bytes = str(root.resolve()).encode('utf-8')
+
+        return hashlib.sha256(path).hexdigest()[:16]
+
+    @classmethod
+    def _digest(cls, path: Path) -> str:
+        return (
+            hashlib.sha256(path.read_bytes()).hexdigest()
+            if path.exists()
+            else None
+        )
+
+
+class EnvPoolError(Exception):
+    pass
@@ -0,0 +1,171 @@
+from __future__ import annotations
+import os
+import json
+import mmap
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from pathlib import Path
+from packaging.utils import (
+    InvalidSdistFilename,
+    InvalidWheelFilename,
+    canonicalize_name,
+    parse_sdist_filename,
+    parse_wheel_filename,
+)
+from pipa.lockfile import LockEntry
+from pipa.settings import Settings
+
+
+class VerifyReport:
+    OK: str = 'ok'
+    MISMATCH: str = 'mismatch'
+    MISSING: str = 'missing'
+
+    def __init__(self):
+        self.results: Dict[str, str] = {}
+
+    @property
+    def failed(self) -> List[str]:
+        return [
+            name for name, result in self.results.items() if result != self.OK
+        ]
+
+
+class Hasher:
+    _CHUNK: int = 1 << 20
+    # Above this size, files are hashed straight from a memory map.
+    _MMAP_SIZE: int = 1 << 23
+    _cache: Dict[str, List[Any]] = None
+    _dirty: bool = False
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def jobs(cls) -> int:
+        return Settings.get('installer', 'jobs') or min(
+            32, (os.cpu_count() or 1) * 2
+        )
+
+    @classmethod
+    def digest(cls, path: Path, cache: bool = True) -> str:
+        if not cache:
+            return cls._sha256(path)
+
+        st: os.stat_result = path.stat()
+        key: str = str(path.resolve())
+        stamp: List[int] = [st.st_size, st.st_mtime_ns, st.st_ino]
+
+        with cls._lock:
+            if (hit := cls._entries().get(key)) and hit[:3] == stamp:
+                return hit[3]
+
+        digest: str = cls._sha256(path)
+
+        with cls._lock:
+            cls._entries()[key] = [*stamp, digest]
+            cls._dirty = True
+
+        return digest
+
+    @classmethod
+    def digests(cls, paths: List[Path], cache: bool = True) -> Dict[Path, str]:
+        if not paths:
+            return {}
+
+        with ThreadPoolExecutor(
+            max_workers=min(cls.jobs(), len(paths))
+        ) as pool:
+            digests: Dict[Path, str] = dict(
+                zip(paths, pool.map(lambda _: cls.digest(_, cache), paths))
+            )
+
+        if cache:
+            cls.flush()
+
+        return digests
+
+    @classmethod
+    def verify(
+        cls, entries: Dict[str, LockEntry], directory: Path
+    ) -> VerifyReport:
+        report: VerifyReport = VerifyReport()
+        artifacts: Dict[str, List[Path]] = {}
+
+        for path in directory.iterdir() if directory.is_dir() else []:
+            if (name := cls._artifact_name(path)) in entries:
+                artifacts.setdefault(name, []).append(path)
+
+        digests: Dict[Path, str] = cls.digests(
+            [path for paths in artifacts.values() for path in paths]
+        )
+
+        for name, entry in entries.items():
+            if not (paths := artifacts.get(name)):
+                report.results[name] = VerifyReport.MISSING
+            elif all(f'sha256:{digests[_]}' in entry.hashes for _ in paths):
+                report.results[name] = VerifyReport.OK
+            else:
+                report.results[name] = VerifyReport.MISMATCH
+
+        return report
+
+    @classmethod
+    def flush(cls) -> None:
+        with cls._lock:
+            if not cls._dirty:
+                return
+
+            path: Path = cls._cache_path()
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Keep what other processes hashed meanwhile, drop what is gone.
+            cls._cache = {
+                key: entry
+                for key, entry in {**cls._read(), **cls._cache}.items()
+                if os.path.exists(key)
+            }
+
+            Settings.atomic_write(path, json.dumps(cls._cache))
+
+            cls._dirty = False
+
+    @classmethod
+    def _sha256(cls, path: Path) -> str:
+        sha: Any = hashlib.sha256()
+
+        with path.open('rb') as fh:
+            if os.fstat(fh.fileno()).st_size >= cls._MMAP_SIZE:
+                with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    sha.update(mm)
+            else:
+                while chunk := fh.read(cls._CHUNK):
+                    sha.update(chunk)
+
+        return sha.hexdigest()
+
+    @classmethod
+    def _artifact_name(cls, path: Path) -> str:
+        try:
+            if path.suffix == '.whl':
+                return canonicalize_name(parse_wheel_filename(path.name)[0])
+            return canonicalize_name(parse_sdist_filename(path.name)[0])
+        except (InvalidWheelFilename, InvalidSdistFilename):
+            return None
+
+    @classmethod
+    def _entries(cls) -> Dict[str, List[Any]]:
+        if cls._cache is None:
+            cls._cache = cls._read()
+
+        return cls._cache
+
+    @classmethod
+    def _read(cls) -> Dict[str, List[Any]]:
+        try:
+            return json.loads(cls._cache_path().read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _cache_path(cls) -> Path:
+        return Path(Settings.get('hashes', 'cache')).expanduser()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+import os
+import shutil
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List
+from pathlib import Path
+from pipa.hashes import Hasher
+from pipa.lockfile import Lockfile
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv, VirtualenvError
+from pipa.wheel import Wheel, WheelError, WheelInstaller
+
+
+class ParallelInstaller:
+    @classmethod
+    def enabled(cls, lock: Lockfile, names: List[str]) -> bool:
+        # Without exact pins and hashes, pip has to resolve or trust.
+        return bool(Settings.get('installer', 'parallel')) and all(
+            lock.entries[name].version and lock.entries[name].hashes
+            for name in names
+        )
+
+    @classmethod
+    def jobs(cls) -> int:
+        return Hasher.jobs()
+
+    @classmethod
+    def install(
+        cls,
+        lock: Lockfile,
+        names: List[str],
+        quiet: bool = True,
+        on_ready: Callable[[List[str]], None] = None,
+    ) -> List[str]:
+        # Staged in the venv so trees are moved, not copied, in place.
+        tmp: Path = Path(
+            tempfile.mkdtemp(
+                dir=Settings.get('venv', 'home'), prefix='.pipa-install-'
+            )
+        )
+
+        try:
+            wheels: Dict[str, Path] = cls._download(
+                lock, names, tmp / 'wheels', quiet=quiet
+            )
+            installer: WheelInstaller = WheelInstaller(
+                Virtualenv.site_packages(),
+                Virtualenv.bin_dir(),
+                Virtualenv.python(),
+                link=os.replace,
+            )
+
+            digests: Dict[Path, str] = Hasher.digests(
+                list(wheels.values()), cache=False
+            )
+            if mismatch := [
+                path.name
+                for name, path in wheels.items()
+                if f'sha256:{digests[path]}' not in lock.entries[name].hashes
+            ]:
+                raise WheelError(f'Hash mismatch for: {", ".join(mismatch)}')
+            if on_ready:
+                on_ready(list(wheels))
+
+            with ThreadPoolExecutor(max_workers=cls.jobs()) as pool:
+                futures: List[Future] = [
+                    pool.submit(
+                        cls._install, installer, path, tmp / 'trees' / name
+                    )
+                    for name, path in wheels.items()
+                ]
+                for future in futures:
+                    future.result()
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        return [name for name in names if name not in wheels]
+
+    @classmethod
+    def _install(
+        cls, installer: WheelInstaller, path: Path, tree: Path
+    ) -> None:
+        Wheel(path).unpack(tree)
+        installer.install(tree)
+
+    @classmethod
+    def _download(
+        cls, lock: Lockfile, names: List[str], dest: Path, quiet: bool = True
+    ) -> Dict[str, Path]:
+        dest.mkdir(parents=True)
+        chunks: List[List[str]] = [
+            names[i :: cls.jobs()] for i in range(min(cls.jobs(), len(names)))
+        ]
+
+        with ThreadPoolExecutor(max_workers=len(chunks) or 1) as pool:
+            for future in [
+                pool.submit(cls._fetch, lock, chunk, dest, quiet)
+                for chunk in chunks
+            ]:
+                future.result()
+
+        return {
+            wheel.name: wheel.path
+            for wheel in map(Wheel, dest.glob('*.whl'))
+            if wheel.name in names
+        }
+
+    @classmethod
+    def _fetch(
+        cls, lock: Lockfile, names: List[str], dest: Path, quiet: bool = True
+    ) -> None:
+        fd, path = tempfile.mkstemp(
+            dir=dest.parent, suffix='.txt', prefix='requirements-'
+        )
+
+        try:
+            with os.fdopen(
+                fd, 'w', encoding=Settings.get('core', 'encoding')
+            ) as fh:
+                fh.write(lock.render(*names))
+
+            Virtualenv.pip(
+                'download',
+                '--no-deps',
+                '--only-binary=:all:',
+                '-d',
+                dest,
+                '-r',
+                path,
+                quiet=quiet,
+            )
+        except VirtualenvError:
+            # Find the entries without a usable wheel, pip installs them.
+            if len(names) > 1:
+                for name in names:
+                    cls._fetch(lock, [name], dest, quiet=quiet)
+        finally:
+            os.remove(path)
@@ -0,0 +1,99 @@
+from __future__ import annotations
+import sys
+import json
+import hashlib
+import platform
+from typing import Any, Dict, List, Tuple
+from pathlib import Path
+from packaging.requirements import Requirement
+from packaging.utils import canonicalize_name
+from pipa.requirements import RequirementsFile
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv
+
+
+class LockCache:
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self._data: Dict[str, Any] = (
+            json.loads(path.read_text(encoding='utf-8'))
+            if path.exists()
+            else {}
+        )
+
+    @classmethod
+    def normalize(cls, *req_files: Tuple[Path]) -> Dict[str, str]:
+        inputs: Dict[str, str] = {}
+
+        for req_file in req_files:
+            for line in RequirementsFile(req_file).lines:
+                if not line.content:
+                    continue
+                if not line.req:
+                    inputs[line.content] = line.content
+                    continue
+
+                # A package listed in several layers counts with each line.
+                inputs[line.name] = ' & '.join(
+                    filter(None, [inputs.get(line.name), cls._line(line.req)])
+                )
+
+        return inputs
+
+    @classmethod
+    def digest(cls, path: Path) -> str:
+        return (
+            hashlib.sha256(path.read_bytes()).hexdigest()
+            if path.exists()
+            else None
+        )
+
+    def key(self, inputs: Dict[str, str], *flags: List[Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    'inputs': sorted(inputs.values()),
+                    'python': Virtualenv.python_version(),
+                    'platform': [sys.platform, platform.machine()],
+                    'flags': list(flags),
+                }
+            ).encode('utf-8')
+        ).hexdigest()
+
+    def hit(self, key: str, *lock_files: Tuple[Path]) -> bool:
+        return (
+            self._data.get('key') == key
+            and self._data.get('locks') == [self.digest(_) for _ in lock_files]
+            and lock_files[0].exists()
+        )
+
+    def changed(self, inputs: Dict[str, str]) -> List[str]:
+        cached: Dict[str, str] = self._data.get('inputs', {})
+
+        return [
+            name
+            for name, line in inputs.items()
+            if name in cached and cached[name] != line
+        ]
+
+    def save(
+        self, key: str, inputs: Dict[str, str], *lock_files: Tuple[Path]
+    ) -> None:
+        self._data = {
+            'key': key,
+            'locks': [self.digest(_) for _ in lock_files],
+            'inputs': inputs,
+        }
+        Settings.atomic_write(
+            self.path, json.dumps(self._data, indent=2, sort_keys=True)
+        )
+
+    @classmethod
+    def _line(cls, req: Requirement) -> str:
+        return (
+            canonicalize_name(req.name)
+            + (f'[{",".join(sorted(req.extras))}]' if req.extras else '')
+            + ','.join(sorted(str(_) for _ in req.specifier))
+            + (f'; {req.marker}' if req.marker else '')
+            + (f' @ {req.url}' if req.url else '')
+        )
@@ -0,0 +1,161 @@
+from __future__ import annotations
+import re
+from typing import Dict, List, Set, Tuple
+from pathlib import Path
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from pipa.settings import Settings
+
+
+class LockEntry:
+    def __init__(self, req: Requirement, hashes: Set[str], text: str):
+        self.req: Requirement = req
+        self.name: str = canonicalize_name(req.name)
+        self.hashes: Set[str] = hashes
+        self.text: str = text
+        self.via: List[str] = []
+
+    @property
+    def block(self) -> str:
+        lines: List[str] = [
+            ' \\\n    '.join(re.split(r'\s+(?=--)', self.text))
+        ]
+
+        if len(self.via) == 1:
+            lines.append(f'    # via {self.via[0]}')
+        elif self.via:
+            lines += ['    # via', *[f'    #   {_}' for _ in self.via]]
+
+        return '\n'.join(lines)
+
+    @property
+    def version(self) -> str:
+        for spec in self.req.specifier:
+            if spec.operator in ('==', '==='):
+                return spec.version
+
+        return None
+
+    def applies(self, env: Dict[str, str] = None) -> bool:
+        return not self.req.marker or self.req.marker.evaluate(env)
+
+
+class Lockfile:
+    _HASH: re.Pattern = re.compile(r'--hash[=\s]+(\S+)')
+    _VIA: re.Pattern = re.compile(r'#\s*(via\b\s*)?(.*)$')
+    _OPTIONS: Tuple[str] = (
+        '-i',
+        '--index-url',
+        '--extra-index-url',
+        '-f',
+        '--find-links',
+        '--trusted-host',
+        '--no-index',
+    )
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self.options: List[str] = []
+        self.entries: Dict[str, LockEntry] = {}
+        self.notes: List[str] = []
+
+        if path.exists():
+            self._parse(
+                path.read_text(encoding=Settings.get('core', 'encoding'))
+            )
+
+    @classmethod
+    def layers(cls, *paths: Tuple[Path]) -> Lockfile:
+        lock: Lockfile = cls(paths[0])
+
+        for path in paths[1:]:
+            for option in (layer := cls(path)).options:
+                if option not in lock.options:
+                    lock.options.append(option)
+            lock.entries.update(layer.entries)
+
+        return lock
+
+    def reached_from(self, source: Path) -> Set[str]:
+        # pip-tools annotates each pin with the inputs and pins needing it.
+        reached: Set[str] = {
+            name
+            for name, entry in self.entries.items()
+            if any(
+                _.startswith(('-r ', '-c '))
+                and Path(_[3:].split(' (')[0].strip()).resolve()
+                == source.resolve()
+                for _ in entry.via
+            )
+        }
+
+        while grown := {
+            name
+            for name, entry in self.entries.items()
+            if name not in reached
+            and any(canonicalize_name(_) in reached for _ in entry.via)
+        }:
+            reached |= grown
+
+        return reached
+
+    def save(self, path: Path, names: List[str]) -> None:
+        Settings.atomic_write(
+            path,
+            '\n'.join(
+                [
+                    *self.options,
+                    *([''] if self.options else []),
+                    *[self.entries[name].block for name in names],
+                    *([''] if self.notes else []),
+                    *self.notes,
+                ]
+            )
+            + '\n',
+            encoding=Settings.get('core', 'encoding'),
+        )
+
+    def _parse(self, content: str) -> None:
+        entry: LockEntry = None
+
+        for line in re.sub(r'\\\n', ' ', content).split('\n'):
+            if (
+                line[:1].isspace()
+                and entry
+                and (match := self._VIA.match(line.strip()))
+            ):
+                entry.via += [match.group(2)] if match.group(2) else []
+                continue
+            if not line[:1].isspace():
+                entry = None
+            if line[:1] == '#' and self.entries:
+                # Warnings about unpinned packages close the file.
+                self.notes.append(line)
+                continue
+            if not (line := line.split(' #')[0].strip()) or line[0] == '#':
+                continue
+
+            if line[0] == '-':
+                if line.split()[0].split('=')[0] in self._OPTIONS:
+                    self.options.append(line)
+                continue
+
+            try:
+                req: Requirement = Requirement(line.split(' --')[0])
+            except InvalidRequirement:
+                continue
+
+            entry = LockEntry(req, set(self._HASH.findall(line)), line)
+            self.entries[entry.name] = entry
+
+    def applicable(self, env: Dict[str, str] = None) -> Dict[str, LockEntry]:
+        return {
+            name: entry
+            for name, entry in self.entries.items()
+            if entry.applies(env)
+        }
+
+    def render(self, *names: List[str]) -> str:
+        return '\n'.join(
+            self.options + [self.entries[name].text for name in names]
+        )
@@ -0,0 +1,119 @@
+from __future__ import annotations
+import os
+import time
+import threading
+from typing import Callable, Dict, Iterator, List
+from contextlib import contextmanager
+from pathlib import Path
+from pipa.settings import Settings, System
+
+
+class FileLock:
+    _POLL: float = 0.1
+    # Held locks per file: re-entrant for a thread, exclusive between
+    # threads and, through the lock file, between processes.
+    _held: Dict[str, List] = {}
+    _guard: threading.Lock = threading.Lock()
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+
+    @contextmanager
+    def held(self, on_wait: Callable[[], None] = None) -> Iterator[None]:
+        if not self.acquire(blocking=False):
+            if on_wait:
+                on_wait()
+            self.acquire()
+
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, blocking: bool = True) -> bool:
+        key: str = self._key()
+
+        with self._guard:
+            state: List = self._held.setdefault(
+                key, [threading.RLock(), 0, None]
+            )
+        if not state[0].acquire(blocking=blocking):
+            return False
+
+        if state[1]:
+            state[1] += 1
+            return True
+
+        fd: int = None
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            if not self._lock(fd, blocking):
+                os.close(fd)
+                state[0].release()
+                return False
+        except BaseException:
+            if fd is not None:
+                os.close(fd)
+            state[0].release()
+            raise
+
+        state[1], state[2] = 1, fd
+
+        return True
+
+    def release(self) -> None:
+        state: List = self._held[self._key()]
+
+        state[1] -= 1
+        if not state[1]:
+            # The file stays, unlinking it would race with a new locker.
+            self._unlock(state[2])
+            os.close(state[2])
+            state[2] = None
+        state[0].release()
+
+    def _key(self) -> str:
+        return os.path.abspath(self.path)
+
+    @classmethod
+    def _lock(cls, fd: int, blocking: bool) -> bool:
+        if Settings.get('core', 'system') == System.WINDOWS:
+            import msvcrt
+
+            while True:
+                try:
+                    msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+                    return True
+                except OSError:
+                    if not blocking:
+                        return False
+                time.sleep(cls._POLL)
+
+        import fcntl
+
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        except BlockingIOError:
+            return False
+
+        return True
+
+    @classmethod
+    def _unlock(cls, fd: int) -> None:
+        if Settings.get('core', 'system') == System.WINDOWS:
+            import msvcrt
+
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(fd, fcntl.LOCK_UN)
+
+
+class ProjectLock(FileLock):
+    FILE: Path = Path('.pipa-lock')
+
+    def __init__(self, root: Path = Path('.')):
+        super().__init__(root / self.FILE)
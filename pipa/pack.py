@@ -0,0 +1,344 @@
+from __future__ import annotations
+import os
+import stat
+import json
+import time
+import shutil
+import hashlib
+import platform
+import threading
+import zipfile
+from typing import Any, Dict, List, Set, Tuple
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from pipa.depgraph import DependencyGraph
+from pipa.envs import EnvPool
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv
+from pipa.warm import WarmServer
+
+
+class PackReport:
+    def __init__(self, path: Path, home: Path):
+        self.path: Path = path
+        self.home: Path = home
+        self.files: int = 0
+        self.size: int = 0
+        self.compressed: int = 0
+        self.elapsed: float = 0.0
+
+
+class Pack:
+    VERSION: int = 1
+    MANIFEST_FILE: str = '.pipa-pack.json'
+    SUFFIX: str = '.venv.zip'
+    # Tied to the original location or project, rebuilt where unpacked.
+    _EXCLUDE: List[str] = [
+        EnvPool.MARKER,
+        EnvPool.REFS_DIR,
+        WarmServer.SOCKET_FILE,
+        DependencyGraph.CACHE_FILE,
+    ]
+    _CHUNK: int = 1 << 20
+
+    @classmethod
+    def pack(cls, path: Path = None, home: Path = None) -> PackReport:
+        home = Path(home or Settings.get('venv', 'home')).resolve()
+        path = path or Path(f'{Settings.get("project", "name")}{cls.SUFFIX}')
+        report: PackReport = PackReport(path, home)
+        start: float = time.perf_counter()
+
+        if not (home / 'pyvenv.cfg').exists():
+            raise PackError(f'No virtual environment found in {home}.')
+
+        entries: List[List[Any]] = []
+        # Members are compressed one at a time as they are read, each on
+        # its own, so that they can be inflated in parallel.
+        with Settings.atomic_open(
+            path.resolve(), binary=True
+        ) as fh, zipfile.ZipFile(fh, 'w', zipfile.ZIP_DEFLATED) as zf:
+            for rel, kind in cls._walk(home):
+                entries.append(cls._add(zf, home, rel, kind))
+
+            zf.writestr(
+                cls.MANIFEST_FILE,
+                json.dumps(
+                    {
+                        'version': cls.VERSION,
+                        'home': str(home),
+                        'python': Virtualenv.python_version(home),
+                        'platform': platform.platform(),
+                        'entries': entries,
+                    }
+                ),
+            )
+            report.compressed = sum(_.compress_size for _ in zf.infolist())
+
+        report.files = len(entries)
+        report.size = sum(_[3] for _ in entries if _[1] == 'file')
+        report.elapsed = time.perf_counter() - start
+
+        return report
+
+    @classmethod
+    def unpack(
+        cls, path: Path, home: Path = None, jobs: int = None
+    ) -> PackReport:
+        start: float = time.perf_counter()
+
+        with zipfile.ZipFile(path) as zf:
+            try:
+                manifest: Dict[str, Any] = json.loads(
+                    zf.read(cls.MANIFEST_FILE)
+                )
+            except (KeyError, ValueError):
+                raise PackError(f'{path} is not a Pipa venv archive.')
+
+        if manifest.get('version') != cls.VERSION:
+            raise PackError(f'Unsupported archive version in {path}.')
+
+        in_project: bool = Settings.FILE.exists()
+        home = (
+            Path(home)
+            if home
+            else EnvPool.private(Settings.get('project', 'name') or 'venv')
+        ).resolve()
+        if home.exists() and any(home.iterdir()):
+            raise PackError(f'{home} already exists and is not empty.')
+
+        report: PackReport = PackReport(path, home)
+        home.mkdir(parents=True, exist_ok=True)
+
+        try:
+            cls._extract(path, home, manifest['entries'], jobs=jobs)
+            Virtualenv.relocate(Path(manifest['home']), home=home)
+            if not Virtualenv.python(home).exists():
+                raise PackError(
+                    'The base interpreter of the archive is missing, '
+                    f'install Python {manifest["python"]} first.'
+                )
+        except BaseException:
+            shutil.rmtree(home, ignore_errors=True)
+            raise
+
+        if in_project:
+            EnvPool.attach(home)
+
+        report.files = len(manifest['entries'])
+        report.size = sum(_[3] for _ in manifest['entries'] if _[1] == 'file')
+        report.compressed = path.stat().st_size
+        report.elapsed = time.perf_counter() - start
+
+        return report
+
+    @classmethod
+    def _walk(cls, home: Path) -> List[Tuple[str, str]]:
+        found: List[Tuple[str, str]] = []
+
+        for parent, dirs, files in os.walk(home):
+            rel: str = os.path.relpath(parent, home)
+            dirs[:] = sorted(_ for _ in dirs if _ not in cls._EXCLUDE)
+            # Symlinked directories, like lib64, are kept as links.
+            for name in [*dirs]:
+                if os.path.islink(os.path.join(parent, name)):
+                    dirs.remove(name)
+                    files.append(name)
+            if not files and not dirs and rel != '.':
+                found.append((Path(rel).as_posix(), 'dir'))
+
+            for name in sorted(files):
+                if name in cls._EXCLUDE:
+                    continue
+                found.append(
+                    (
+                        Path(rel, name).as_posix(),
+                        (
+                            'link'
+                            if os.path.islink(os.path.join(parent, name))
+                            else 'file'
+                        ),
+                    )
+                )
+
+        return found
+
+    @classmethod
+    def _add(
+        cls, zf: zipfile.ZipFile, home: Path, rel: str, kind: str
+    ) -> List[Any]:
+        src: Path = home / rel
+
+        if kind == 'dir':
+            return [rel, kind, None, 0, 0o755, 0]
+        if kind == 'link':
+            target: str = os.readlink(src)
+            info: zipfile.ZipInfo = zipfile.ZipInfo(rel)
+            info.external_attr = (stat.S_IFLNK | 0o777) << 16
+            zf.writestr(info, target)
+            return [rel, kind, target, 0, 0o777, 0]
+
+        st: os.stat_result = src.stat()
+        info = zipfile.ZipInfo.from_file(src, rel, strict_timestamps=False)
+        info.compress_type = zipfile.ZIP_DEFLATED
+        digest: hashlib._Hash = hashlib.sha256()
+
+        with open(src, 'rb') as fsrc, zf.open(info, 'w') as fdest:
+            while chunk := fsrc.read(cls._CHUNK):
+                digest.update(chunk)
+                fdest.write(chunk)
+
+        # Exact times, zip only keeps them to two seconds and timestamp
+        # based bytecode would look stale.
+        return [
+            rel,
+            kind,
+            digest.hexdigest(),
+            st.st_size,
+            stat.S_IMODE(st.st_mode),
+            st.st_mtime_ns,
+        ]
+
+    @classmethod
+    def _extract(
+        cls,
+        path: Path,
+        home: Path,
+        entries: List[List[Any]],
+        jobs: int = None,
+    ) -> None:
+        local: threading.local = threading.local()
+        archives: List[zipfile.ZipFile] = []
+        lock: threading.Lock = threading.Lock()
+        cls._check(path, home, entries)
+
+        for rel, kind, *_ in entries:
+            (home / rel).parent.mkdir(parents=True, exist_ok=True)
+            if kind == 'dir':
+                (home / rel).mkdir(exist_ok=True)
+
+        def extract(entry: List[Any]) -> str:
+            rel, kind, digest, size, mode, mtime = entry
+
+            if kind != 'file':
+                return None
+
+            # One handle per thread, inflating runs without the GIL.
+            if not (zf := getattr(local, 'zf', None)):
+                zf = local.zf = zipfile.ZipFile(path)
+                with lock:
+                    archives.append(zf)
+
+            actual: hashlib._Hash = hashlib.sha256()
+            written: int = 0
+            # Never through a link, nor over anything already there.
+            fd: int = os.open(
+                home / rel,
+                os.O_WRONLY
+                | os.O_CREAT
+                | os.O_EXCL
+                | getattr(os, 'O_NOFOLLOW', 0)
+                | getattr(os, 'O_BINARY', 0),
+                0o600,
+            )
+            with zf.open(rel) as fsrc, os.fdopen(fd, 'wb') as fdest:
+                while chunk := fsrc.read(cls._CHUNK):
+                    actual.update(chunk)
+                    written += len(chunk)
+                    fdest.write(chunk)
+                fdest.flush()
+                if os.chmod in os.supports_fd:
+                    os.chmod(fd, mode)
+                    os.utime(fd, ns=(mtime, mtime))
+
+            if os.chmod not in os.supports_fd:
+                os.chmod(home / rel, mode)
+                os.utime(home / rel, ns=(mtime, mtime))
+
+            return (
+                rel
+                if written != size or actual.hexdigest() != digest
+                else None
+            )
+
+        try:
+            with ThreadPoolExecutor(
+                max_workers=jobs or os.cpu_count()
+            ) as pool:
+                corrupted: List[str] = [
+                    _ for _ in pool.map(extract, entries) if _
+                ]
+        finally:
+            for zf in archives:
+                zf.close()
+
+        if corrupted:
+            raise PackError(
+                f'{len(corrupted)} files do not match the manifest: '
+                f'{", ".join(corrupted[:5])}'
+            )
+
+        # Last, so that no file is ever written through one of them.
+        for rel, kind, target, *_ in entries:
+            if kind == 'link':
+                os.symlink(target, home / rel)
+
+    @classmethod
+    def _check(cls, path: Path, home: Path, entries: List[List[Any]]) -> None:
+        seen: Set[str] = set()
+
+        for rel, *_ in entries:
+            if (
+                Path(rel).is_absolute()
+                or '..' in Path(rel).parts
+                or not rel.strip('/')
+            ):
+                raise PackError(f'Unsafe path in archive: {rel}')
+            if Path(rel).as_posix() in seen:
+                raise PackError(f'Duplicate path in archive: {rel}')
+            seen.add(Path(rel).as_posix())
+
+        parents: Set[str] = {
+            _.as_posix() for rel in seen for _ in Path(rel).parents
+        }
+        # Only the venv interpreter links may point to its base interpreter.
+        base: str = cls._base(path)
+
+        for rel, kind, target, *_ in entries:
+            if kind != 'link':
+                continue
+            if Path(rel).as_posix() in parents:
+                raise PackError(f'Unsafe link in archive: {rel}')
+
+            resolved: str = os.path.normpath(
+                os.path.join(home, os.path.dirname(rel), target)
+            )
+            if os.path.commonpath([resolved, str(home)]) == str(home):
+                continue
+            if (
+                base
+                and os.path.dirname(resolved) == base
+                and Path(rel).parent.as_posix()
+                == Virtualenv.bin_dir(Path()).as_posix()
+            ):
+                continue
+
+            raise PackError(f'Unsafe link in archive: {rel} -> {target}')
+
+    @classmethod
+    def _base(cls, path: Path) -> str:
+        with zipfile.ZipFile(path) as zf:
+            try:
+                cfg: str = zf.read('pyvenv.cfg').decode('utf-8')
+            except (KeyError, UnicodeDecodeError):
+                return None
+
+        for line in cfg.splitlines():
+            key, _, value = line.partition('=')
+            if key.strip() == 'home':
+                return os.path.normpath(value.strip())
+
+        return None
+
+
+class PackError(Exception):
+    pass
@@ -1,13 +1,28 @@
-from typing import List, Tuple
+import os
+import shutil
+import tempfile
+from typing import Dict, List, Set, Tuple
 from pathlib import Path
+from packaging.requirements import Requirement
 from pipa.virtualenv import Virtualenv, VirtualenvError
+from pipa.envs import EnvPool
+from pipa.depgraph import DependencyGraph
+from pipa.distribution import Distribution
+from pipa.lockfile import LockEntry, Lockfile
+from pipa.lockcache import LockCache
+from pipa.requirements import RequirementsFile
 from pipa.settings import Settings
+from pipa.sync import Sync, SyncPlan
+from pipa.hashes import Hasher, VerifyReport
+from pipa.wheelhouse import Wheelhouse, WheelhouseReport
 
 
 class Packager:
     REQUIREMENTS_FILE: Path = Path('requirements.txt')
     REQUIREMENTS_DEV_FILE: Path = Path('requirements-dev.txt')
     REQUIREMENTS_LOCK_FILE: Path = Path('requirements.lock')
+    REQUIREMENTS_DEV_LOCK_FILE: Path = Path('requirements-dev.lock')
+    REQUIREMENTS_LOCK_CACHE_FILE: Path = Path('.requirements.lock.cache')
 
     @classmethod
     def install(
@@ -16,113 +31,345 @@ class Packager:
         is_dev: bool = False,
         quiet: bool = False,
         root: Path = Path('.'),
+    ) -> List[str]:
+        pkgs = tuple(dict.fromkeys(pkgs))
+        failed: List[str] = []
+        EnvPool.detach()
+
+        try:
+            Virtualenv.pip('install', '--upgrade', *pkgs, quiet=quiet)
+        except VirtualenvError:
+            if len(pkgs) == 1:
+                failed = list(pkgs)
+            else:
+                # The batch failed, retry one by one to find the culprits.
+                for pkg in pkgs:
+                    try:
+                        Virtualenv.pip(
+                            'install', '--upgrade', pkg, quiet=quiet
+                        )
+                    except VirtualenvError:
+                        failed.append(pkg)
+
+        cls.register(
+            *[pkg for pkg in pkgs if pkg not in failed],
+            is_dev=is_dev,
+            root=root,
+        )
+
+        return failed
+
+    @classmethod
+    def register(
+        cls, *pkgs: Tuple, is_dev: bool = False, root: Path = Path('.')
     ) -> None:
-        for pkg in pkgs:
-            Virtualenv.run(f'pip install --upgrade {pkg}', quiet=quiet)
-            req_file = (
-                root / cls.REQUIREMENTS_DEV_FILE
-                if is_dev
-                else root / cls.REQUIREMENTS_FILE
+        req_file: Path = (
+            root / cls.REQUIREMENTS_DEV_FILE
+            if is_dev
+            else root / cls.REQUIREMENTS_FILE
+        )
+        cls._register(RequirementsFile(req_file), *pkgs)
+
+    @classmethod
+    def uninstall(cls, *pkgs: Tuple, quiet: bool = False) -> List[str]:
+        req_files: List[RequirementsFile] = [
+            RequirementsFile(cls.REQUIREMENTS_FILE),
+            RequirementsFile(cls.REQUIREMENTS_DEV_FILE),
+        ]
+
+        if missing := cls.unregistered(*pkgs):
+            raise PackagerError(
+                f'Package: {missing[0]} not found in requirements files.'
             )
-            if not cls._find_in_reqs(pkg, req_file):
-                cls._register(
-                    req_file,
-                    pkg,
-                )
+
+        EnvPool.detach()
+        names: List[str] = [cls.req_name(_) for _ in pkgs]
+        # Dependencies nothing else needs anymore go away in the same call.
+        orphans: List[str] = sorted(
+            DependencyGraph.load().orphans(
+                names,
+                keep=[
+                    line.name
+                    for req_file in req_files
+                    for line in req_file.lines
+                    if line.name and line.name not in names
+                ],
+            )
+            - set(names)
+        )
+
+        Virtualenv.pip('uninstall', '-y', *names, *orphans, quiet=quiet)
+        for req_file in req_files:
+            cls._unregister(req_file, *pkgs)
+
+        return orphans
 
     @classmethod
-    def uninstall(cls, *pkgs: Tuple, quiet: bool = False) -> None:
-        for pkg in pkgs:
-            if not (
-                req_file := cls._find_in_reqs(
-                    pkg, cls.REQUIREMENTS_FILE, cls.REQUIREMENTS_DEV_FILE
-                )
-            ):
-                raise PackagerError(
-                    f'Package: {pkg} not found in requirements files.'
-                )
+    def unregistered(cls, *pkgs: Tuple) -> List[str]:
+        req_files: List[RequirementsFile] = [
+            RequirementsFile(cls.REQUIREMENTS_FILE),
+            RequirementsFile(cls.REQUIREMENTS_DEV_FILE),
+        ]
 
-            Virtualenv.run(f'pip uninstall -y {pkg}', quiet=quiet)
-            cls._unregister(req_file, pkg)
+        return [
+            pkg
+            for pkg in pkgs
+            if not any(req_file.find(pkg) for req_file in req_files)
+        ]
 
     @classmethod
     def req_install(
-        cls, dev: bool = False, from_lock: bool = False, quiet: bool = True
+        cls,
+        dev: bool = False,
+        from_lock: bool = False,
+        quiet: bool = True,
+        offline: bool = False,
     ) -> bool:
         if from_lock:
             if not cls.REQUIREMENTS_LOCK_FILE.exists():
                 return False
 
-            Virtualenv.run(
-                f'pip install --upgrade -r {str(cls.REQUIREMENTS_LOCK_FILE)}',
-                quiet=quiet,
-            )
+            cls.sync(quiet=quiet, offline=offline, dev=dev)
         else:
+            EnvPool.detach()
             if not dev:
                 if not cls.REQUIREMENTS_FILE.exists():
                     return False
 
-                Virtualenv.run(
-                    f'pip install --upgrade -r {str(cls.REQUIREMENTS_FILE)}',
+                Virtualenv.pip(
+                    'install',
+                    '--upgrade',
+                    '-r',
+                    cls.REQUIREMENTS_FILE,
                     quiet=quiet,
                 )
             else:
                 if not cls.REQUIREMENTS_DEV_FILE.exists():
                     return False
 
-                Virtualenv.run(
-                    f'pip install --upgrade -r {str(cls.REQUIREMENTS_DEV_FILE)}',
+                Virtualenv.pip(
+                    'install',
+                    '--upgrade',
+                    '-r',
+                    cls.REQUIREMENTS_DEV_FILE,
                     quiet=quiet,
                 )
 
         return True
 
     @classmethod
-    def _find_in_reqs(cls, pkg: str, *req_files: Tuple) -> Path:
-        for req_file in req_files:
-            if not req_file.exists():
-                continue
+    def sync(
+        cls, quiet: bool = True, offline: bool = False, dev: bool = False
+    ) -> SyncPlan:
+        if EnvPool.checkout(dev=dev):
+            return SyncPlan([], [])
+
+        EnvPool.detach()
+        keep: List[Requirement] = [
+            line.req
+            for line in RequirementsFile(cls.REQUIREMENTS_DEV_FILE).lines
+            if line.req
+        ]
+        plan: SyncPlan = Sync.run(
+            cls.locked(dev=dev),
+            keep=keep,
+            quiet=quiet,
+            wheelhouse=Wheelhouse() if offline else None,
+        )
+        # Dev tools kept from an earlier dev install are not part of the
+        # prod layer, such an environment stays private.
+        if dev or not set(
+            Distribution.scan(Virtualenv.site_packages())
+        ).intersection(cls.req_name(_.name) for _ in keep):
+            EnvPool.publish(dev=dev)
+
+        return plan
+
+    @classmethod
+    def build_wheelhouse(
+        cls, find_links: List[Path] = (), quiet: bool = True
+    ) -> WheelhouseReport:
+        if not cls.REQUIREMENTS_LOCK_FILE.exists():
+            raise PackagerError('No locked file found.')
+
+        return Wheelhouse().build(
+            cls.locked(dev=True),
+            find_links=find_links,
+            quiet=quiet,
+        )
+
+    @classmethod
+    def verify(cls, path: Path = None) -> VerifyReport:
+        if not cls.REQUIREMENTS_LOCK_FILE.exists():
+            raise PackagerError('No locked file found.')
+
+        entries: Dict[str, LockEntry] = cls.locked(dev=True).applicable(
+            Virtualenv.marker_env()
+        )
 
-            for line in req_file.read_text(
-                encoding=Settings.get('core', 'encoding')
-            ).split('\n'):
-                if pkg.lower() == line.lower():
-                    return req_file
+        if path:
+            return Hasher.verify(entries, path)
 
-        return None
+        return Wheelhouse().check(entries)[0]
 
     @classmethod
     def lock(
         cls,
+        *upgrade_pkgs: Tuple,
         with_hashes: bool = True,
         allow_unsafe: bool = True,
         root: Path = Path('.'),
-    ) -> None:
-        Virtualenv.run(
-            f'python -m piptools compile '
-            f'--upgrade '
-            f'--no-header '
-            f'-q '
-            f'{"--generate-hashes " if with_hashes else ""}'
-            f'{"--allow-unsafe " if allow_unsafe else ""}'
-            f'{str(root / cls.REQUIREMENTS_FILE)} '
-            f'-o {str(root / cls.REQUIREMENTS_LOCK_FILE)}',
+        upgrade: bool = True,
+        force: bool = False,
+        quiet: bool = False,
+    ) -> bool:
+        lock_files: List[Path] = cls._lock_files(root)
+        sources: List[Path] = cls._lock_sources(root)
+        cache: LockCache = LockCache(root / cls.REQUIREMENTS_LOCK_CACHE_FILE)
+        inputs: Dict[str, str] = LockCache.normalize(*sources)
+        key: str = cache.key(inputs, with_hashes, allow_unsafe)
+
+        if not force and not upgrade_pkgs and cache.hit(key, *lock_files):
+            return False
+
+        # Without --upgrade, pip-tools keeps the pins of the existing
+        # locked file and only re-resolves the packages given with -P.
+        upgrade_names: List[str] = list(
+            dict.fromkeys(
+                [cls.req_name(_) for _ in upgrade_pkgs] + cache.changed(inputs)
+            )
+        )
+        encoding: str = Settings.get('core', 'encoding')
+        # Prod and dev resolve together, so dev pins never fight prod's.
+        fd, tmp = tempfile.mkstemp(
+            dir=root, prefix='.requirements-', suffix='.lock'
+        )
+
+        try:
+            with os.fdopen(fd, 'w', encoding=encoding) as fh:
+                fh.write(
+                    '\n'.join(
+                        _.read_text(encoding=encoding)
+                        for _ in lock_files
+                        if _.exists()
+                    )
+                )
+
+            Virtualenv.exec(
+                'python',
+                '-m',
+                'piptools',
+                'compile',
+                *(
+                    ['--upgrade']
+                    if upgrade
+                    else [f'--upgrade-package={_}' for _ in upgrade_names]
+                ),
+                '--no-header',
+                '-q',
+                *(['--generate-hashes'] if with_hashes else []),
+                *(['--allow-unsafe'] if allow_unsafe else []),
+                *sources,
+                '-o',
+                tmp,
+                quiet=quiet,
+            )
+            resolved: Lockfile = Lockfile(Path(tmp))
+        finally:
+            os.remove(tmp)
+
+        prod: Set[str] = resolved.reached_from(root / cls.REQUIREMENTS_FILE)
+        resolved.save(
+            lock_files[0], [_ for _ in resolved.entries if _ in prod]
         )
+        if len(sources) > 1:
+            resolved.save(
+                lock_files[1], [_ for _ in resolved.entries if _ not in prod]
+            )
+        else:
+            lock_files[1].unlink(missing_ok=True)
+        cache.save(key, inputs, *lock_files)
+
+        return True
 
     @classmethod
-    def _unregister(cls, path: Path, pkg: str) -> None:
-        req_pkgs: List[str] = path.read_text(
-            encoding=Settings.get('core', 'encoding')
-        ).split('\n')
-        req_pkgs.remove(pkg)
-        path.write_text(
-            '\n'.join(req_pkgs), encoding=Settings.get('core', 'encoding')
+    def lock_state(
+        cls,
+        with_hashes: bool = True,
+        allow_unsafe: bool = True,
+        root: Path = Path('.'),
+    ) -> Tuple[str, str, bool]:
+        lock_files: List[Path] = cls._lock_files(root)
+        cache: LockCache = LockCache(root / cls.REQUIREMENTS_LOCK_CACHE_FILE)
+        key: str = cache.key(
+            LockCache.normalize(*cls._lock_sources(root)),
+            with_hashes,
+            allow_unsafe,
         )
 
+        return (
+            key,
+            ' '.join(str(LockCache.digest(_)) for _ in lock_files),
+            cache.hit(key, *lock_files),
+        )
+
+    @classmethod
+    def adopt_lock(
+        cls,
+        source: Path,
+        with_hashes: bool = True,
+        allow_unsafe: bool = True,
+        root: Path = Path('.'),
+    ) -> None:
+        lock_files: List[Path] = cls._lock_files(root)
+        cache: LockCache = LockCache(root / cls.REQUIREMENTS_LOCK_CACHE_FILE)
+        inputs: Dict[str, str] = LockCache.normalize(*cls._lock_sources(root))
+
+        for src, dest in zip(cls._lock_files(source), lock_files):
+            if src.exists():
+                shutil.copyfile(src, dest)
+            else:
+                dest.unlink(missing_ok=True)
+        cache.save(
+            cache.key(inputs, with_hashes, allow_unsafe), inputs, *lock_files
+        )
+
+    @classmethod
+    def locked(cls, root: Path = Path('.'), dev: bool = False) -> Lockfile:
+        # The dev layer only goes on top of prod when asked for.
+        return Lockfile.layers(*cls._lock_files(root)[: 2 if dev else 1])
+
+    @classmethod
+    def req_name(cls, pkg: str) -> str:
+        return RequirementsFile.name(pkg)
+
+    @classmethod
+    def _lock_files(cls, root: Path) -> List[Path]:
+        return [
+            root / cls.REQUIREMENTS_LOCK_FILE,
+            root / cls.REQUIREMENTS_DEV_LOCK_FILE,
+        ]
+
+    @classmethod
+    def _lock_sources(cls, root: Path) -> List[Path]:
+        return [
+            root / cls.REQUIREMENTS_FILE,
+            *(
+                [root / cls.REQUIREMENTS_DEV_FILE]
+                if (root / cls.REQUIREMENTS_DEV_FILE).exists()
+                else []
+            ),
+        ]
+
+    @classmethod
+    def _unregister(cls, req_file: RequirementsFile, *pkgs: Tuple) -> None:
+        req_file.remove(*pkgs)
+        req_file.save()
+
     @classmethod
-    def _register(cls, path: Path, pkg: str) -> None:
-        with path.open('a', encoding=Settings.get('core', 'encoding')) as fh:
-            fh.write(f'{pkg}\n')
+    def _register(cls, req_file: RequirementsFile, *pkgs: Tuple) -> None:
+        req_file.add(*pkgs)
+        req_file.save()
 
 
 class PackagerError(Exception):
@@ -1,10 +1,27 @@
 from pathlib import Path
 import sys
-from typing import Dict, List
+from typing import Callable, ContextManager, Dict, List, NoReturn, Tuple
 from pipa.virtualenv import Virtualenv
-from pipa.template import Template
-from pipa.packager import Packager
+from pipa.template import DeployReport, Template
+from pipa.packager import Packager, PackagerError
+from pipa.requirements import RequirementsFile
+from pipa.runner import Runner
 from pipa.settings import Settings
+from pipa.shell import Shell
+from pipa.coalesce import InstallQueue, Outcome, Request
+from pipa.compiler import CompileReport, Compiler
+from pipa.mutex import ProjectLock
+from pipa.pack import Pack, PackReport
+from pipa.depgraph import DependencyGraph
+from pipa.distribution import Distribution
+from pipa.envs import EnvPool, GcReport
+from pipa.hashes import VerifyReport
+from pipa.snapshot import Snapshot
+from pipa.store import Store, StoreStats
+from pipa.sync import SyncPlan
+from pipa.trace import Trace
+from pipa.wheelhouse import WheelhouseReport
+from pipa.workspace import ProjectReport, Workspace
 
 
 class Pipa:
@@ -13,77 +30,253 @@ class Pipa:
     }
 
     @classmethod
-    def init_template(cls, pname: str) -> None:
+    @Trace.traced
+    def init_template(cls, pname: str, source: str = None) -> DeployReport:
         Settings.set('project', 'name', val=pname)
-        Template().deploy()
+        if source:
+            Settings.set('template', 'source', val=cls._template_spec(source))
+
+        return Template().deploy()
 
     @classmethod
-    def init_venv(cls) -> None:
-        Settings.set(
-            'venv',
-            "home",
-            val=str(
-                Path(Settings.get('venv', 'home'))
-                / f'{Settings.get("project", "name")}-{Virtualenv.gen_hash()}'
-            ),
-        )
-        Virtualenv.deploy()
+    @Trace.traced
+    def apply_template(cls, source: str = None) -> DeployReport:
+        report: DeployReport = Template(
+            root=Path('.'), source=source and cls._template_spec(source)
+        ).deploy()
+
+        if source:
+            Settings.set('template', 'source', val=cls._template_spec(source))
+
+        return report
 
     @classmethod
+    @Trace.traced
+    def init_venv(cls, root: Path = None) -> None:
+        root = root or Path(Settings.get('project', 'name'))
+
+        # A locked project reuses the environment built for the same lock.
+        if EnvPool.checkout(root=root):
+            return
+
+        home: Path = EnvPool.private(Settings.get('project', 'name'))
+        if Snapshot.enabled():
+            Snapshot.clone(cls.basic_packages(), home)
+        else:
+            Virtualenv.deploy(home=home)
+
+        EnvPool.attach(home, root=root)
+
+    @classmethod
+    @Trace.traced
     def init_settings(cls, root: Path = None) -> None:
         Settings.init(root=root or Path(Settings.get('project', 'name')))
 
     @classmethod
+    @Trace.traced
     def init_requirements(cls, root: Path = None) -> None:
-        is_dev: bool = False
+        dists: Dict[str, Distribution] = Distribution.scan(
+            Virtualenv.site_packages()
+        )
 
         for env, pkgs in cls._BASIC_PACKAGES.items():
-            for pkg in pkgs:
-                if env == 'dev':
-                    is_dev = True
-
-                cls.install(
-                    pkg,
-                    is_dev=is_dev,
+            # Venvs cloned from a snapshot already have them installed.
+            if all(Packager.req_name(pkg) in dists for pkg in pkgs):
+                Packager.register(
+                    *pkgs,
+                    is_dev=env == 'dev',
                     root=root or Path(Settings.get('project', 'name')),
                 )
+            elif failed := cls.install(
+                *pkgs,
+                is_dev=env == 'dev',
+                root=root or Path(Settings.get('project', 'name')),
+            ):
+                raise PackagerError(
+                    f'Failed to install basic packages: {", ".join(failed)}'
+                )
 
     @classmethod
+    def basic_packages(cls) -> List[str]:
+        return [pkg for pkgs in cls._BASIC_PACKAGES.values() for pkg in pkgs]
+
+    @classmethod
+    @Trace.traced
     def init_git(cls) -> None:
-        Virtualenv.runs(
-            f'git init {Settings.get("project", "name")}',
-            f'cd {Settings.get("project", "name")}',
-            'git add --all',
-            'git commit -m \'Initialized project structure\'',
-            quiet=True,
+        Shell(stdout=Shell.PIPE.SUBPROC).write_args(
+            'git', 'init', '-q', Settings.get('project', 'name')
+        ).run()
+
+    @classmethod
+    @Trace.traced
+    def commit_git(cls) -> None:
+        root: str = Settings.get('project', 'name')
+
+        Shell(stdout=Shell.PIPE.SUBPROC).write_args(
+            'git', '-C', root, 'add', '--all'
+        ).run()
+        Shell(stdout=Shell.PIPE.SUBPROC).write_args(
+            'git',
+            '-C',
+            root,
+            'commit',
+            '-q',
+            '-m',
+            'Initialized project structure',
+        ).run()
+
+    @classmethod
+    def run(cls, *args: Tuple, warm: bool = False) -> NoReturn:
+        Runner.exec(list(args), warm=warm)
+
+    @classmethod
+    def serve(cls, *preload: Tuple) -> int:
+        return Runner.serve(list(preload))
+
+    @classmethod
+    @Trace.traced
+    def req_install(
+        cls, dev: bool = False, from_lock: bool = False, offline: bool = False
+    ) -> bool:
+        return Packager.req_install(
+            dev=dev, from_lock=from_lock, offline=offline
         )
 
     @classmethod
-    def run(cls, cmd: str) -> None:
-        Virtualenv.run(cmd, with_env=True)
+    @Trace.traced
+    def sync(cls, offline: bool = False, dev: bool = False) -> SyncPlan:
+        return Packager.sync(offline=offline, dev=dev)
 
     @classmethod
-    def req_install(cls, dev: bool = False, from_lock: bool = False) -> bool:
-        return Packager.req_install(dev=dev, from_lock=from_lock)
+    @Trace.traced
+    def build_wheelhouse(cls, find_links: List[Path] = ()) -> WheelhouseReport:
+        return Packager.build_wheelhouse(find_links=find_links)
 
     @classmethod
+    @Trace.traced
     def install(
         cls,
-        pkg: str,
+        *pkgs: Tuple,
         is_dev: bool = False,
         quiet: bool = True,
         root: Path = Path('.'),
-    ) -> None:
-        Packager.install(pkg, is_dev=is_dev, quiet=quiet, root=root)
+    ) -> List[str]:
+        return Packager.install(*pkgs, is_dev=is_dev, quiet=quiet, root=root)
+
+    @classmethod
+    @Trace.traced
+    def enqueue(
+        cls,
+        action: str,
+        *pkgs: Tuple,
+        is_dev: bool = False,
+        on_wait: Callable[[], None] = None,
+    ) -> Outcome:
+        return InstallQueue.submit(
+            Request(action, list(pkgs), dev=is_dev), on_wait=on_wait
+        )
+
+    @classmethod
+    def exclusive(
+        cls, on_wait: Callable[[], None] = None
+    ) -> ContextManager[None]:
+        return ProjectLock().held(on_wait=on_wait)
 
     @classmethod
-    def uninstall(cls, pkg: str) -> None:
-        Packager.uninstall(pkg, quiet=True)
+    @Trace.traced
+    def uninstall(cls, *pkgs: Tuple) -> List[str]:
+        return Packager.uninstall(*pkgs, quiet=True)
 
     @classmethod
-    def lock(cls) -> None:
-        Packager.lock(allow_unsafe=False)
+    @Trace.traced
+    def tree(cls, *pkgs: Tuple) -> List[str]:
+        graph: DependencyGraph = DependencyGraph.load()
+
+        return graph.tree(
+            [Packager.req_name(_) for _ in pkgs] or cls._top_level(graph)
+        )
+
+    @classmethod
+    @Trace.traced
+    def why(cls, pkg: str) -> List[List[str]]:
+        return DependencyGraph.load().why(Packager.req_name(pkg))
+
+    @classmethod
+    @Trace.traced
+    def lock(cls, *pkgs: Tuple, upgrade: bool = False) -> bool:
+        return Packager.lock(
+            *pkgs, allow_unsafe=False, upgrade=upgrade, force=upgrade
+        )
+
+    @classmethod
+    @Trace.traced
+    def compile(
+        cls, invalidation: str = None, jobs: int = None, measure: bool = False
+    ) -> CompileReport:
+        return Compiler.compile(
+            invalidation=invalidation, jobs=jobs, measure=measure
+        )
+
+    @classmethod
+    @Trace.traced
+    def pack(cls, path: Path = None) -> PackReport:
+        return Pack.pack(path=path)
+
+    @classmethod
+    @Trace.traced
+    def unpack(
+        cls, path: Path, home: Path = None, jobs: int = None
+    ) -> PackReport:
+        return Pack.unpack(path, home=home, jobs=jobs)
+
+    @classmethod
+    @Trace.traced
+    def store_stats(cls) -> StoreStats:
+        return Store.stats()
+
+    @classmethod
+    @Trace.traced
+    def store_prune(cls) -> StoreStats:
+        return Store.prune()
+
+    @classmethod
+    @Trace.traced
+    def verify(cls, path: Path = None) -> VerifyReport:
+        return Packager.verify(path=path)
+
+    @classmethod
+    @Trace.traced
+    def gc(cls, budget: str = None, dry_run: bool = False) -> GcReport:
+        return EnvPool.gc(
+            budget=budget and EnvPool.parse_size(budget), dry_run=dry_run
+        )
+
+    @classmethod
+    @Trace.traced
+    def workspace(
+        cls, action: str, root: Path = Path('.'), jobs: int = None
+    ) -> List[ProjectReport]:
+        return Workspace(root, jobs=jobs).run(action)
 
     @classmethod
     def abort(cld) -> None:
         sys.exit(1)
+
+    @classmethod
+    def _top_level(cls, graph: DependencyGraph) -> List[str]:
+        # The project requirements first, then what nothing else requires.
+        names: List[str] = [
+            line.name
+            for path in (
+                Packager.REQUIREMENTS_FILE,
+                Packager.REQUIREMENTS_DEV_FILE,
+            )
+            for line in RequirementsFile(path).lines
+            if line.name in graph.versions
+        ]
+
+        return list(dict.fromkeys([*names, *graph.roots()]))
+
+    @classmethod
+    def _template_spec(cls, source: str) -> str:
+        return str(Path(source).expanduser().resolve())
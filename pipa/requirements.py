@@ -0,0 +1,132 @@
+from __future__ import annotations
+import re
+from typing import Dict, List, Tuple
+from pathlib import Path
+from packaging.requirements import InvalidRequirement, Requirement
+from packaging.utils import canonicalize_name
+from pipa.settings import Settings
+
+
+class RequirementLine:
+    _COMMENT: re.Pattern = re.compile(r'(^|\s+)#.*$')
+
+    def __init__(self, text: str):
+        self.text: str = text
+        self.req: Requirement = None
+        self.name: str = None
+        self.content: str = '\n'.join(
+            self._COMMENT.sub('', _) for _ in text.split('\n')
+        )
+        self.content = re.sub(r'\\\n', ' ', self.content).strip()
+
+        if self.content and self.content[0] != '-':
+            try:
+                self.req = Requirement(self.content.split(' --')[0].strip())
+                self.name = canonicalize_name(self.req.name)
+            except InvalidRequirement:
+                pass
+
+    @property
+    def comment(self) -> str:
+        match: re.Match = self._COMMENT.search(self.text.split('\n')[-1])
+
+        return match.group() if match else ''
+
+    def update(self, pkg: str) -> None:
+        self.__init__(pkg + self.comment)
+
+
+class RequirementsFile:
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self.lines: List[RequirementLine] = []
+        self.index: Dict[str, RequirementLine] = {}
+        self._dirty: bool = False
+
+        if path.exists():
+            self._parse(
+                path.read_text(encoding=Settings.get('core', 'encoding'))
+            )
+
+    @classmethod
+    def name(cls, pkg: str) -> str:
+        try:
+            return canonicalize_name(Requirement(pkg).name)
+        except InvalidRequirement:
+            return canonicalize_name(pkg)
+
+    def find(self, pkg: str) -> RequirementLine:
+        return self.index.get(self.name(pkg))
+
+    def add(self, *pkgs: Tuple) -> List[str]:
+        added: List[str] = []
+
+        for pkg in pkgs:
+            new: RequirementLine = RequirementLine(pkg)
+
+            if not (line := self.index.get(new.name or self.name(pkg))):
+                self._append(new)
+                added.append(pkg)
+            # A bare name never loosens the constraints already written.
+            elif (
+                new.req
+                and pkg != new.req.name
+                and str(new.req) != str(line.req)
+            ):
+                line.update(pkg)
+            else:
+                continue
+
+            self._dirty = True
+
+        return added
+
+    def remove(self, *pkgs: Tuple) -> List[str]:
+        names: List[str] = [
+            name for name in map(self.name, pkgs) if name in self.index
+        ]
+
+        if names:
+            lines: List[RequirementLine] = self.lines
+            self.lines, self.index = [], {}
+
+            for line in lines:
+                if line.name not in names:
+                    self._append(line)
+
+            self._dirty = True
+
+        return names
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+
+        Settings.atomic_write(
+            self.path,
+            ''.join(f'{line.text}\n' for line in self.lines),
+            encoding=Settings.get('core', 'encoding'),
+        )
+
+        self._dirty = False
+
+    def _parse(self, content: str) -> None:
+        lines: List[str] = content.split('\n')
+        block: List[str] = []
+
+        if lines[-1] == '':
+            lines.pop()
+
+        for line in lines:
+            block.append(line)
+            if not line.endswith('\\'):
+                self._append(RequirementLine('\n'.join(block)))
+                block = []
+
+        if block:
+            self._append(RequirementLine('\n'.join(block)))
+
+    def _append(self, line: RequirementLine) -> None:
+        self.lines.append(line)
+        if line.name:
+            self.index.setdefault(line.name, line)
@@ -0,0 +1,193 @@
+import os
+import sys
+import signal
+import socket
+import subprocess
+from typing import Any, Dict, List, NoReturn, Optional, TextIO
+from pathlib import Path
+from pipa.envs import EnvPool
+from pipa.settings import Settings, System
+from pipa.virtualenv import Virtualenv
+from pipa.warm import WarmServer
+
+
+class Runner:
+    _INFO_STYLE: str = '\x1b[36m'
+    _ERR_STYLE: str = '\x1b[31m\x1b[1m'
+
+    @classmethod
+    def exec(cls, args: List[str], warm: bool = False) -> NoReturn:
+        cls._check_project()
+
+        cls._echo(
+            f'Running in {Path(Settings.get("venv", "home")).name} '
+            f'environment...',
+            cls._INFO_STYLE,
+        )
+
+        env: Dict[str, str] = Virtualenv.environ(with_env=True)
+        exe: str = Virtualenv.which(args[0], env=env)
+        EnvPool.touch(Path(Settings.get('venv', 'home')))
+
+        if warm and (spec := cls._spec(args, exe, env)):
+            cls._exec_warm(spec)
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        try:
+            if Settings.get('core', 'system') == System.WINDOWS:
+                sys.exit(subprocess.call([exe, *args[1:]], env=env))
+
+            os.execve(exe, args, env)
+        except OSError as e:
+            cls._echo(e.__str__(), cls._ERR_STYLE, err=True)
+            sys.exit(127)
+
+    @classmethod
+    def serve(cls, preload: List[str] = ()) -> int:
+        cls._check_project()
+
+        cmd: List[str] = [
+            str(Virtualenv.python()),
+            str(Path(sys.modules[WarmServer.__module__].__file__)),
+            '--socket',
+            str(cls.socket()),
+        ]
+        for file in (
+            'requirements.lock',
+            'requirements-dev.lock',
+            '.env',
+            Settings.FILE,
+        ):
+            cmd += ['--watch', str(Path(file).resolve())]
+        for module in [*Settings.get('warm', 'preload'), *preload]:
+            cmd += ['--preload', module]
+
+        # The server exits when the project changes, it restarts with a
+        # fresh interpreter, environment and preloaded modules.
+        while True:
+            try:
+                code: int = subprocess.call(
+                    cmd, env=Virtualenv.environ(with_env=True)
+                )
+            except KeyboardInterrupt:
+                return 0
+            if code != WarmServer.RESTART_CODE:
+                return code
+
+    @classmethod
+    def socket(cls) -> Path:
+        return Path(Settings.get('venv', 'home')) / WarmServer.SOCKET_FILE
+
+    @classmethod
+    def _spec(
+        cls, args: List[str], exe: str, env: Dict[str, str]
+    ) -> Optional[Dict[str, Any]]:
+        if Settings.get('core', 'system') == System.WINDOWS:
+            return None
+
+        spec: Dict[str, Any] = {'cwd': os.getcwd(), 'env': env}
+        path: Path = Path(exe)
+
+        if path.parent != Virtualenv.bin_dir():
+            return None
+        if path.name.startswith('python'):
+            if args[1:2] == ['-m'] and args[2:]:
+                # runpy fills in argv[0] with the module path.
+                return {
+                    **spec,
+                    'mode': 'module',
+                    'target': args[2],
+                    'argv': ['-m', *args[3:]],
+                    'path': spec['cwd'],
+                }
+            if args[1:2] == ['-c'] and args[2:]:
+                return {
+                    **spec,
+                    'mode': 'code',
+                    'target': args[2],
+                    'argv': ['-c', *args[3:]],
+                    'path': '',
+                }
+            if args[1:] and not args[1].startswith('-'):
+                script: str = os.path.abspath(args[1])
+                return {
+                    **spec,
+                    'mode': 'path',
+                    'target': script,
+                    'argv': args[1:],
+                    'path': os.path.dirname(script),
+                }
+            return None
+
+        # Console scripts are plain Python files run by the venv interpreter.
+        try:
+            with open(path, 'rb') as fh:
+                shebang: bytes = fh.readline()
+        except OSError:
+            return None
+        if shebang.strip() != f'#!{Virtualenv.python()}'.encode():
+            return None
+
+        return {
+            **spec,
+            'mode': 'path',
+            'target': exe,
+            'argv': [exe, *args[1:]],
+            'path': str(path.parent),
+        }
+
+    @classmethod
+    def _exec_warm(cls, spec: Dict[str, Any]) -> None:
+        sock: socket.socket = socket.socket(socket.AF_UNIX)
+
+        try:
+            sock.connect(str(cls.socket()))
+            WarmServer.request(sock, spec)
+        except OSError:
+            sock.close()
+            cls._echo(
+                'No warm server is running, starting cold.', cls._INFO_STYLE
+            )
+            return
+
+        with sock, sock.makefile('r') as reader:
+            if not (line := reader.readline()).startswith('pid '):
+                cls._echo('The warm server failed.', cls._ERR_STYLE, err=True)
+                sys.exit(1)
+
+            pid: int = int(line.split()[1])
+
+            def forward(signum: int, _: Any) -> None:
+                try:
+                    os.kill(pid, signum)
+                except ProcessLookupError:
+                    pass
+
+            for sig in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                signal.signal(sig, forward)
+
+            if not (line := reader.readline()).startswith('exit '):
+                cls._echo('The warm server failed.', cls._ERR_STYLE, err=True)
+                sys.exit(1)
+
+        code: int = int(line.split()[1])
+        sys.exit(128 - code if code < 0 else code)
+
+    @classmethod
+    def _check_project(cls) -> None:
+        if not Settings.FILE.exists():
+            cls._echo(
+                'You are not in a Pipa project. Command aborted.',
+                cls._ERR_STYLE,
+                err=True,
+            )
+            sys.exit(1)
+
+    @classmethod
+    def _echo(cls, msg: str, style: str, err: bool = False) -> None:
+        stream: TextIO = sys.stderr if err else sys.stdout
+        stream.write(
+            f'{style}{msg}\x1b[0m\n' if stream.isatty() else f'{msg}\n'
+        )
@@ -1,8 +1,13 @@
-from typing import Dict, Any, Tuple
+from __future__ import annotations
+from typing import Dict, Any, IO, Iterator, Tuple, Union
+from contextlib import contextmanager
 from pathlib import Path
+import os
+import copy
 import platform
 import tempfile
-import toml
+import threading
+from pipa.trace import Trace
 
 
 class System:
@@ -17,32 +22,205 @@ class Settings:
         'project': {'name': None},
         'venv': {'home': tempfile.gettempdir()},
         'core': {'system': platform.system(), 'encoding': 'utf-8'},
+        'store': {
+            'enabled': False,
+            'home': str(Path.home() / '.cache' / 'pipa' / 'store'),
+            'link': 'hardlink',
+        },
+        'snapshot': {
+            'enabled': True,
+            'home': str(Path.home() / '.cache' / 'pipa' / 'snapshots'),
+        },
+        'wheelhouse': {'home': 'wheelhouse'},
+        'installer': {'parallel': True, 'jobs': None},
+        'hashes': {
+            'cache': str(Path.home() / '.cache' / 'pipa' / 'hashes.json')
+        },
+        'warm': {'preload': []},
+        'compile': {
+            'enabled': False,
+            'invalidation': 'timestamp',
+            'jobs': None,
+        },
+        'envs': {
+            'home': str(Path(tempfile.gettempdir()) / 'pipa-envs'),
+            'budget': '10GiB',
+        },
+        'template': {
+            'source': None,
+            'cache': str(Path.home() / '.cache' / 'pipa' / 'templates'),
+        },
     }
+    _doc: Dict[str, Any] = None
+    _stamp: Tuple = None
+    _dirty: bool = False
+    _depth: int = 0
+    _lock: threading.RLock = threading.RLock()
+    # Read once at import, while no other thread can create files.
+    _UMASK: int = os.umask(0o022)
+    os.umask(_UMASK)
 
     @classmethod
     def init(
         cls,
-        settings: Dict[str, Any] = _DEFAULT_SET,
+        settings: Dict[str, Any] = None,
         root: Path = Path('.'),
-    ) -> str:
-        toml.dump(settings, (root / cls.FILE).open('w'))
+    ) -> None:
+        with cls._lock:
+            cls._write(root / cls.FILE, settings or cls._document())
 
     @classmethod
-    def get(
+    def get(cls, *keys: Tuple) -> Any:
+        item: Any = cls._document()
+
+        for key in keys:
+            if not isinstance(item, dict) or key not in item:
+                return None
+            item = item[key]
+
+        return item
+
+    @classmethod
+    def set(cls, *keys: Tuple, val: Any) -> None:
+        with cls._lock:
+            item: Dict[str, Any] = cls._document()
+
+            for key in keys[:-1]:
+                item = item.setdefault(key, {})
+
+            item[keys[-1]] = val
+            cls._dirty = True
+
+            if not cls._depth:
+                cls.flush()
+
+    @classmethod
+    @contextmanager
+    def transaction(cls) -> Iterator[None]:
+        with cls._lock:
+            cls._depth += 1
+
+        try:
+            yield
+        finally:
+            with cls._lock:
+                cls._depth -= 1
+                if not cls._depth:
+                    cls.flush()
+
+    @classmethod
+    def flush(cls) -> None:
+        with cls._lock:
+            if cls._dirty and cls.FILE.exists():
+                cls._write(cls.FILE, cls._doc)
+
+            cls._dirty = False
+
+    @classmethod
+    def file_mode(cls, path: Path) -> int:
+        # mkstemp files are private, a replaced file keeps its own mode and
+        # a new one gets the usual 0644 under the umask.
+        try:
+            return path.stat().st_mode & 0o7777
+        except OSError:
+            return 0o644 & ~cls._UMASK
+
+    @classmethod
+    @contextmanager
+    def atomic_open(
         cls,
-        *keys,
-        _item: Any = toml.load(FILE) if FILE.exists() else _DEFAULT_SET
-    ) -> Any:
-        return (
-            cls.get(*keys[1:], _item=_item[keys[0]])
-            if keys and _item
-            else _item
+        path: Path,
+        mode: int = None,
+        binary: bool = False,
+        encoding: str = 'utf-8',
+    ) -> Iterator[IO]:
+        # Readers see the old content or the new one, never a torn file.
+        fd, tmp = tempfile.mkstemp(
+            dir=path.parent, prefix=f'.{path.name}-', suffix='.tmp'
         )
 
+        try:
+            with os.fdopen(
+                fd,
+                'wb' if binary else 'w',
+                encoding=None if binary else encoding,
+            ) as fh:
+                yield fh
+            os.chmod(tmp, cls.file_mode(path) if mode is None else mode)
+            os.replace(tmp, path)
+        except BaseException:
+            os.remove(tmp)
+            raise
+
     @classmethod
-    def set(cls, *keys: Tuple, val: Any) -> None:
-        item: Any = cls.get(*keys[:-1])
-        item[keys[-1]] = val
+    def atomic_write(
+        cls,
+        path: Path,
+        data: Union[str, bytes],
+        mode: int = None,
+        encoding: str = 'utf-8',
+    ) -> None:
+        with cls.atomic_open(
+            path,
+            mode=mode,
+            binary=isinstance(data, bytes),
+            encoding=encoding,
+        ) as fh:
+            fh.write(data)
+
+    @classmethod
+    def _document(cls) -> Dict[str, Any]:
+        with cls._lock:
+            stamp: Tuple = cls._stamp_of(cls.FILE)
+
+            # Pending changes win over the file until they are flushed.
+            if cls._doc is None or (stamp != cls._stamp and not cls._dirty):
+                cls._doc = cls._load(cls.FILE) if stamp else cls._defaults()
+                cls._stamp = stamp
+
+            return cls._doc
+
+    @classmethod
+    def _defaults(cls) -> Dict[str, Any]:
+        return copy.deepcopy(cls._DEFAULT_SET)
+
+    @classmethod
+    def _load(cls, path: Path) -> Dict[str, Any]:
+        import toml
+
+        doc: Dict[str, Any] = cls._defaults()
+
+        with Trace.span('Settings._load', path=str(path)):
+            for section, values in toml.loads(
+                path.read_text(encoding='utf-8')
+            ).items():
+                if isinstance(values, dict) and isinstance(
+                    doc.get(section), dict
+                ):
+                    doc[section].update(values)
+                else:
+                    doc[section] = values
+
+        return doc
+
+    @classmethod
+    def _write(cls, path: Path, settings: Dict[str, Any]) -> None:
+        import toml
+
+        with Trace.span('Settings._write', path=str(path)):
+            cls.atomic_write(path, toml.dumps(settings))
+
+        if path.resolve() == cls.FILE.resolve():
+            # Foreign content is reloaded from the file on the next access.
+            cls._stamp = (
+                cls._stamp_of(cls.FILE) if settings is cls._doc else None
+            )
+
+    @classmethod
+    def _stamp_of(cls, path: Path) -> Tuple:
+        try:
+            st: os.stat_result = path.stat()
+        except OSError:
+            return None
 
-        if cls.FILE.exists():
-            toml.dump(cls.get(), cls.FILE.open('w'))
\ No newline at end of file
+        return (str(path.resolve()), st.st_mtime_ns, st.st_size)
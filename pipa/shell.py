@@ -1,8 +1,12 @@
 from __future__ import annotations
-from typing import TextIO, List, Tuple
+from collections import deque
+from typing import Callable, Deque, Dict, IO, TextIO, List, Tuple
 import sys
+import threading
 import subprocess
+import os
 from pipa.settings import Settings, System
+from pipa.trace import Span, Trace
 
 
 class _Pipe:
@@ -14,46 +18,119 @@ class _Pipe:
 
 class Shell:
     PIPE: _Pipe = _Pipe
-    SHEXE: str = (
-        'powershell '
+    SHEXE: List[str] = (
+        ['powershell', '-Command']
         if Settings.get('core', 'system') == System.WINDOWS
-        else '/bin/bash '
+        else ['/bin/bash', '-c']
     )
     SEP: str = (
         '; '
         if Settings.get('core', 'system') == System.WINDOWS
         else ' && '
     )
+    ENCODING: str = Settings.get('core', 'encoding')
+    CONTEXT: int = 20
 
-    def __init__(self, stdout: TextIO = PIPE.SYSOUT):
+    def __init__(
+        self, stdout: TextIO = PIPE.SYSOUT, env: Dict[str, str] = None
+    ):
         self._processes: List[str] = []
+        self._args: List[str] = []
+        self._env: Dict[str, str] = env
         self._stdin: TextIO = None
         self._stdout: TextIO = stdout
         self._stderr: TextIO = self.PIPE.SUBPROC
 
     @property
-    def _cmd(self) -> str:
-        return self.SHEXE + self.SEP.join(self._processes)
+    def _cmd(self) -> List[str]:
+        return self._args or self.SHEXE + [self.SEP.join(self._processes)]
+
+    @property
+    def _quiet(self) -> bool:
+        return self._stdout == self.PIPE.SUBPROC
 
     def write_process(self, cmd: str) -> Shell:
         self._processes += [cmd]
         return self
 
-    def run(self) -> int:
+    def write_args(self, *args: Tuple) -> Shell:
+        self._args = [str(_) for _ in args]
+        return self
+
+    def run(self, is_err: Callable[[str], bool] = None) -> int:
+        with Trace.span(
+            ' '.join([os.path.basename(self._cmd[0]), *self._cmd[1:]]),
+            argv=self._cmd,
+        ) as span:
+            return self._run(is_err, span)
+
+    def _run(self, is_err: Callable[[str], bool], span: Span) -> int:
+        out_tail: Deque[str] = deque(maxlen=self.CONTEXT)
+        err_tail: Deque[str] = deque(maxlen=self.CONTEXT)
+
+        def on_stderr(line: str) -> None:
+            stream: TextIO = self.PIPE.SYSOUT
+
+            if not is_err or is_err(line):
+                err_tail.append(line)
+                stream = self.PIPE.SYSERR
+
+            if not self._quiet:
+                stream.write(f'{line}\n')
+                stream.flush()
+
         process: subprocess.Popen = subprocess.Popen(
             self._cmd,
             stdin=self._stdin,
             stdout=self._stdout,
             stderr=self._stderr,
+            env=self._env,
         )
+        # Both pipes are drained concurrently, line by line, so neither
+        # can fill up and only the last lines are kept as error context.
+        pumps: List[threading.Thread] = [
+            threading.Thread(
+                target=self._pump, args=(process.stderr, on_stderr)
+            )
+        ]
+        if process.stdout:
+            pumps.append(
+                threading.Thread(
+                    target=self._pump, args=(process.stdout, out_tail.append)
+                )
+            )
+
+        for pump in pumps:
+            pump.start()
+        for pump in pumps:
+            pump.join()
+
+        if returncode := self._wait(process, span):
+            raise ProcessExecError(
+                '\n'.join(err_tail or out_tail)
+                or f'{self._cmd[0]} exited with code {returncode}.'
+            )
 
-        if stderr := process.communicate()[1] \
-        .decode(Settings.get('core', 'encoding')) \
-        .strip():
-            raise ProcessExecError(stderr)
+        return returncode
+
+    def _wait(self, process: subprocess.Popen, span: Span) -> int:
+        if not span or not hasattr(os, 'wait4'):
+            return process.wait()
+
+        # Reaping the child ourselves gives its own resource usage.
+        _, status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(status)
+        span.exit_code = process.returncode
+        span.cpu = usage.ru_utime + usage.ru_stime
+        span.rss = usage.ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
 
         return process.returncode
 
+    def _pump(self, pipe: IO[bytes], sink: Callable[[str], None]) -> None:
+        with pipe:
+            for line in iter(pipe.readline, b''):
+                sink(line.decode(self.ENCODING, errors='replace').rstrip())
+
 
 class ProcessExecError(Exception):
     pass
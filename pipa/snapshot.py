@@ -0,0 +1,89 @@
+from __future__ import annotations
+import sys
+import json
+import shutil
+import hashlib
+from typing import List
+from pathlib import Path
+from pipa.settings import Settings, System
+from pipa.store import Store
+from pipa.virtualenv import Virtualenv
+
+
+class Snapshot:
+    VERSION: int = 1
+    _READY: str = '.pipa-snapshot'
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return (
+            bool(Settings.get('snapshot', 'enabled'))
+            and Settings.get('core', 'system') != System.WINDOWS
+        )
+
+    @classmethod
+    def home(cls) -> Path:
+        return Path(Settings.get('snapshot', 'home')).expanduser()
+
+    @classmethod
+    def key(cls, pkgs: List[str]) -> str:
+        python: Path = Path(shutil.which('python') or sys.executable).resolve()
+
+        return hashlib.sha256(
+            json.dumps(
+                {
+                    'version': cls.VERSION,
+                    'python': [
+                        str(python),
+                        python.stat().st_size,
+                        python.stat().st_mtime_ns,
+                    ],
+                    'packages': sorted(pkgs),
+                }
+            ).encode('utf-8')
+        ).hexdigest()[:16]
+
+    @classmethod
+    def path(cls, pkgs: List[str]) -> Path:
+        return cls.home() / cls.key(pkgs)
+
+    @classmethod
+    def ensure(cls, pkgs: List[str], quiet: bool = True) -> Path:
+        if ((path := cls.path(pkgs)) / cls._READY).exists():
+            return path
+
+        tmp: Path = cls.home() / f'.{path.name}-{Virtualenv.gen_hash()}'
+        tmp.parent.mkdir(parents=True, exist_ok=True)
+
+        try:
+            Virtualenv.deploy(home=tmp)
+            Virtualenv.pip('install', *pkgs, quiet=quiet, home=tmp)
+            (tmp / cls._READY).write_text(str(tmp), encoding='utf-8')
+            tmp.rename(path)
+        except OSError:
+            # A concurrent build may have published the snapshot first.
+            if not (path / cls._READY).exists():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        for stale in cls.home().iterdir():
+            if stale.name != path.name and not stale.name.startswith('.'):
+                shutil.rmtree(stale, ignore_errors=True)
+
+        return path
+
+    @classmethod
+    def clone(cls, pkgs: List[str], home: Path, quiet: bool = True) -> None:
+        src: Path = cls.ensure(pkgs, quiet=quiet)
+
+        shutil.copytree(
+            src,
+            home,
+            symlinks=True,
+            ignore=shutil.ignore_patterns('__pycache__', cls._READY),
+            copy_function=lambda s, d: Store.link(Path(s), Path(d)),
+        )
+        Virtualenv.relocate(
+            Path((src / cls._READY).read_text(encoding='utf-8')), home=home
+        )
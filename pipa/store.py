@@ -0,0 +1,284 @@
+from __future__ import annotations
+import os
+import json
+import hashlib
+import shutil
+import tempfile
+from typing import Callable, Dict, List, Set, Tuple
+from pathlib import Path
+from packaging import tags
+from packaging.tags import Tag
+from pipa.lockfile import LockEntry, Lockfile
+from pipa.settings import Settings, System
+from pipa.virtualenv import Virtualenv, VirtualenvError
+from pipa.wheel import Wheel, WheelInstaller
+
+
+class StoreStats:
+    def __init__(self):
+        self.entries: int = 0
+        self.referenced: int = 0
+        self.files: int = 0
+        self.size: int = 0
+        self.deduplicated: int = 0
+
+
+class Store:
+    _OBJECTS: str = 'objects'
+    _TMP: str = 'tmp'
+    _TREE: str = 'tree'
+    _META: str = 'wheel.json'
+    # Environments installed from an entry, copies and reflinks share no
+    # inode with it.
+    _REFS: str = 'refs'
+    _FICLONE: int = 0x40049409
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return (
+            bool(Settings.get('store', 'enabled'))
+            and Settings.get('core', 'system') != System.WINDOWS
+        )
+
+    @classmethod
+    def home(cls) -> Path:
+        return Path(Settings.get('store', 'home')).expanduser()
+
+    @classmethod
+    def entry(cls, name: str, version: str, digest: str) -> Path:
+        return cls.home() / cls._OBJECTS / name / version / digest
+
+    @classmethod
+    def find(cls, entry: LockEntry, supported: Set[Tag]) -> Path:
+        for algo, _, digest in [_.partition(':') for _ in entry.hashes]:
+            if algo != 'sha256':
+                continue
+
+            path: Path = cls.entry(entry.name, entry.version, digest)
+            if (meta := path / cls._META).exists() and supported.intersection(
+                Wheel(Path(json.loads(meta.read_text())['filename'])).tags
+            ):
+                return path
+
+        return None
+
+    @classmethod
+    def add(cls, wheel: Wheel, digest: str = None) -> Path:
+        path: Path = cls.entry(
+            wheel.name, wheel.version, digest or wheel.digest()
+        )
+
+        if (path / cls._META).exists():
+            return path
+
+        (cls.home() / cls._TMP).mkdir(parents=True, exist_ok=True)
+        tmp: Path = Path(tempfile.mkdtemp(dir=cls.home() / cls._TMP))
+
+        try:
+            wheel.unpack(tmp / cls._TREE)
+            (tmp / cls._META).write_text(
+                json.dumps(
+                    {
+                        'filename': wheel.path.name,
+                        'size': wheel.path.stat().st_size,
+                    }
+                )
+            )
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(tmp, path)
+        except OSError:
+            # Another process may have stored the same wheel meanwhile.
+            if not (path / cls._META).exists():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        return path
+
+    @classmethod
+    def install(
+        cls,
+        lock: Lockfile,
+        names: List[str],
+        quiet: bool = True,
+        on_ready: Callable[[List[str]], None] = None,
+    ) -> List[str]:
+        supported: Set[Tag] = cls._supported_tags()
+        trees: Dict[str, Path] = {}
+
+        for name in names:
+            if path := cls.find(lock.entries[name], supported):
+                trees[name] = path
+
+        if missing := [name for name in names if name not in trees]:
+            trees.update(cls._fetch(lock, missing, quiet=quiet))
+
+        if on_ready:
+            on_ready(list(trees))
+        installer: WheelInstaller = WheelInstaller(
+            Virtualenv.site_packages(),
+            Virtualenv.bin_dir(),
+            Virtualenv.python(),
+            link=cls.link,
+        )
+        for path in trees.values():
+            installer.install(path / cls._TREE)
+            cls._ref(path, Virtualenv.site_packages())
+
+        return [name for name in names if name not in trees]
+
+    @classmethod
+    def _fetch(
+        cls, lock: Lockfile, names: List[str], quiet: bool = True
+    ) -> Dict[str, Path]:
+        (cls.home() / cls._TMP).mkdir(parents=True, exist_ok=True)
+        tmp: Path = Path(tempfile.mkdtemp(dir=cls.home() / cls._TMP))
+        trees: Dict[str, Path] = {}
+
+        try:
+            (tmp / 'requirements.txt').write_text(
+                lock.render(*names), encoding=Settings.get('core', 'encoding')
+            )
+            Virtualenv.pip(
+                'download',
+                '--no-deps',
+                '--only-binary=:all:',
+                '-d',
+                tmp,
+                '-r',
+                tmp / 'requirements.txt',
+                quiet=quiet,
+            )
+        except VirtualenvError:
+            # Let pip install the entries that have no usable wheel.
+            pass
+        else:
+            for path in tmp.glob('*.whl'):
+                wheel: Wheel = Wheel(path)
+                trees[wheel.name] = cls.add(wheel)
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+        return trees
+
+    @classmethod
+    def link(cls, src: Path, dest: Path) -> None:
+        if Settings.get('store', 'link') != 'reflink':
+            try:
+                return os.link(src, dest)
+            except OSError:
+                pass
+
+        try:
+            return cls._reflink(src, dest)
+        except (OSError, ImportError):
+            shutil.copy2(src, dest)
+
+    @classmethod
+    def _reflink(cls, src: Path, dest: Path) -> None:
+        import fcntl
+
+        with src.open('rb') as fsrc, dest.open('wb') as fdest:
+            fcntl.ioctl(fdest.fileno(), cls._FICLONE, fsrc.fileno())
+
+        shutil.copystat(src, dest)
+
+    @classmethod
+    def stats(cls) -> StoreStats:
+        stats: StoreStats = StoreStats()
+
+        for path in cls._entries():
+            stats.entries += 1
+            sts: List[os.stat_result] = cls._stat_tree(path)
+
+            for st in sts:
+                stats.files += 1
+                stats.size += st.st_size
+                stats.deduplicated += st.st_size * (st.st_nlink - 1)
+
+            stats.referenced += cls._referenced(path, sts)
+
+        return stats
+
+    @classmethod
+    def prune(cls) -> StoreStats:
+        stats: StoreStats = StoreStats()
+
+        for path in cls._entries():
+            sts: List[os.stat_result] = cls._stat_tree(path)
+
+            if cls._referenced(path, sts):
+                continue
+
+            stats.entries += 1
+            stats.files += len(sts)
+            stats.size += sum(st.st_size for st in sts)
+            shutil.rmtree(path)
+
+            for parent in (path.parent, path.parent.parent):
+                if not any(parent.iterdir()):
+                    parent.rmdir()
+
+        shutil.rmtree(cls.home() / cls._TMP, ignore_errors=True)
+
+        return stats
+
+    @classmethod
+    def _entries(cls) -> List[Path]:
+        return [
+            path.parent
+            for path in (cls.home() / cls._OBJECTS).glob(f'*/*/*/{cls._META}')
+        ]
+
+    @classmethod
+    def _ref(cls, path: Path, site_packages: Path) -> None:
+        target: str = str(site_packages.resolve())
+
+        (refs := path / cls._REFS).mkdir(exist_ok=True)
+        (
+            refs / hashlib.sha256(target.encode('utf-8')).hexdigest()[:16]
+        ).write_text(target, encoding='utf-8')
+
+    @classmethod
+    def _referenced(cls, path: Path, sts: List[os.stat_result]) -> bool:
+        # Hardlinked before refs were kept.
+        if any(st.st_nlink > 1 for st in sts):
+            return True
+
+        dist_infos: List[str] = [
+            _.name for _ in (path / cls._TREE).glob('*.dist-info')
+        ]
+        for ref in (
+            (path / cls._REFS).iterdir() if (path / cls._REFS).is_dir() else []
+        ):
+            try:
+                site_packages: Path = Path(ref.read_text(encoding='utf-8'))
+            except OSError:
+                continue
+            # Gone with its environment, or replaced by another version.
+            if any((site_packages / _).is_dir() for _ in dist_infos):
+                return True
+            ref.unlink(missing_ok=True)
+
+        return False
+
+    @classmethod
+    def _stat_tree(cls, path: Path) -> List[os.stat_result]:
+        return [
+            _.stat()
+            for _ in (path / cls._TREE).rglob('*')
+            if _.is_file() and not _.is_symlink()
+        ]
+
+    @classmethod
+    def _supported_tags(cls) -> Set[Tag]:
+        if not (version := Virtualenv.python_version()):
+            return set(tags.sys_tags())
+
+        python_version: Tuple[int, ...] = tuple(
+            int(_) for _ in version.split('.')[:2]
+        )
+
+        return set(tags.cpython_tags(python_version=python_version)) | set(
+            tags.compatible_tags(python_version=python_version)
+        )
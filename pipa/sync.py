@@ -0,0 +1,174 @@
+from __future__ import annotations
+import os
+import json
+import tempfile
+from typing import Dict, List, Set
+from pathlib import Path
+from packaging.requirements import Requirement
+from packaging.version import InvalidVersion, Version
+from pipa.distribution import Distribution
+from pipa.installer import ParallelInstaller
+from pipa.lockfile import LockEntry, Lockfile
+from pipa.settings import Settings
+from pipa.store import Store
+from pipa.virtualenv import Virtualenv
+from pipa.wheelhouse import Wheelhouse
+
+
+class SyncPlan:
+    def __init__(self, install: List[str], uninstall: List[str]):
+        self.install: List[str] = install
+        self.uninstall: List[str] = uninstall
+
+    @property
+    def empty(self) -> bool:
+        return not self.install and not self.uninstall
+
+
+class Sync:
+    RECORD_FILE: str = 'pipa-sync.json'
+    _PROTECTED: List[str] = ['pip', 'setuptools', 'wheel']
+
+    @classmethod
+    def plan(cls, lock: Lockfile, keep: List[Requirement] = ()) -> SyncPlan:
+        env: Dict[str, str] = Virtualenv.marker_env()
+        dists: Dict[str, Distribution] = Distribution.scan(
+            Virtualenv.site_packages()
+        )
+        record: Dict[str, List[str]] = cls._read_record()
+        wanted: Dict[str, LockEntry] = lock.applicable(env)
+        kept: Set[str] = set(wanted) | set(
+            Distribution.closure(
+                [*keep, *[Requirement(_) for _ in cls._PROTECTED]],
+                dists,
+                env=env,
+            )
+        )
+
+        return SyncPlan(
+            [
+                name
+                for name, entry in wanted.items()
+                if cls._outdated(entry, dists.get(name), record.get(name))
+            ],
+            [name for name in dists if name not in kept],
+        )
+
+    @classmethod
+    def run(
+        cls,
+        lock: Lockfile,
+        keep: List[Requirement] = (),
+        quiet: bool = True,
+        wheelhouse: Wheelhouse = None,
+    ) -> SyncPlan:
+        plan: SyncPlan = cls.plan(lock, keep=keep)
+        record: Dict[str, List[str]] = cls._read_record()
+
+        if plan.uninstall:
+            Virtualenv.pip('uninstall', '-y', *plan.uninstall, quiet=quiet)
+            for name in plan.uninstall:
+                record.pop(name, None)
+
+        if plan.install:
+            cls._install(
+                lock, plan.install, quiet=quiet, wheelhouse=wheelhouse
+            )
+
+            for name in plan.install:
+                record[name] = sorted(lock.entries[name].hashes)
+
+        if not plan.empty:
+            cls._write_record(record)
+
+        return plan
+
+    @classmethod
+    def _install(
+        cls,
+        lock: Lockfile,
+        names: List[str],
+        quiet: bool = True,
+        wheelhouse: Wheelhouse = None,
+    ) -> None:
+        if wheelhouse:
+            return wheelhouse.install(lock, names, quiet=quiet)
+
+        if Store.enabled() or ParallelInstaller.enabled(lock, names):
+            # Replaced only once every wheel is fetched and verified.
+            def replace(ready: List[str]) -> None:
+                cls._uninstall(ready, quiet=quiet)
+
+            names = (
+                Store.install(lock, names, quiet=quiet, on_ready=replace)
+                if Store.enabled()
+                else ParallelInstaller.install(
+                    lock, names, quiet=quiet, on_ready=replace
+                )
+            )
+
+        if names:
+            fd, path = tempfile.mkstemp(suffix='.txt', prefix='pipa-sync-')
+            try:
+                with os.fdopen(
+                    fd, 'w', encoding=Settings.get('core', 'encoding')
+                ) as fh:
+                    fh.write(lock.render(*names))
+
+                Virtualenv.pip(
+                    'install',
+                    '--no-deps',
+                    '--force-reinstall',
+                    '-r',
+                    path,
+                    quiet=quiet,
+                )
+            finally:
+                os.remove(path)
+
+    @classmethod
+    def _uninstall(cls, names: List[str], quiet: bool = True) -> None:
+        dists: Dict[str, Distribution] = Distribution.scan(
+            Virtualenv.site_packages()
+        )
+
+        if installed := [name for name in names if name in dists]:
+            Virtualenv.pip('uninstall', '-y', *installed, quiet=quiet)
+
+    @classmethod
+    def _outdated(
+        cls, entry: LockEntry, dist: Distribution, hashes: List[str]
+    ) -> bool:
+        if not dist or not entry.version:
+            return True
+
+        try:
+            if Version(dist.version) != Version(entry.version):
+                return True
+        except InvalidVersion:
+            if dist.version != entry.version:
+                return True
+
+        # Installed some other way, or the record was lost: only a hashed
+        # install of our own is known to match the lock.
+        if hashes is None:
+            return bool(entry.hashes)
+
+        return bool(entry.hashes and not entry.hashes.intersection(hashes))
+
+    @classmethod
+    def _record_path(cls) -> Path:
+        return Path(Settings.get('venv', 'home')) / cls.RECORD_FILE
+
+    @classmethod
+    def _read_record(cls) -> Dict[str, List[str]]:
+        try:
+            return json.loads(cls._record_path().read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _write_record(cls, record: Dict[str, List[str]]) -> None:
+        Settings.atomic_write(
+            cls._record_path(), json.dumps(record, indent=2, sort_keys=True)
+        )
@@ -0,0 +1,147 @@
+from __future__ import annotations
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, List, Tuple
+from pipa.trace import Trace
+
+
+class TaskState:
+    PENDING: int = 0
+    RUNNING: int = 1
+    DONE: int = 2
+    FAILED: int = 3
+    CANCELLED: int = 4
+
+
+class Task:
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        deps: Tuple[str] = (),
+        label: str = None,
+    ):
+        self.name: str = name
+        self.fn: Callable[[], Any] = fn
+        self.deps: Tuple[str] = deps
+        self.label: str = label
+        self.state: int = TaskState.PENDING
+        self.result: Any = None
+        self.error: BaseException = None
+        self.elapsed: float = None
+
+    def __call__(self) -> Task:
+        start: float = time.perf_counter()
+
+        try:
+            with Trace.span(f'task {self.name}'):
+                self.result = self.fn()
+            self.state = TaskState.DONE
+        except BaseException as e:
+            self.error = e
+            self.state = TaskState.FAILED
+        finally:
+            self.elapsed = time.perf_counter() - start
+
+        return self
+
+
+class TaskGraph:
+    def __init__(
+        self, workers: int = 4, on_start: Callable[[Task], None] = None
+    ):
+        self._workers: int = workers
+        self._on_start: Callable[[Task], None] = on_start
+        self._tasks: Dict[str, Task] = {}
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        *deps: Tuple,
+        label: str = None,
+    ) -> TaskGraph:
+        self._tasks[name] = Task(name, fn, deps=deps, label=label)
+        return self
+
+    def result(self, name: str) -> Any:
+        return self._tasks[name].result
+
+    @property
+    def timings(self) -> Dict[str, float]:
+        return {
+            name: task.elapsed
+            for name, task in self._tasks.items()
+            if task.elapsed is not None
+        }
+
+    def run(self) -> TaskGraph:
+        self._check()
+        failed: Task = None
+
+        with ThreadPoolExecutor(max_workers=self._workers) as pool:
+            running: Dict[Future, Task] = {}
+
+            while True:
+                # Once a task failed, nothing new is started: the running
+                # tasks are left to finish and the pending ones cancelled.
+                for task in [] if failed else self._ready():
+                    task.state = TaskState.RUNNING
+                    if self._on_start:
+                        self._on_start(task)
+                    running[pool.submit(task)] = task
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if (task := running.pop(future)).error and not failed:
+                        failed = task
+
+        for task in self._tasks.values():
+            if task.state == TaskState.PENDING:
+                task.state = TaskState.CANCELLED
+
+        if failed:
+            raise TaskError(f'{failed.name}: {failed.error}') from failed.error
+
+        return self
+
+    def _ready(self) -> List[Task]:
+        return [
+            task
+            for task in self._tasks.values()
+            if task.state == TaskState.PENDING
+            and all(
+                self._tasks[dep].state == TaskState.DONE for dep in task.deps
+            )
+        ]
+
+    def _check(self) -> None:
+        visited: Dict[str, bool] = {}
+
+        def visit(name: str) -> None:
+            if name not in self._tasks:
+                raise TaskError(f'Unknown task: {name}.')
+            if visited.get(name) is False:
+                raise TaskError(f'Dependency cycle detected on: {name}.')
+            if name in visited:
+                return
+
+            visited[name] = False
+            for dep in self._tasks[name].deps:
+                visit(dep)
+            visited[name] = True
+
+        for name in self._tasks:
+            visit(name)
+
+
+class TaskError(Exception):
+    pass
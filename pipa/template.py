@@ -1,40 +1,393 @@
-from typing import Dict, Any
-from pathlib import Path
+from __future__ import annotations
+import os
+import json
+import shutil
+import string
+import hashlib
+import tarfile
+import zipfile
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Set, Tuple
+from pathlib import Path, PurePosixPath
 from datetime import datetime
+from pipa.hashes import Hasher
 from pipa.settings import Settings
 
 
+class DeployReport:
+    WRITTEN: str = 'written'
+    UNCHANGED: str = 'unchanged'
+    KEPT: str = 'kept'
+    REMOVED: str = 'removed'
+
+    def __init__(self, version: str):
+        self.version: str = version
+        self.results: Dict[str, str] = {}
+
+    def files(self, result: str) -> List[str]:
+        return sorted(
+            rel for rel, status in self.results.items() if status == result
+        )
+
+
 class Template:
+    MANIFEST_FILE: str = '.pipa-template.json'
     _ENCODING: str = 'utf-8'
+    _CACHE_MANIFEST: str = 'manifest.json'
 
     def __init__(
         self,
         pname: str = None,
-        wkdir: Path = Path('.'),
+        root: Path = None,
+        source: str = None,
     ):
         self._pname: str = pname or Settings.get('project', 'name')
-        self._wkdir: Path = wkdir
+        self._root: Path = root or Path(self._pname.lower())
+        self._source: TemplateSource = TemplateSource.of(
+            source or Settings.get('template', 'source')
+        )
+
+    def deploy(self) -> DeployReport:
+        rendered, files = self.render()
+        deployed: Dict[str, Any] = self._read_manifest()
+        report: DeployReport = DeployReport(self._source.version())
+        previous: Dict[str, str] = deployed.get('files', {})
+
+        rels: List[str] = [*files, *[_ for _ in previous if _ not in files]]
+
+        self._root.mkdir(parents=True, exist_ok=True)
+        with ThreadPoolExecutor(max_workers=Hasher.jobs()) as pool:
+            report.results = dict(
+                zip(
+                    rels,
+                    pool.map(
+                        lambda rel: self._apply(
+                            rel, rendered, files.get(rel), previous.get(rel)
+                        ),
+                        rels,
+                    ),
+                )
+            )
+
+        self._write(
+            self._root / self.MANIFEST_FILE,
+            json.dumps(
+                {
+                    'source': self._source.spec,
+                    'version': report.version,
+                    'files': {
+                        rel: entry['sha256'] for rel, entry in files.items()
+                    },
+                },
+                indent=2,
+                sort_keys=True,
+            ).encode(self._ENCODING),
+        )
+
+        return report
+
+    def render(self) -> Tuple[Path, Dict[str, Dict[str, Any]]]:
+        context: Dict[str, str] = {
+            'pname': self._pname,
+            'pname_lower': self._pname.lower(),
+            'pname_cls': self._pname_cls,
+        }
+        # One render per template version and context, shared by projects.
+        # The date is filled in afterwards, or the key would change daily.
+        path: Path = (
+            self._cache_home()
+            / hashlib.sha256(
+                json.dumps(
+                    [self._source.version(), context], sort_keys=True
+                ).encode('utf-8')
+            ).hexdigest()[:16]
+        )
+
+        if not (path / self._CACHE_MANIFEST).exists():
+            tmp: Path = Path(
+                tempfile.mkdtemp(dir=path.parent, prefix=f'.{path.name}-')
+            )
+
+            try:
+                files: Dict[str, Dict[str, Any]] = {}
+                for rel, (content, mode) in self._source.files(
+                    context
+                ).items():
+                    self._write(tmp / 'files' / rel, content, mode)
+                    files[rel] = {
+                        'sha256': hashlib.sha256(content).hexdigest(),
+                        'mode': mode,
+                        'dated': TemplateSource.dated(rel.encode('utf-8'))
+                        or TemplateSource.dated(content),
+                    }
+                (tmp / self._CACHE_MANIFEST).write_text(
+                    json.dumps(files), encoding=self._ENCODING
+                )
+                tmp.rename(path)
+            except OSError:
+                # A concurrent render may have published it first.
+                if not (path / self._CACHE_MANIFEST).exists():
+                    raise
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+
+        return path / 'files', self._date(
+            path / 'files',
+            json.loads(
+                (path / self._CACHE_MANIFEST).read_text(
+                    encoding=self._ENCODING
+                )
+            ),
+        )
+
+    def _date(
+        self, rendered: Path, files: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        context: Dict[str, str] = {'date': datetime.now().strftime('%Y-%m-%d')}
+        dated: Dict[str, Dict[str, Any]] = {}
+
+        for rel, entry in files.items():
+            if entry.pop('dated', False):
+                entry['content'] = TemplateSource.substitute(
+                    (rendered / rel).read_bytes(), context
+                )
+                entry['sha256'] = hashlib.sha256(entry['content']).hexdigest()
+            dated[
+                TemplateSource.substitute(rel.encode('utf-8'), context).decode(
+                    'utf-8'
+                )
+            ] = entry
+
+        return dated
+
+    def _apply(
+        self,
+        rel: str,
+        rendered: Path,
+        entry: Dict[str, Any],
+        previous: str,
+    ) -> str:
+        target: Path = self._root / rel
+
+        if entry is None:
+            # Dropped by the template, unless the user changed it since.
+            if target.is_file() and Hasher.digest(target, False) == previous:
+                target.unlink()
+                return DeployReport.REMOVED
+            return DeployReport.KEPT
+
+        if target.exists():
+            if previous == entry['sha256']:
+                return DeployReport.UNCHANGED
+            if (current := Hasher.digest(target, False)) == entry['sha256']:
+                return DeployReport.UNCHANGED
+            if current != previous:
+                return DeployReport.KEPT
 
-    def deploy(self) -> None:
-        self._deploy_item(
-            TBlueprint.generate(self._pname, self._pname_cls), self._wkdir
+        self._write(
+            target,
+            (
+                entry['content']
+                if 'content' in entry
+                else (rendered / rel).read_bytes()
+            ),
+            entry['mode'],
         )
 
-    def _deploy_item(self, item: Dict[str, Any], cur_path: Path) -> None:
-        new_path: Path = cur_path / item['name']
+        return DeployReport.WRITTEN
 
-        if item['nature'] is ItemNature.DIR:
-            new_path.mkdir()
-            for child in item['childs']:
-                self._deploy_item(child, new_path)
-        elif item['nature'] is ItemNature.FILE:
-            new_path.write_text(item['content'], encoding=self._ENCODING)
+    def _read_manifest(self) -> Dict[str, Any]:
+        try:
+            return json.loads(
+                (self._root / self.MANIFEST_FILE).read_text(
+                    encoding=self._ENCODING
+                )
+            )
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def _write(cls, path: Path, content: bytes, mode: int = 0o644) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        Settings.atomic_write(path, content, mode=mode)
+
+    @classmethod
+    def _cache_home(cls) -> Path:
+        path: Path = Path(Settings.get('template', 'cache')).expanduser()
+        path.mkdir(parents=True, exist_ok=True)
+
+        return path
 
     @property
     def _pname_cls(self) -> str:
         return ''.join([_.capitalize() for _ in self._pname.split('_')])
 
 
+class TemplateSource(ABC):
+    def __init__(self, spec: str = None):
+        self.spec: str = spec
+        self._version: str = None
+
+    @classmethod
+    def of(cls, spec: str = None) -> TemplateSource:
+        if not spec:
+            return BuiltinSource()
+
+        path: Path = Path(spec).expanduser().resolve()
+        if path.is_dir():
+            return DirectorySource(str(path))
+        if path.is_file():
+            return ArchiveSource(str(path))
+
+        raise TemplateError(f'Template source not found: {spec}')
+
+    def version(self) -> str:
+        if self._version is None:
+            self._version = self._compute_version()
+
+        return self._version
+
+    def files(self, context: Dict[str, str]) -> Dict[str, Tuple[bytes, int]]:
+        return {
+            self.substitute(rel.encode('utf-8'), context).decode('utf-8'): (
+                self.substitute(content, context),
+                mode,
+            )
+            for rel, (content, mode) in self._raw(context).items()
+        }
+
+    @classmethod
+    def substitute(cls, content: bytes, context: Dict[str, str]) -> bytes:
+        try:
+            text: str = content.decode('utf-8')
+        except UnicodeDecodeError:
+            return content
+
+        # Unknown placeholders, like shell variables, are left untouched.
+        return string.Template(text).safe_substitute(context).encode('utf-8')
+
+    @classmethod
+    def dated(cls, content: bytes) -> bool:
+        return b'$date' in content or b'${date}' in content
+
+    @abstractmethod
+    def _compute_version(self) -> str:
+        pass
+
+    @abstractmethod
+    def _raw(self, context: Dict[str, str]) -> Dict[str, Tuple[bytes, int]]:
+        pass
+
+    @classmethod
+    def _rel(cls, name: str) -> str:
+        rel: PurePosixPath = PurePosixPath(name)
+
+        if rel.is_absolute() or '..' in rel.parts:
+            raise TemplateError(f'Unsafe path in template: {name}')
+
+        return rel.as_posix()
+
+
+class BuiltinSource(TemplateSource):
+    VERSION: str = 'builtin-2'
+
+    def _raw(self, context: Dict[str, str]) -> Dict[str, Tuple[bytes, int]]:
+        files: Dict[str, Tuple[bytes, int]] = {}
+        pending: List[Tuple[str, Dict[str, Any]]] = [
+            ('', child)
+            for child in TBlueprint.generate(
+                context['pname'], context['pname_cls']
+            )['childs']
+        ]
+
+        while pending:
+            parent, item = pending.pop()
+            rel: str = f'{parent}{item["name"]}'
+            if item['nature'] is ItemNature.DIR:
+                pending += [(f'{rel}/', child) for child in item['childs']]
+            elif item['nature'] is ItemNature.FILE:
+                files[rel] = (item['content'].encode('utf-8'), 0o644)
+
+        return files
+
+    def _compute_version(self) -> str:
+        return self.VERSION
+
+
+class DirectorySource(TemplateSource):
+    _IGNORED: Tuple[str, ...] = ('.git', '__pycache__')
+
+    def _compute_version(self) -> str:
+        paths: Dict[str, Path] = self._paths()
+        digests: Dict[Path, str] = Hasher.digests(list(paths.values()))
+
+        return hashlib.sha256(
+            json.dumps(
+                sorted(
+                    (rel, digests[path], path.stat().st_mode & 0o777)
+                    for rel, path in paths.items()
+                )
+            ).encode('utf-8')
+        ).hexdigest()[:16]
+
+    def _raw(self, context: Dict[str, str]) -> Dict[str, Tuple[bytes, int]]:
+        return {
+            rel: (path.read_bytes(), path.stat().st_mode & 0o777)
+            for rel, path in self._paths().items()
+        }
+
+    def _paths(self) -> Dict[str, Path]:
+        root: Path = Path(self.spec)
+        paths: Dict[str, Path] = {}
+
+        for path, dirs, files in os.walk(root):
+            dirs[:] = [_ for _ in dirs if _ not in self._IGNORED]
+            for file in files:
+                paths[Path(path, file).relative_to(root).as_posix()] = Path(
+                    path, file
+                )
+
+        return paths
+
+
+class ArchiveSource(TemplateSource):
+    def _compute_version(self) -> str:
+        return Hasher.digest(Path(self.spec))[:16]
+
+    def _raw(self, context: Dict[str, str]) -> Dict[str, Tuple[bytes, int]]:
+        members: Dict[str, Tuple[bytes, int]] = {}
+
+        if zipfile.is_zipfile(self.spec):
+            with zipfile.ZipFile(self.spec) as zf:
+                for info in zf.infolist():
+                    if not info.is_dir():
+                        members[self._rel(info.filename)] = (
+                            zf.read(info),
+                            (info.external_attr >> 16) & 0o777 or 0o644,
+                        )
+        elif tarfile.is_tarfile(self.spec):
+            with tarfile.open(self.spec) as tf:
+                for info in tf.getmembers():
+                    if info.isfile():
+                        members[self._rel(info.name)] = (
+                            tf.extractfile(info).read(),
+                            info.mode & 0o777,
+                        )
+        else:
+            raise TemplateError(f'Unsupported template archive: {self.spec}')
+
+        # Archives of a repository wrap everything in a single directory.
+        tops: Set[str] = {rel.split('/', 1)[0] for rel in members}
+        if len(tops) == 1 and all('/' in rel for rel in members):
+            members = {
+                rel.split('/', 1)[1]: member for rel, member in members.items()
+            }
+
+        return members
+
+
 class ItemNature:
     DIR: int = 0
     FILE: int = 1
@@ -69,15 +422,15 @@ class TBlueprint:
                         {
                             'nature': ItemNature.FILE,
                             'name': '__main__.py',
-                            'content': f'\'\'\'\n@desc    Entrypoint file.\n@version 0.0.1\n@date    '
-                            f'{datetime.now().strftime("%Y-%m-%d")}\n@note    0.0.1 '
-                            f'({datetime.now().strftime("%Y-%m-%d")}) : Init file.'
-                            f'\n\'\'\'\n\n\nclass Main:\n\t\'\'\'The main class that is '
-                            f'used by the entrypoint file.\'\'\'\n\n\tdef run() -> '
-                            f'None:\n\t\t\'\'\'The main method that is called first '
-                            f'by the entrypoint file.\'\'\'\n\n\t\t...\n\n'
-                            f'if __name__ == \'__main__\''
-                            f':\n\tMain.run()\n',
+                            'content': '\'\'\'\n@desc    Entrypoint file.\n@version 0.0.1\n@date    '
+                            '${date}\n@note    0.0.1 '
+                            '(${date}) : Init file.'
+                            '\n\'\'\'\n\n\nclass Main:\n\t\'\'\'The main class that is '
+                            'used by the entrypoint file.\'\'\'\n\n\tdef run() -> '
+                            'None:\n\t\t\'\'\'The main method that is called first '
+                            'by the entrypoint file.\'\'\'\n\n\t\t...\n\n'
+                            'if __name__ == \'__main__\''
+                            ':\n\tMain.run()\n',
                         },
                     ],
                 },
@@ -100,7 +453,12 @@ class TBlueprint:
                 {
                     'nature': ItemNature.FILE,
                     'name': '.gitignore',
-                    'content': f'# Default ignores\n.vscode/\n__pycache__\n{Settings.FILE}',
+                    'content': f'# Default ignores\n.vscode/\n__pycache__\n{Settings.FILE}'
+                    '\n.requirements.lock.cache\n.pipa-lock\n.pipa-queue/',
                 },
             ],
-        }
\ No newline at end of file
+        }
+
+
+class TemplateError(Exception):
+    pass
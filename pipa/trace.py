@@ -0,0 +1,198 @@
+from __future__ import annotations
+import os
+import sys
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, TextIO
+from pathlib import Path
+
+
+class Span:
+    def __init__(self, name: str, parent: Span, args: Dict[str, Any]):
+        self.name: str = name
+        self.parent: Span = parent
+        self.args: Dict[str, Any] = args
+        self.depth: int = parent.depth + 1 if parent else 0
+        self.tid: int = threading.get_ident()
+        self.start: int = time.perf_counter_ns()
+        self.wall: float = None
+        # Subprocesses report their own usage, spans default to Pipa's.
+        self.cpu: float = None
+        self.rss: int = None
+        self.exit_code: int = None
+        self._cpu_start: float = time.process_time()
+
+    def close(self) -> None:
+        self.wall = (time.perf_counter_ns() - self.start) / 1e9
+
+        if self.cpu is None:
+            self.cpu = time.process_time() - self._cpu_start
+        if self.rss is None:
+            self.rss = Trace.peak_rss()
+
+
+class Trace:
+    FILE: Path = Path('pipa-trace.json')
+    ENV: str = 'PIPA_TRACE'
+    _spans: List[Span] = []
+    _root: Span = None
+    _path: Path = None
+    _local: threading.local = threading.local()
+    _lock: threading.Lock = threading.Lock()
+
+    @classmethod
+    def requested(cls) -> bool:
+        return os.environ.get(cls.ENV, '').lower() not in ('', '0', 'false')
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return cls._root is not None
+
+    @classmethod
+    def start(cls, name: str) -> None:
+        # PIPA_TRACE=1 keeps the default file, any other value is a path.
+        value: str = os.environ.get(cls.ENV, '')
+        cls._path = (
+            Path(value)
+            if cls.requested() and value.lower() not in ('1', 'true')
+            else cls.FILE
+        )
+        cls._spans = []
+        cls._root = cls._open(name, {})
+
+    @classmethod
+    def finish(cls, out: TextIO = sys.stderr) -> None:
+        if not cls.enabled():
+            return
+
+        cls._close(cls._root)
+        cls._root = None
+        cls._write(cls._path)
+        cls._summary(out)
+        out.write(f'Trace written to {cls._path}\n')
+
+    @classmethod
+    @contextmanager
+    def span(cls, name: str, **args: Dict[str, Any]) -> Iterator[Span]:
+        if not cls.enabled():
+            yield None
+            return
+
+        span: Span = cls._open(name, args)
+        try:
+            yield span
+        finally:
+            cls._close(span)
+
+    @classmethod
+    def traced(cls, fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with cls.span(fn.__qualname__):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    @classmethod
+    def peak_rss(cls) -> int:
+        try:
+            import resource
+        except ImportError:
+            return None
+
+        # Linux reports kilobytes, macOS bytes.
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (
+            1 if sys.platform == 'darwin' else 1024
+        )
+
+    @classmethod
+    def _open(cls, name: str, args: Dict[str, Any]) -> Span:
+        stack: List[Span] = cls._stack()
+        # Spans opened by worker threads hang under the command.
+        span: Span = Span(name, stack[-1] if stack else cls._root, args)
+
+        stack.append(span)
+        with cls._lock:
+            cls._spans.append(span)
+
+        return span
+
+    @classmethod
+    def _close(cls, span: Span) -> None:
+        span.close()
+
+        if (stack := cls._stack()) and stack[-1] is span:
+            stack.pop()
+
+    @classmethod
+    def _stack(cls) -> List[Span]:
+        if not hasattr(cls._local, 'stack'):
+            cls._local.stack = []
+
+        return cls._local.stack
+
+    @classmethod
+    def _write(cls, path: Path) -> None:
+        import json
+
+        origin: int = cls._spans[0].start
+        path.write_text(
+            json.dumps(
+                {
+                    'displayTimeUnit': 'ms',
+                    'traceEvents': [
+                        {
+                            'name': span.name,
+                            'ph': 'X',
+                            'pid': os.getpid(),
+                            'tid': span.tid,
+                            'ts': (span.start - origin) / 1e3,
+                            'dur': (span.wall or 0) * 1e6,
+                            'args': {
+                                **span.args,
+                                'cpu_s': span.cpu,
+                                'peak_rss': span.rss,
+                                'exit_code': span.exit_code,
+                            },
+                        }
+                        for span in cls._spans
+                    ],
+                },
+                indent=1,
+                default=str,
+            ),
+            encoding='utf-8',
+        )
+
+    @classmethod
+    def _summary(cls, out: TextIO) -> None:
+        rows: List[List[str]] = [['span', 'wall', 'cpu', 'peak rss', 'exit']]
+
+        for span in sorted(cls._spans, key=lambda _: _.start):
+            name: str = '  ' * span.depth + span.name
+            rows.append(
+                [
+                    name if len(name) <= 60 else name[:57] + '...',
+                    f'{span.wall:.3f}s' if span.wall is not None else '-',
+                    f'{span.cpu:.3f}s' if span.cpu is not None else '-',
+                    f'{span.rss / (1 << 20):.1f} MiB' if span.rss else '-',
+                    '-' if span.exit_code is None else str(span.exit_code),
+                ]
+            )
+
+        widths: List[int] = [
+            max(len(row[i]) for row in rows) for i in range(5)
+        ]
+        for row in rows:
+            out.write(
+                '  '.join(
+                    [row[0].ljust(widths[0])]
+                    + [
+                        cell.rjust(width)
+                        for cell, width in zip(row[1:], widths[1:])
+                    ]
+                )
+                + '\n'
+            )
@@ -1,12 +1,14 @@
 from __future__ import annotations
 
+import os
 import re
-import sys
 import random
+import shutil
 import string
 from pathlib import Path
-from typing import List, TextIO, Tuple
+from typing import Dict, List, TextIO, Tuple
 
+from pipa.envfile import EnvFile
 from pipa.settings import Settings, System
 from pipa.shell import ProcessExecError, Shell
 
@@ -15,14 +17,19 @@ class Virtualenv:
     _NOTERR: List[str] = [
         'WARNING: You are using pip version',  # Raised by the pip command
         'The generated requirements file may be rejected by pip install',  # Raised by pip-tools when trying to lock unsafe dependencies
+        'WARNING: --strip-extras is becoming the default',  # Raised by pip-tools >= 7 on every compile
+        '[notice]',  # Raised by pip when a new release is available
+        'hint:',  # Raised by git
     ]
+    _NOTERR_PATTERN: re.Pattern = re.compile(
+        '|'.join([re.escape(_) for _ in _NOTERR]), re.IGNORECASE
+    )
     _ENV_FILE: Path = Path('.env')
+    _WINDOWS: bool = Settings.get('core', 'system') == System.WINDOWS
 
     @classmethod
     def _iserr(cls, err: str) -> bool:
-        return not re.match(
-            r'^' + '|'.join([_.lower() for _ in cls._NOTERR]), err.lower()
-        )
+        return not cls._NOTERR_PATTERN.match(err)
 
     @classmethod
     def gen_hash(cls, k: int = 8) -> str:
@@ -33,17 +40,103 @@ class Virtualenv:
     @classmethod
     def _get_activate_cmd(cls) -> str:
         return (
-            f'{Settings.get("venv", "home")}\\Scripts\\activate.ps1'
-            if Settings.get('core', 'system') == System.WINDOWS
-            else f'source {Settings.get("venv", "home")}/bin/activate'
+            f'{cls._home()}\\Scripts\\activate.ps1'
+            if cls._WINDOWS
+            else f'source {cls._home()}/bin/activate'
         )
 
     @classmethod
-    def deploy(cls) -> None:
+    def deploy(cls, home: Path = None) -> None:
         sh: Shell = Shell(stdout=Shell.PIPE.SUBPROC)
-        sh.write_process(f'python -m venv {str(Settings.get("venv", "home"))}')
+        sh.write_args('python', '-m', 'venv', cls._home(home))
         sh.run()
 
+    @classmethod
+    def relocate(cls, old: Path, home: Path = None) -> None:
+        home = cls._home(home)
+
+        for path in [*cls.bin_dir(home).iterdir(), home / 'pyvenv.cfg']:
+            if path.is_symlink() or not path.is_file():
+                continue
+            if str(old).encode() not in (content := path.read_bytes()):
+                continue
+
+            # Never write through a hardlink shared with another venv.
+            mode: int = path.stat().st_mode
+            path.unlink()
+            path.write_bytes(
+                content.replace(str(old).encode(), str(home).encode())
+            )
+            path.chmod(mode)
+
+    @classmethod
+    def _home(cls, home: Path = None) -> Path:
+        return Path(home or Settings.get('venv', 'home'))
+
+    @classmethod
+    def bin_dir(cls, home: Path = None) -> Path:
+        return cls._home(home) / ('Scripts' if cls._WINDOWS else 'bin')
+
+    @classmethod
+    def python(cls, home: Path = None) -> Path:
+        return cls.bin_dir(home) / ('python.exe' if cls._WINDOWS else 'python')
+
+    @classmethod
+    def environ(
+        cls, home: Path = None, with_env: bool = False
+    ) -> Dict[str, str]:
+        env: Dict[str, str] = dict(os.environ)
+        env.pop('PYTHONHOME', None)
+        env['VIRTUAL_ENV'] = str(cls._home(home))
+        env['PATH'] = os.pathsep.join(
+            [str(cls.bin_dir(home))]
+            + ([env['PATH']] if env.get('PATH') else [])
+        )
+
+        if with_env and cls._ENV_FILE.exists():
+            env.update(
+                EnvFile.load(
+                    cls._ENV_FILE, encoding=Settings.get('core', 'encoding')
+                )
+            )
+
+        return env
+
+    @classmethod
+    def site_packages(cls, home: Path = None) -> Path:
+        home = cls._home(home)
+
+        if cls._WINDOWS:
+            return home / 'Lib' / 'site-packages'
+
+        return next(home.glob('lib/python*/site-packages'), None)
+
+    @classmethod
+    def python_version(cls, home: Path = None) -> str:
+        cfg: Path = cls._home(home) / 'pyvenv.cfg'
+
+        if cfg.exists():
+            for line in cfg.read_text(encoding='utf-8').split('\n'):
+                key, _, val = line.partition('=')
+                if key.strip() in ('version', 'version_info'):
+                    return val.strip()
+
+        return None
+
+    @classmethod
+    def marker_env(cls) -> Dict[str, str]:
+        if not (version := cls.python_version()):
+            return {}
+
+        return {
+            'python_version': '.'.join(version.split('.')[:2]),
+            'python_full_version': version,
+        }
+
+    @classmethod
+    def which(cls, exe: str, env: Dict[str, str] = None) -> str:
+        return shutil.which(exe, path=(env or cls.environ())['PATH']) or exe
+
     @classmethod
     def runs(
         cls, *cmds: Tuple, quiet: bool = False, with_env: bool = False
@@ -64,13 +157,35 @@ class Virtualenv:
         )
         sh.write_process('deactivate')
 
+        return cls._run_shell(sh)
+
+    @classmethod
+    def exec(
+        cls,
+        *args: Tuple,
+        quiet: bool = False,
+        with_env: bool = False,
+        home: Path = None,
+    ) -> Virtualenv:
+        env: Dict[str, str] = cls.environ(home, with_env=with_env)
+        stdout: TextIO = Shell.PIPE.SUBPROC if quiet else Shell.PIPE.SYSOUT
+        sh: Shell = Shell(stdout=stdout, env=env)
+        sh.write_args(cls.which(args[0], env=env), *args[1:])
+
+        return cls._run_shell(sh)
+
+    @classmethod
+    def pip(
+        cls, *args: Tuple, quiet: bool = False, home: Path = None
+    ) -> Virtualenv:
+        return cls.exec('python', '-m', 'pip', *args, quiet=quiet, home=home)
+
+    @classmethod
+    def _run_shell(cls, sh: Shell) -> Virtualenv:
         try:
-            sh.run()
+            sh.run(is_err=cls._iserr)
         except ProcessExecError as e:
-            if cls._iserr(e.__str__()):
-                raise VirtualenvError(e)
-            if not quiet:
-                sys.stdout.write(e.__str__())
+            raise VirtualenvError(e)
 
         return cls
 
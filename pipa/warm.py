@@ -0,0 +1,234 @@
+# Runs inside the project venv, so it must only depend on the stdlib.
+import io
+import os
+import sys
+import json
+import runpy
+import select
+import signal
+import socket
+import struct
+import argparse
+import importlib
+import traceback
+from typing import Any, Dict, List, Tuple
+
+
+class WarmServer:
+    SOCKET_FILE: str = 'pipa-warm.sock'
+    RESTART_CODE: int = 75
+    _HEADER: struct.Struct = struct.Struct('!I')
+    _POLL: float = 1.0
+
+    def __init__(self, path: str, watch: List[str], preload: List[str]):
+        self.path: str = path
+        self.watch: List[str] = watch
+        self.preload: List[str] = preload
+        self._stamps: List[Tuple] = self._stat()
+        self._children: Dict[int, socket.socket] = {}
+
+    @classmethod
+    def request(cls, sock: socket.socket, spec: Dict[str, Any]) -> None:
+        payload: bytes = json.dumps(spec).encode('utf-8')
+
+        socket.send_fds(
+            sock, [cls._HEADER.pack(len(payload)) + payload], [0, 1, 2]
+        )
+
+    def serve(self) -> int:
+        for module in self.preload:
+            try:
+                importlib.import_module(module)
+            except Exception as e:
+                sys.stderr.write(f'Could not preload {module}: {e}\n')
+
+        listener: socket.socket = self._listen()
+        # Exiting children wake the loop up so clients get their code now.
+        self._wakeup: Tuple[int, int] = os.pipe()
+        os.set_blocking(self._wakeup[1], False)
+        signal.set_wakeup_fd(self._wakeup[1])
+        signal.signal(signal.SIGCHLD, lambda *_: None)
+        signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        sys.stdout.write(f'Warm server ready on {self.path}\n')
+        sys.stdout.flush()
+
+        try:
+            while True:
+                ready: List = select.select(
+                    [listener, self._wakeup[0]], [], [], self._POLL
+                )[0]
+                if self._wakeup[0] in ready:
+                    os.read(self._wakeup[0], 1 << 10)
+                if listener in ready:
+                    self._accept(listener)
+
+                self._reap()
+                if self._stat() != self._stamps:
+                    sys.stdout.write('Project changed, restarting...\n')
+                    return self.RESTART_CODE
+        except KeyboardInterrupt:
+            return 0
+        finally:
+            listener.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+
+    def _listen(self) -> socket.socket:
+        if os.path.exists(self.path):
+            probe: socket.socket = socket.socket(socket.AF_UNIX)
+            try:
+                probe.connect(self.path)
+            except OSError:
+                # A previous server died without cleaning up.
+                os.unlink(self.path)
+            else:
+                raise OSError(f'A warm server already listens on {self.path}')
+            finally:
+                probe.close()
+
+        listener: socket.socket = socket.socket(socket.AF_UNIX)
+        listener.bind(self.path)
+        os.chmod(self.path, 0o600)
+        listener.listen()
+
+        return listener
+
+    def _accept(self, listener: socket.socket) -> None:
+        conn, _ = listener.accept()
+
+        try:
+            spec, fds = self._receive(conn)
+        except (OSError, ValueError):
+            return conn.close()
+
+        sys.stdout.flush()
+        sys.stderr.flush()
+
+        if not (pid := os.fork()):
+            listener.close()
+            for other in self._children.values():
+                other.close()
+            signal.set_wakeup_fd(-1)
+            for fd in self._wakeup:
+                os.close(fd)
+            self._run(spec, fds)
+
+        for fd in fds:
+            os.close(fd)
+
+        conn.sendall(f'pid {pid}\n'.encode())
+        self._children[pid] = conn
+
+    def _receive(
+        self, conn: socket.socket
+    ) -> Tuple[Dict[str, Any], List[int]]:
+        data, fds, _, _ = socket.recv_fds(conn, 1 << 16, 3)
+
+        if len(fds) != 3 or len(data) < self._HEADER.size:
+            for fd in fds:
+                os.close(fd)
+            raise ValueError('Malformed request.')
+
+        (size,) = self._HEADER.unpack(data[: self._HEADER.size])
+        data = data[self._HEADER.size :]
+        while len(data) < size:
+            if not (chunk := conn.recv(size - len(data))):
+                raise ValueError('Truncated request.')
+            data += chunk
+
+        return json.loads(data.decode('utf-8')), fds
+
+    def _reap(self) -> None:
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+
+            if conn := self._children.pop(pid, None):
+                try:
+                    conn.sendall(
+                        f'exit {os.waitstatus_to_exitcode(status)}\n'.encode()
+                    )
+                except OSError:
+                    pass
+                conn.close()
+
+    def _run(self, spec: Dict[str, Any], fds: List[int]) -> None:
+        code: int = 0
+
+        try:
+            for target, fd in enumerate(fds):
+                os.dup2(fd, target)
+                os.close(fd)
+
+            signal.signal(signal.SIGINT, signal.default_int_handler)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+            sys.stdin = io.open(0, 'r', closefd=False)
+            sys.stdout = io.open(
+                1, 'w', buffering=1 if os.isatty(1) else -1, closefd=False
+            )
+            sys.stderr = io.open(2, 'w', buffering=1, closefd=False)
+            os.chdir(spec['cwd'])
+            os.environ.clear()
+            os.environ.update(spec['env'])
+            sys.argv = spec['argv']
+            sys.path[0] = spec['path']
+
+            if spec['mode'] == 'module':
+                runpy.run_module(
+                    spec['target'], run_name='__main__', alter_sys=True
+                )
+            elif spec['mode'] == 'code':
+                exec(
+                    compile(spec['target'], '<string>', 'exec'),
+                    {'__name__': '__main__'},
+                )
+            else:
+                runpy.run_path(spec['target'], run_name='__main__')
+        except SystemExit as e:
+            if e.code is None or isinstance(e.code, int):
+                code = e.code or 0
+            else:
+                sys.stderr.write(f'{e.code}\n')
+                code = 1
+        except KeyboardInterrupt:
+            code = 128 + signal.SIGINT
+        except BaseException as e:
+            # Hide the server frame, like a cold interpreter would.
+            traceback.print_exception(type(e), e, e.__traceback__.tb_next)
+            code = 1
+        finally:
+            try:
+                sys.stdout.flush()
+                sys.stderr.flush()
+            finally:
+                os._exit(int(code or 0))
+
+    def _stat(self) -> List[Tuple]:
+        stamps: List[Tuple] = []
+
+        for path in self.watch:
+            try:
+                st: os.stat_result = os.stat(path)
+                stamps.append((path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                stamps.append((path, None, None))
+
+        return stamps
+
+
+if __name__ == '__main__':
+    # Never let the pipa package directory shadow the project modules.
+    sys.path[0] = os.getcwd()
+
+    parser: argparse.ArgumentParser = argparse.ArgumentParser()
+    parser.add_argument('--socket', required=True)
+    parser.add_argument('--watch', action='append', default=[])
+    parser.add_argument('--preload', action='append', default=[])
+    args: argparse.Namespace = parser.parse_args()
+
+    sys.exit(WarmServer(args.socket, args.watch, args.preload).serve())
@@ -0,0 +1,205 @@
+from __future__ import annotations
+import os
+import csv
+import stat
+import base64
+import shutil
+import hashlib
+import zipfile
+import configparser
+from typing import Callable, Dict, FrozenSet, List, Tuple
+from pathlib import Path
+from packaging.tags import Tag
+from packaging.utils import canonicalize_name, parse_wheel_filename
+from pipa.hashes import Hasher
+
+
+class Wheel:
+    _CHUNK: int = 1 << 20
+
+    def __init__(self, path: Path):
+        self.path: Path = path
+        name, version, _, tags = parse_wheel_filename(path.name)
+        self.name: str = canonicalize_name(name)
+        self.version: str = str(version)
+        self.tags: FrozenSet[Tag] = tags
+
+    def digest(self, cache: bool = False) -> str:
+        return Hasher.digest(self.path, cache=cache)
+
+    def unpack(self, dest: Path) -> None:
+        with zipfile.ZipFile(self.path) as zf:
+            for info in zf.infolist():
+                target: Path = dest / info.filename
+
+                if dest.resolve() not in target.resolve().parents:
+                    raise WheelError(
+                        f'Unsafe path in {self.path.name}: {info.filename}'
+                    )
+                if info.is_dir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    continue
+
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with zf.open(info) as src, target.open('wb') as dst:
+                    shutil.copyfileobj(src, dst, self._CHUNK)
+
+                if (info.external_attr >> 16) & stat.S_IXUSR:
+                    target.chmod(0o755)
+
+
+class WheelInstaller:
+    INSTALLER: str = 'pipa'
+
+    def __init__(
+        self,
+        site_packages: Path,
+        bin_dir: Path,
+        python: Path,
+        link: Callable[[Path, Path], None] = shutil.copy2,
+    ):
+        self._site_packages: Path = site_packages
+        self._bin_dir: Path = bin_dir
+        self._python: Path = python
+        self._link: Callable[[Path, Path], None] = link
+
+    def install(self, tree: Path) -> Path:
+        dist_info: Path = next(tree.glob('*.dist-info'), None)
+
+        if not dist_info:
+            raise WheelError(f'No .dist-info directory found in {tree}.')
+
+        data_dir: str = dist_info.name[: -len('.dist-info')] + '.data'
+        records: Dict[str, Tuple[str, str]] = self._read_record(dist_info)
+        installed: List[List[str]] = []
+
+        for src in sorted(tree.rglob('*')):
+            if src.is_dir():
+                continue
+
+            rel: str = src.relative_to(tree).as_posix()
+
+            if rel in (
+                f'{dist_info.name}/RECORD',
+                f'{dist_info.name}/INSTALLER',
+            ):
+                continue
+
+            dest: Path = self._destination(rel, data_dir)
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if dest.exists() or dest.is_symlink():
+                dest.unlink()
+
+            if rel.startswith(f'{data_dir}/scripts/'):
+                self._write_script(src, dest)
+                installed.append(self._record_row(dest))
+            else:
+                self._link(src, dest)
+                installed.append(
+                    [self._relpath(dest), *records.get(rel, ('', ''))]
+                )
+
+        target: Path = self._site_packages / dist_info.name
+
+        for dest in self._write_entry_points(target):
+            installed.append(self._record_row(dest))
+
+        (target / 'INSTALLER').write_text(f'{self.INSTALLER}\n')
+        installed.append(self._record_row(target / 'INSTALLER'))
+        installed.append([self._relpath(target / 'RECORD'), '', ''])
+
+        with (target / 'RECORD').open('w', newline='') as fh:
+            csv.writer(fh).writerows(installed)
+
+        return target
+
+    def _destination(self, rel: str, data_dir: str) -> Path:
+        if not rel.startswith(f'{data_dir}/'):
+            return self._site_packages / rel
+
+        scheme, _, path = rel[len(data_dir) + 1 :].partition('/')
+
+        if scheme in ('purelib', 'platlib'):
+            return self._site_packages / path
+        if scheme == 'scripts':
+            return self._bin_dir / path
+        if scheme == 'headers':
+            return self._bin_dir.parent / 'include' / 'site' / path
+        if scheme == 'data':
+            return self._bin_dir.parent / path
+
+        raise WheelError(f'Unknown wheel data scheme: {scheme}')
+
+    def _write_script(self, src: Path, dest: Path) -> None:
+        content: bytes = src.read_bytes()
+
+        if content.startswith(b'#!python'):
+            content = b'\n'.join(
+                [f'#!{self._python}'.encode(), *content.split(b'\n', 1)[1:]]
+            )
+
+        dest.write_bytes(content)
+        dest.chmod(0o755)
+
+    def _write_entry_points(self, dist_info: Path) -> List[Path]:
+        scripts: List[Path] = []
+
+        if not (entry_points := dist_info / 'entry_points.txt').exists():
+            return scripts
+
+        parser: configparser.ConfigParser = configparser.ConfigParser(
+            delimiters=('=',), interpolation=None
+        )
+        parser.optionxform = str
+        parser.read(entry_points, encoding='utf-8')
+
+        for section in ('console_scripts', 'gui_scripts'):
+            if not parser.has_section(section):
+                continue
+
+            for name, ref in parser.items(section):
+                module, _, attr = ref.split('[')[0].strip().partition(':')
+                dest: Path = self._bin_dir / name
+                if dest.exists() or dest.is_symlink():
+                    dest.unlink()
+
+                dest.write_text(
+                    f'#!{self._python}\n'
+                    f'# -*- coding: utf-8 -*-\n'
+                    f'import re\n'
+                    f'import sys\n'
+                    f'from {module} import {attr.split(".")[0]}\n'
+                    f'if __name__ == \'__main__\':\n'
+                    f'    sys.argv[0] = re.sub(r\'(-script\\.pyw|\\.exe)?$\', '
+                    f'\'\', sys.argv[0])\n'
+                    f'    sys.exit({attr}())\n',
+                    encoding='utf-8',
+                )
+                dest.chmod(0o755)
+                scripts.append(dest)
+
+        return scripts
+
+    def _read_record(self, dist_info: Path) -> Dict[str, Tuple[str, str]]:
+        if not (record := dist_info / 'RECORD').exists():
+            return {}
+
+        with record.open(newline='', encoding='utf-8') as fh:
+            return {row[0]: (row[1], row[2]) for row in csv.reader(fh) if row}
+
+    def _record_row(self, path: Path) -> List[str]:
+        content: bytes = path.read_bytes()
+        digest: str = (
+            base64.urlsafe_b64encode(hashlib.sha256(content).digest())
+            .rstrip(b'=')
+            .decode()
+        )
+
+        return [self._relpath(path), f'sha256={digest}', str(len(content))]
+
+    def _relpath(self, path: Path) -> str:
+        return Path(os.path.relpath(path, self._site_packages)).as_posix()
+
+
+class WheelError(Exception):
+    pass
@@ -0,0 +1,244 @@
+from __future__ import annotations
+import os
+import json
+import tempfile
+from typing import Any, Dict, List, Tuple
+from pathlib import Path
+from packaging.version import InvalidVersion, Version
+from pipa.hashes import Hasher, VerifyReport
+from pipa.lockcache import LockCache
+from pipa.lockfile import LockEntry, Lockfile
+from pipa.settings import Settings
+from pipa.virtualenv import Virtualenv
+from pipa.wheel import Wheel
+
+
+class WheelhouseReport:
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self.fetched: List[str] = []
+        self.built: List[str] = []
+        self.reused: List[str] = []
+
+
+class Wheelhouse:
+    MANIFEST_FILE: str = 'wheelhouse.json'
+    INDEX: str = 'index'
+    BUILT: str = 'built'
+
+    def __init__(self, path: Path = None):
+        self.path: Path = Path(path or Settings.get('wheelhouse', 'home'))
+        self.manifest: Dict[str, Any] = {'lock': None, 'wheels': {}}
+
+        try:
+            self.manifest = json.loads(
+                self._manifest_path.read_text(encoding='utf-8')
+            )
+        except (OSError, ValueError):
+            # Nothing is trusted from an unreadable manifest, the wheels
+            # are checked and recorded again by the next build.
+            pass
+
+    @property
+    def _manifest_path(self) -> Path:
+        return self.path / self.MANIFEST_FILE
+
+    def build(
+        self,
+        lock: Lockfile,
+        find_links: List[Path] = (),
+        quiet: bool = True,
+    ) -> WheelhouseReport:
+        report: WheelhouseReport = WheelhouseReport(self.path)
+        entries: Dict[str, LockEntry] = lock.applicable(
+            Virtualenv.marker_env()
+        )
+        wheels: Dict[str, Dict[str, str]] = self.manifest['wheels']
+
+        self.path.mkdir(parents=True, exist_ok=True)
+        report.reused = [
+            name
+            for name, entry in entries.items()
+            if name in wheels and self._matches(entry, wheels[name])
+        ]
+
+        if missing := [name for name in entries if name not in report.reused]:
+            # pip checks the locked hashes of what it downloads, sdists
+            # included, before building them into wheels.
+            self._pip(
+                'wheel',
+                '--no-deps',
+                '-w',
+                self.path,
+                *(
+                    ['--no-index', *self._links(find_links)]
+                    if find_links
+                    else []
+                ),
+                lock=lock,
+                names=missing,
+                quiet=quiet,
+            )
+
+            built: Dict[Path, Wheel] = {}
+
+            for path in self.path.glob('*.whl'):
+                wheel: Wheel = Wheel(path)
+                if wheel.name in missing and self._same_version(
+                    wheel.version, entries[wheel.name].version
+                ):
+                    built[path] = wheel
+
+            for path, digest in Hasher.digests(list(built)).items():
+                wheel: Wheel = built[path]
+                source: str = (
+                    self.INDEX
+                    if f'sha256:{digest}' in entries[wheel.name].hashes
+                    else self.BUILT
+                )
+                (
+                    report.fetched if source == self.INDEX else report.built
+                ).append(wheel.name)
+                wheels[wheel.name] = {
+                    'filename': path.name,
+                    'version': wheel.version,
+                    'sha256': digest,
+                    'source': source,
+                }
+
+        # Wheels of versions that are no longer locked are dropped.
+        for name in [_ for _ in wheels if _ not in entries]:
+            wheels.pop(name)
+        for path in self.path.glob('*.whl'):
+            if path.name not in [_['filename'] for _ in wheels.values()]:
+                path.unlink()
+
+        self.manifest['lock'] = LockCache.digest(lock.path)
+        self._save()
+
+        return report
+
+    def install(
+        self, lock: Lockfile, names: List[str], quiet: bool = True
+    ) -> None:
+        entries: Dict[str, LockEntry] = {
+            name: lock.entries[name] for name in names
+        }
+        hashes: Dict[str, str] = self.verify(entries)
+
+        self._pip(
+            'install',
+            '--no-index',
+            *self._links([self.path]),
+            '--no-deps',
+            '--force-reinstall',
+            '--require-hashes',
+            requirements=[
+                f'{name}=={entries[name].version} --hash=sha256:{digest}'
+                for name, digest in hashes.items()
+            ],
+            quiet=quiet,
+        )
+
+    def verify(self, entries: Dict[str, LockEntry]) -> Dict[str, str]:
+        report, hashes = self.check(entries)
+
+        if missing := [
+            name
+            for name, result in report.results.items()
+            if result == VerifyReport.MISSING
+        ]:
+            raise WheelhouseError(
+                f'Missing from the wheelhouse {self.path}: '
+                f'{", ".join(missing)}. Run: pipa wheelhouse build'
+            )
+        if report.failed:
+            raise WheelhouseError(
+                'Hash mismatch in the wheelhouse for: '
+                f'{", ".join(report.failed)}'
+            )
+
+        return hashes
+
+    def check(
+        self, entries: Dict[str, LockEntry]
+    ) -> Tuple[VerifyReport, Dict[str, str]]:
+        wheels: Dict[str, Dict[str, str]] = self.manifest['wheels']
+        report: VerifyReport = VerifyReport()
+        paths: Dict[str, Path] = {}
+        hashes: Dict[str, str] = {}
+
+        for name, entry in entries.items():
+            if (
+                name not in wheels
+                or not self._matches(entry, wheels[name])
+                or not (self.path / wheels[name]['filename']).exists()
+            ):
+                report.results[name] = VerifyReport.MISSING
+            else:
+                paths[name] = self.path / wheels[name]['filename']
+
+        digests: Dict[Path, str] = Hasher.digests(list(paths.values()))
+
+        for name, path in paths.items():
+            digest: str = digests[path]
+
+            if digest != wheels[name]['sha256'] or (
+                wheels[name]['source'] == self.INDEX
+                and f'sha256:{digest}' not in entries[name].hashes
+            ):
+                report.results[name] = VerifyReport.MISMATCH
+            else:
+                report.results[name] = VerifyReport.OK
+                hashes[name] = digest
+
+        return report, hashes
+
+    def _matches(self, entry: LockEntry, wheel: Dict[str, str]) -> bool:
+        return self._same_version(wheel['version'], entry.version) and (
+            wheel['source'] == self.BUILT
+            or f'sha256:{wheel["sha256"]}' in entry.hashes
+        )
+
+    def _same_version(self, version: str, locked: str) -> bool:
+        try:
+            return Version(version) == Version(locked)
+        except (InvalidVersion, TypeError):
+            return version == locked
+
+    def _links(self, paths: List[Path]) -> List[str]:
+        return [
+            arg for path in paths for arg in ('--find-links', path.resolve())
+        ]
+
+    def _pip(
+        self,
+        *args: Tuple,
+        lock: Lockfile = None,
+        names: List[str] = (),
+        requirements: List[str] = (),
+        quiet: bool = True,
+    ) -> None:
+        fd, path = tempfile.mkstemp(suffix='.txt', prefix='pipa-wheelhouse-')
+
+        try:
+            with os.fdopen(
+                fd, 'w', encoding=Settings.get('core', 'encoding')
+            ) as fh:
+                fh.write(
+                    lock.render(*names) if lock else '\n'.join(requirements)
+                )
+
+            Virtualenv.pip(*args, '-r', path, quiet=quiet)
+        finally:
+            os.remove(path)
+
+    def _save(self) -> None:
+        Settings.atomic_write(
+            self._manifest_path,
+            json.dumps(self.manifest, indent=2, sort_keys=True),
+        )
+
+
+class WheelhouseError(Exception):
+    pass
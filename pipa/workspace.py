@@ -0,0 +1,155 @@
+from __future__ import annotations
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Tuple
+from pathlib import Path
+from pipa.mutex import ProjectLock
+from pipa.packager import Packager
+from pipa.settings import Settings
+
+
+class ProjectReport:
+    def __init__(self, path: Path):
+        self.path: Path = path
+        self.timings: Dict[str, float] = {}
+        self.shared: bool = False
+        self.error: str = None
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+
+class Workspace:
+    ACTIONS: Tuple[str] = ('install', 'lock', 'sync')
+    _SKIP: Tuple[str] = ('node_modules', '__pycache__')
+    # Same lock flags as `pipa lock`, so caches are shared with it.
+    _LOCK_FLAGS: Dict[str, bool] = {'with_hashes': True, 'allow_unsafe': False}
+
+    def __init__(self, root: Path, jobs: int = None):
+        self.root: Path = root.resolve()
+        self.jobs: int = jobs or os.cpu_count()
+        self.reports: Dict[Path, ProjectReport] = {
+            path: ProjectReport(path) for path in self.discover(self.root)
+        }
+
+    @classmethod
+    def discover(cls, root: Path) -> List[Path]:
+        projects: List[Path] = []
+
+        for path, dirs, files in os.walk(root):
+            if Settings.FILE.name in files:
+                projects.append(Path(path))
+
+            dirs[:] = sorted(
+                _
+                for _ in dirs
+                if _[0] != '.'
+                and _ not in cls._SKIP
+                and not (Path(path) / _ / 'pyvenv.cfg').exists()
+            )
+
+        return projects
+
+    def run(self, action: str) -> List[ProjectReport]:
+        # Projects are bound to the working directory, each one runs in
+        # a worker process that moves to it.
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            if action == 'install':
+                self._phase(
+                    pool,
+                    'install',
+                    [
+                        path
+                        for path in self.reports
+                        if not (
+                            path / Packager.REQUIREMENTS_LOCK_FILE
+                        ).exists()
+                    ],
+                    'req_install',
+                )
+            if action in ('install', 'lock'):
+                self._lock(pool)
+            if action in ('install', 'sync'):
+                self._phase(pool, 'sync', list(self.reports), 'sync')
+
+        return list(self.reports.values())
+
+    def _lock(self, pool: Executor) -> None:
+        groups: Dict[Tuple[str, str], List[Path]] = {}
+
+        for path, (key, digest, hit) in self._phase(
+            pool, 'lock', list(self.reports), 'lock_state', **self._LOCK_FLAGS
+        ).items():
+            if not hit:
+                groups.setdefault((key, digest), []).append(path)
+
+        # Identical inputs resolve to identical locks: resolve them once
+        # and hand the result over to the other projects of the group.
+        leaders: Dict[Path, bool] = self._phase(
+            pool,
+            'lock',
+            [paths[0] for paths in groups.values()],
+            'lock',
+            upgrade=False,
+            quiet=True,
+            **self._LOCK_FLAGS,
+        )
+        for paths in groups.values():
+            if paths[0] not in leaders:
+                continue
+
+            for path in paths[1:]:
+                self.reports[path].shared = True
+            self._phase(
+                pool,
+                'lock',
+                paths[1:],
+                'adopt_lock',
+                paths[0],
+                **self._LOCK_FLAGS,
+            )
+
+    def _phase(
+        self,
+        pool: Executor,
+        name: str,
+        paths: List[Path],
+        task: str,
+        *args: Tuple,
+        **kwargs: Dict[str, Any],
+    ) -> Dict[Path, Any]:
+        results: Dict[Path, Any] = {}
+        futures: Dict[Any, Path] = {
+            pool.submit(self._in_project, path, task, *args, **kwargs): path
+            for path in paths
+            if not self.reports[path].error
+        }
+
+        for future in as_completed(futures):
+            report: ProjectReport = self.reports[futures[future]]
+
+            try:
+                results[report.path], elapsed = future.result()
+            except Exception as e:
+                report.error = f'{name}: {e}'
+                continue
+
+            report.timings[name] = report.timings.get(name, 0) + elapsed
+
+        return results
+
+    @classmethod
+    def _in_project(
+        cls, path: Path, task: str, *args: Tuple, **kwargs: Dict[str, Any]
+    ) -> Tuple[Any, float]:
+        os.chdir(path)
+
+        # A `pipa install` running in the project at the same time is
+        # waited for, not raced with.
+        with ProjectLock().held():
+            start: float = time.perf_counter()
+            result: Any = getattr(Packager, task)(*args, **kwargs)
+
+        return result, time.perf_counter() - start
@@ -0,0 +1,112 @@
+import sys
+import base64
+import hashlib
+import zipfile
+import subprocess
+import pytest
+from typing import Callable, Dict, List
+from pathlib import Path
+from pipa.hashes import Hasher
+from pipa.settings import Settings
+
+
+@pytest.fixture
+def project(tmp_path: Path, monkeypatch) -> Path:
+    # Every cache and home under the test directory, nothing shared.
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(Hasher, '_cache', None)
+    Settings.init(
+        {
+            'project': {'name': 'demo'},
+            'venv': {'home': str(tmp_path / 'venv')},
+            'store': {'home': str(tmp_path / 'store')},
+            'snapshot': {'home': str(tmp_path / 'snapshots')},
+            'hashes': {'cache': str(tmp_path / 'hashes.json')},
+            'envs': {'home': str(tmp_path / 'envs')},
+            'template': {'cache': str(tmp_path / 'templates')},
+        }
+    )
+
+    return tmp_path
+
+
+@pytest.fixture
+def venv(project: Path) -> Path:
+    # The interpreter's own pip, through the system site-packages.
+    subprocess.run(
+        [
+            sys.executable,
+            '-m',
+            'venv',
+            '--system-site-packages',
+            '--without-pip',
+            str(project / 'venv'),
+        ],
+        check=True,
+    )
+
+    return project / 'venv'
+
+
+@pytest.fixture
+def make_wheel() -> Callable[..., Path]:
+    def make(
+        dest: Path,
+        name: str,
+        version: str,
+        files: Dict[str, str],
+        entry_points: str = None,
+    ) -> Path:
+        dist_info: str = f'{name}-{version}.dist-info'
+        members: Dict[str, str] = {
+            **files,
+            f'{dist_info}/METADATA': (
+                f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n'
+            ),
+            f'{dist_info}/WHEEL': (
+                'Wheel-Version: 1.0\nGenerator: tests\n'
+                'Root-Is-Purelib: true\nTag: py3-none-any\n'
+            ),
+        }
+        if entry_points:
+            members[f'{dist_info}/entry_points.txt'] = entry_points
+
+        record: List[str] = []
+        for rel, content in members.items():
+            digest: str = (
+                base64.urlsafe_b64encode(
+                    hashlib.sha256(content.encode()).digest()
+                )
+                .rstrip(b'=')
+                .decode()
+            )
+            record.append(f'{rel},sha256={digest},{len(content.encode())}')
+        record.append(f'{dist_info}/RECORD,,')
+
+        dest.mkdir(parents=True, exist_ok=True)
+        path: Path = dest / f'{name}-{version}-py3-none-any.whl'
+        with zipfile.ZipFile(path, 'w') as zf:
+            for rel, content in members.items():
+                zf.writestr(rel, content)
+            zf.writestr(f'{dist_info}/RECORD', '\n'.join(record) + '\n')
+
+        return path
+
+    return make
+
+
+@pytest.fixture
+def make_dist() -> Callable[..., Path]:
+    def make(
+        site_packages: Path, name: str, version: str, requires: List[str] = ()
+    ) -> Path:
+        path: Path = site_packages / f'{name}-{version}.dist-info'
+        path.mkdir(parents=True)
+        (path / 'METADATA').write_text(
+            f'Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n'
+            + ''.join(f'Requires-Dist: {_}\n' for _ in requires)
+        )
+
+        return path
+
+    return make
@@ -0,0 +1,68 @@
+import csv
+import base64
+import hashlib
+import zipfile
+from typing import Dict, List
+from pathlib import Path
+from benchmarks.index import LocalIndex
+from pipa.virtualenv import Virtualenv
+
+
+def test_index_installs_offline(venv: Path, monkeypatch):
+    monkeypatch.setattr(LocalIndex, 'REAL', [])
+    index: Path = LocalIndex.build(venv.parent / 'index', 3)
+
+    Virtualenv.pip(
+        'install',
+        '--no-index',
+        '--find-links',
+        index,
+        LocalIndex.name(0),
+        quiet=True,
+    )
+
+    assert sorted(
+        _.name
+        for _ in Virtualenv.site_packages().glob('*.dist-info')
+        if _.name.startswith('bench')
+    ) == [
+        # Every other package pulls the next one.
+        'bench_pkg_000-1.0.0.dist-info',
+        'bench_pkg_001-1.0.0.dist-info',
+    ]
+
+
+def test_repack(tmp_path: Path):
+    path: Path = LocalIndex.repack(tmp_path, 'packaging')
+
+    with zipfile.ZipFile(path) as zf:
+        record: str = next(
+            _ for _ in zf.namelist() if _.endswith('.dist-info/RECORD')
+        )
+        rows: List[List[str]] = list(
+            csv.reader(zf.read(record).decode().splitlines())
+        )
+        files: Dict[str, bytes] = {
+            _: zf.read(_) for _ in zf.namelist() if _ != record
+        }
+
+    assert sorted(row[0] for row in rows) == sorted([*files, record])
+    for name, digest, size in rows:
+        if name != record:
+            assert (
+                digest
+                == 'sha256='
+                + base64.urlsafe_b64encode(
+                    hashlib.sha256(files[name]).digest()
+                )
+                .rstrip(b'=')
+                .decode()
+            )
+            assert size == str(len(files[name]))
+    assert not any('__pycache__' in _ for _ in files)
+
+
+def test_closure():
+    assert {'pip-tools', 'click', 'build', 'pip'} <= set(
+        LocalIndex.closure(['pip-tools'])
+    )
@@ -0,0 +1,128 @@
+import sys
+import json
+import importlib.util
+import subprocess
+import pytest
+from pathlib import Path
+from pipa.bytecode import Bytecode
+from pipa.compiler import Compiler
+
+
+@pytest.fixture
+def root(tmp_path: Path) -> Path:
+    for rel in (
+        'app/__main__.py',
+        'libs/app.py',
+        'tests/test_app.py',
+        'app/test_cli.py',
+        '.hidden/skip.py',
+        'venv/lib/site.py',
+        'README.md',
+    ):
+        (tmp_path / rel).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / rel).write_text('VALUE = 1\n')
+    (tmp_path / 'venv' / 'pyvenv.cfg').write_text('home = /usr/bin\n')
+
+    return tmp_path
+
+
+def flags(source: Path) -> int:
+    header: bytes = Path(importlib.util.cache_from_source(source)).read_bytes()
+
+    return int.from_bytes(header[4:8], 'little')
+
+
+def test_project_sources(root: Path):
+    assert [
+        Path(_).relative_to(root).as_posix()
+        for _ in Bytecode('timestamp').sources(str(root), project=True)
+    ] == ['app/__main__.py', 'libs/app.py']
+    # Outside of a project, like site-packages, tests are compiled too.
+    assert len(list(Bytecode('timestamp').sources(str(root)))) == 4
+
+
+@pytest.mark.parametrize(
+    'mode, expected',
+    [('timestamp', 0b00), ('checked-hash', 0b11), ('unchecked-hash', 0b01)],
+)
+def test_invalidation_flags(root: Path, mode: str, expected: int):
+    result: dict = Bytecode(mode, jobs=1).compile([], projects=[str(root)])
+
+    assert result['checked'] == result['compiled'] == 2
+    assert flags(root / 'libs' / 'app.py') == expected
+    assert Bytecode(mode).valid(str(root / 'libs' / 'app.py'))
+    # Valid bytecode is left alone.
+    assert Bytecode(mode).compile([], projects=[str(root)])['compiled'] == 0
+
+
+def test_other_mode_is_rewritten(root: Path):
+    Bytecode('timestamp').compile([], projects=[str(root)])
+
+    assert not Bytecode('checked-hash').valid(str(root / 'libs' / 'app.py'))
+    assert (
+        Bytecode('checked-hash').compile([], projects=[str(root)])['compiled']
+        == 2
+    )
+
+
+def test_stale_sources_are_recompiled(root: Path):
+    Bytecode('checked-hash').compile([], projects=[str(root)])
+    (root / 'libs' / 'app.py').write_text('VALUE = 2\n')
+
+    assert not Bytecode('checked-hash').valid(str(root / 'libs' / 'app.py'))
+
+
+def test_broken_sources_are_reported(root: Path):
+    (root / 'libs' / 'broken.py').write_text('def (:\n')
+    result: dict = Bytecode('timestamp', jobs=1).compile(
+        [], projects=[str(root)]
+    )
+
+    assert result['failed'] == [str(root / 'libs' / 'broken.py')]
+    assert result['compiled'] == 2
+
+
+def test_script(root: Path):
+    process: subprocess.CompletedProcess = subprocess.run(
+        [
+            sys.executable,
+            '-I',
+            sys.modules[Bytecode.__module__].__file__,
+            '--invalidation',
+            'unchecked-hash',
+            '--project',
+            str(root),
+        ],
+        capture_output=True,
+        check=True,
+    )
+
+    assert json.loads(process.stdout)['compiled'] == 2
+    assert flags(root / 'app' / '__main__.py') == 0b01
+
+
+def test_compiler_command(project: Path, venv: Path, monkeypatch):
+    calls: list = []
+
+    def run(cmd: list, **kwargs) -> subprocess.CompletedProcess:
+        calls.append(cmd)
+        return subprocess.CompletedProcess(
+            cmd,
+            0,
+            json.dumps(
+                {'checked': 0, 'compiled': 0, 'failed': [], 'elapsed': 0}
+            ).encode(),
+            b'',
+        )
+
+    for rel in ('app/__main__.py', 'libs/app.py'):
+        (project / rel).parent.mkdir(exist_ok=True)
+        (project / rel).write_text('')
+    monkeypatch.setattr(subprocess, 'run', run)
+    Compiler.compile(measure=False)
+
+    # Isolated, so that pipa's own modules never shadow the stdlib ones,
+    # and with the project walked by the worker rather than listed.
+    assert calls[0][1:3] == ['-I', sys.modules[Bytecode.__module__].__file__]
+    assert calls[0][-3:-1] == ['--project', str(project.resolve())]
+    assert not [_ for _ in calls[0] if _.endswith('.py')][1:]
@@ -0,0 +1,116 @@
+import pytest
+from typing import Dict, List, Set, Tuple
+from pipa.coalesce import InstallQueue, Outcome, Request
+from pipa.packager import Packager
+
+
+class FakePackager:
+    def __init__(self, registered: Set[str] = (), broken: Set[str] = ()):
+        self.registered: Set[str] = set(registered)
+        self.broken: Set[str] = set(broken)
+        self.calls: List[Tuple] = []
+
+    def install(self, *pkgs: Tuple, is_dev: bool = False, quiet: bool = True):
+        self.calls.append(('install', pkgs, is_dev))
+        self.registered |= set(pkgs) - self.broken
+
+        return [_ for _ in pkgs if _ in self.broken]
+
+    def uninstall(self, *pkgs: Tuple, quiet: bool = True):
+        self.calls.append(('uninstall', pkgs))
+        self.registered -= set(pkgs)
+
+        return []
+
+    def unregistered(self, *pkgs: Tuple):
+        return [_ for _ in pkgs if _ not in self.registered]
+
+    def lock(self, *pkgs: Tuple, **kwargs):
+        self.calls.append(('lock', pkgs))
+
+
+@pytest.fixture
+def packager(monkeypatch) -> FakePackager:
+    fake: FakePackager = FakePackager()
+
+    for name in ('install', 'uninstall', 'unregistered', 'lock'):
+        monkeypatch.setattr(Packager, name, getattr(fake, name))
+
+    return fake
+
+
+def process(*requests: Request) -> Dict[str, Outcome]:
+    return InstallQueue._process(list(requests))
+
+
+def test_consecutive_requests_share_one_call(packager: FakePackager):
+    outcomes: Dict[str, Outcome] = process(
+        Request('install', ['rich'], id='1'),
+        Request('install', ['click', 'rich'], id='2'),
+        Request('install', ['pytest'], dev=True, id='3'),
+        Request('install', ['black'], dev=True, id='4'),
+    )
+
+    assert packager.calls == [
+        ('install', ('rich', 'click'), False),
+        ('install', ('pytest', 'black'), True),
+        ('lock', ('rich', 'click', 'pytest', 'black')),
+    ]
+    assert all(_.batch == 4 and _.locked for _ in outcomes.values())
+
+
+def test_failed_packages_are_reported_per_request(packager: FakePackager):
+    packager.broken = {'broken'}
+    outcomes: Dict[str, Outcome] = process(
+        Request('install', ['broken'], id='1'),
+        Request('install', ['rich', 'broken'], id='2'),
+    )
+
+    assert outcomes['1'].failed == ['broken']
+    assert not outcomes['1'].locked
+    assert outcomes['2'].failed == ['broken']
+    assert outcomes['2'].locked
+    assert packager.calls[-1] == ('lock', ('rich',))
+
+
+def test_remove_sees_earlier_installs(packager: FakePackager):
+    outcomes: Dict[str, Outcome] = process(
+        Request('install', ['rich'], id='1'),
+        Request('remove', ['rich'], id='2'),
+        Request('remove', ['missing'], id='3'),
+    )
+
+    assert outcomes['2'].error is None
+    assert outcomes['3'].error == (
+        'Package: missing not found in requirements files.'
+    )
+    assert packager.calls[:2] == [
+        ('install', ('rich',), False),
+        ('uninstall', ('rich',)),
+    ]
+
+
+def test_remove_before_install_fails(packager: FakePackager):
+    outcomes: Dict[str, Outcome] = process(
+        Request('remove', ['rich'], id='1'),
+        Request('install', ['rich'], id='2'),
+    )
+
+    assert outcomes['1'].error
+    assert outcomes['2'].locked
+    assert ('uninstall', ('rich',)) not in packager.calls
+
+
+def test_errors_stay_in_their_group(packager: FakePackager, monkeypatch):
+    def uninstall(*pkgs: Tuple, quiet: bool = True):
+        raise RuntimeError('pip failed')
+
+    packager.registered = {'click'}
+    monkeypatch.setattr(Packager, 'uninstall', uninstall)
+    outcomes: Dict[str, Outcome] = process(
+        Request('remove', ['click'], id='1'),
+        Request('install', ['rich'], id='2'),
+    )
+
+    assert outcomes['1'].error == 'pip failed'
+    assert outcomes['2'].error is None and outcomes['2'].locked
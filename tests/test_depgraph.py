@@ -0,0 +1,94 @@
+import pytest
+from typing import Callable
+from pathlib import Path
+from pipa.depgraph import DependencyGraph
+from pipa.virtualenv import Virtualenv
+
+
+@pytest.fixture
+def graph() -> DependencyGraph:
+    # app -> web -> http <- cli, web <-> plugins, app -> pip
+    return DependencyGraph(
+        {
+            'app': '1.0',
+            'web': '2.0',
+            'http': '3.0',
+            'cli': '1.0',
+            'plugins': '1.0',
+            'pip': '24.0',
+        },
+        {
+            'app': ['pip', 'web'],
+            'web': ['http', 'plugins'],
+            'http': [],
+            'cli': ['http'],
+            'plugins': ['web'],
+            'pip': [],
+        },
+    )
+
+
+def test_orphans(graph: DependencyGraph):
+    assert graph.orphans(['app']) == {'app', 'web', 'plugins'}
+    assert graph.orphans(['app', 'cli']) == {
+        'app',
+        'cli',
+        'web',
+        'plugins',
+        'http',
+    }
+    assert graph.orphans(['app'], keep=['plugins']) == {'app'}
+    assert graph.orphans(['pip', 'unknown']) == {'pip'}
+
+
+def test_roots_and_tree(graph: DependencyGraph):
+    assert graph.roots() == ['app', 'cli']
+    assert graph.tree(graph.roots()) == [
+        'app 1.0',
+        '  pip 24.0',
+        '  web 2.0',
+        '    http 3.0',
+        '    plugins 1.0',
+        'cli 1.0',
+        '  http 3.0',
+    ]
+
+
+def test_why(graph: DependencyGraph):
+    assert graph.why('http') == [
+        ['app', 'web', 'http'],
+        ['cli', 'http'],
+        ['plugins', 'web', 'http'],
+    ]
+    assert graph.why('app') == [['app']]
+    assert graph.why('unknown') == []
+
+
+def test_scan_follows_extras(tmp_path: Path, make_dist: Callable):
+    make_dist(tmp_path, 'app', '1.0', ['Web[async]>=2'])
+    make_dist(
+        tmp_path,
+        'web',
+        '2.0',
+        ['http', 'aio; extra == "async"', 'docs; extra == "docs"'],
+    )
+    make_dist(tmp_path, 'http', '3.0')
+    make_dist(tmp_path, 'aio', '1.0')
+    make_dist(tmp_path, 'docs', '1.0')
+
+    graph: DependencyGraph = DependencyGraph.scan(tmp_path)
+
+    assert graph.requires['web'] == ['aio', 'http']
+    assert graph.roots() == ['app', 'docs']
+
+
+def test_load_is_cached(venv: Path, make_dist: Callable, monkeypatch):
+    make_dist(Virtualenv.site_packages(), 'app', '1.0')
+    assert DependencyGraph.load().versions['app'] == '1.0'
+
+    with monkeypatch.context() as patch:
+        patch.setattr(DependencyGraph, 'scan', None)
+        assert DependencyGraph.load().versions == {'app': '1.0'}
+
+    make_dist(Virtualenv.site_packages(), 'web', '2.0')
+    assert sorted(DependencyGraph.load().versions) == ['app', 'web']
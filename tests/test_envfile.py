@@ -0,0 +1,44 @@
+from typing import Dict
+from pathlib import Path
+from pipa.envfile import EnvFile
+from pipa.virtualenv import Virtualenv
+
+ENV: str = '''# Local settings
+export A=1
+B = two words  # trailing comment
+URL=http://host/#anchor
+C='single $A \\'quoted\\'' # comment
+D="line\\nnext ${A} ${HOME_DIR} ${MISSING:-fallback} \\$A"
+EMPTY=
+FLAG
+WIN=crlf\r
+'''
+
+
+def test_parse(monkeypatch):
+    monkeypatch.setenv('HOME_DIR', '/home/me')
+
+    assert EnvFile.parse(ENV) == {
+        'A': '1',
+        'B': 'two words',
+        'URL': 'http://host/#anchor',
+        'C': 'single $A \'quoted\'',
+        'D': 'line\nnext 1 /home/me fallback $A',
+        'EMPTY': '',
+        'WIN': 'crlf',
+    }
+
+
+def test_environ(project: Path, monkeypatch):
+    monkeypatch.setenv('PYTHONHOME', '/elsewhere')
+    monkeypatch.setenv('A', 'outer')
+    (project / '.env').write_text('A=inner\nB=${A}\n')
+
+    env: Dict[str, str] = Virtualenv.environ()
+    assert 'PYTHONHOME' not in env
+    assert env['VIRTUAL_ENV'] == str(project / 'venv')
+    assert env['PATH'].startswith(f'{project / "venv" / "bin"}:')
+    assert env['A'] == 'outer'
+
+    env = Virtualenv.environ(with_env=True)
+    assert (env['A'], env['B']) == ('inner', 'inner')
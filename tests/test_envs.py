@@ -0,0 +1,93 @@
+import os
+import time
+import pytest
+from typing import Dict
+from pathlib import Path
+from pipa.envs import EnvPool, EnvPoolError, GcReport
+
+
+@pytest.fixture
+def envs(project: Path) -> Dict[str, Path]:
+    # Most recently used first.
+    paths: Dict[str, Path] = {}
+
+    for age, name in enumerate(['new', 'mid', 'used', 'old']):
+        home: Path = EnvPool.home() / name
+        home.mkdir(parents=True)
+        EnvPool._mark(home, name)
+        (home / 'lib.so').write_bytes(os.urandom(1 << 16))
+        os.utime(home / EnvPool.MARKER, (0, time.time() - 86400 * age))
+        paths[name] = home
+
+    # A project still pointing at the environment keeps it.
+    (root := project / 'other').mkdir()
+    (root / '.pipa.toml').write_text(f'[venv]\nhome = "{paths["used"]}"\n')
+    (paths['used'] / EnvPool.REFS_DIR).mkdir()
+    (paths['used'] / EnvPool.REFS_DIR / 'other').write_text(str(root))
+
+    return paths
+
+
+def test_gc(envs: Dict[str, Path]):
+    size: int = EnvPool._size(envs['old'])
+    used: int = EnvPool._size(envs['used'])
+    report: GcReport = EnvPool.gc(budget=size + used)
+
+    assert report.evicted == [(envs['old'], size), (envs['mid'], size)]
+    assert report.in_use == [envs['used']]
+    assert report.size == size + used
+    assert sorted(_.name for _ in EnvPool.home().iterdir()) == [
+        '.pipa-envs.lock',
+        'new',
+        'used',
+    ]
+
+
+def test_gc_dry_run(envs: Dict[str, Path]):
+    report: GcReport = EnvPool.gc(budget=0, dry_run=True)
+
+    assert [path for path, _ in report.evicted] == [
+        envs['old'],
+        envs['mid'],
+        envs['new'],
+    ]
+    assert report.size == EnvPool._size(envs['used'])
+    assert all(_.exists() for _ in envs.values())
+
+
+def test_gc_keeps_envs_under_construction(envs: Dict[str, Path]):
+    (envs['old'] / EnvPool.MARKER).unlink()
+
+    assert EnvPool.gc(budget=0).in_use == [envs['used'], envs['old']]
+
+    # Refs of projects that moved to another environment are dropped.
+    (envs['used'] / EnvPool.REFS_DIR / 'other').write_text('/nonexistent')
+    assert not EnvPool.in_use(envs['used'])
+    assert not any((envs['used'] / EnvPool.REFS_DIR).iterdir())
+
+
+def test_size_counts_hardlinks_once(envs: Dict[str, Path]):
+    size: int = EnvPool._size(envs['new'])
+    os.link(envs['new'] / 'lib.so', envs['new'] / 'copy.so')
+
+    assert EnvPool._size(envs['new']) == size
+
+
+@pytest.mark.parametrize(
+    'size, expected',
+    [
+        ('10GiB', 10 << 30),
+        ('1.5 m', 3 << 19),
+        ('512', 512),
+        (' 2 KiB ', 2048),
+        (4096, 4096),
+    ],
+)
+def test_parse_size(size: str, expected: int):
+    assert EnvPool.parse_size(size) == expected
+
+
+@pytest.mark.parametrize('size', ['', 'GiB', '10 parsecs', '-1G'])
+def test_parse_invalid_size(size: str):
+    with pytest.raises(EnvPoolError, match='Invalid size'):
+        EnvPool.parse_size(size)
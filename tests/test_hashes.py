@@ -0,0 +1,90 @@
+import os
+import json
+import hashlib
+from typing import Callable, Dict, List
+from pathlib import Path
+from packaging.requirements import Requirement
+from pipa.hashes import Hasher, VerifyReport
+from pipa.lockfile import LockEntry
+
+
+def sha256(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+
+def entry(name: str, *contents: bytes) -> LockEntry:
+    return LockEntry(
+        Requirement(f'{name}==1.0'),
+        {f'sha256:{sha256(_)}' for _ in contents},
+        f'{name}==1.0',
+    )
+
+
+def test_digest_is_cached(project: Path, monkeypatch):
+    path: Path = project / 'a.whl'
+    path.write_bytes(b'one')
+    hashed: List[Path] = []
+    digest: Callable = Hasher._sha256
+
+    def spy(path: Path) -> str:
+        hashed.append(path)
+        return digest(path)
+
+    monkeypatch.setattr(Hasher, '_sha256', spy)
+
+    assert Hasher.digest(path) == sha256(b'one')
+    assert Hasher.digest(path) == sha256(b'one')
+    assert hashed == [path]
+
+    # Same size, newer mtime.
+    path.write_bytes(b'two')
+    os.utime(path, ns=(0, path.stat().st_mtime_ns + 1))
+    assert Hasher.digest(path) == sha256(b'two')
+    assert Hasher.digest(path, cache=False) == sha256(b'two')
+    assert len(hashed) == 3
+
+
+def test_flush(project: Path):
+    cache: Path = project / 'hashes.json'
+    paths: List[Path] = [project / 'a.whl', project / 'b.whl']
+    for path in paths:
+        path.write_bytes(path.name.encode())
+    # Hashed by another process meanwhile, and a file that is gone.
+    cache.write_text(
+        json.dumps(
+            {
+                str(project / 'c.whl'): [1, 1, 1, 'c'],
+                str(project / 'gone.whl'): [1, 1, 1, 'gone'],
+            }
+        )
+    )
+    (project / 'c.whl').write_bytes(b'c')
+    Hasher._cache = {}
+
+    Hasher.digests(paths)
+
+    assert sorted(json.loads(cache.read_text())) == sorted(
+        str(_) for _ in [*paths, project / 'c.whl']
+    )
+
+
+def test_verify(project: Path):
+    artifacts: Path = project / 'wheelhouse'
+    artifacts.mkdir()
+    (artifacts / 'alpha-1.0-py3-none-any.whl').write_bytes(b'alpha')
+    (artifacts / 'beta-1.0.tar.gz').write_bytes(b'tampered')
+    (artifacts / 'README').write_bytes(b'')
+    entries: Dict[str, LockEntry] = {
+        'alpha': entry('alpha', b'alpha', b'other'),
+        'beta': entry('beta', b'beta'),
+        'gamma': entry('gamma', b'gamma'),
+    }
+
+    report: VerifyReport = Hasher.verify(entries, artifacts)
+
+    assert report.results == {
+        'alpha': VerifyReport.OK,
+        'beta': VerifyReport.MISMATCH,
+        'gamma': VerifyReport.MISSING,
+    }
+    assert report.failed == ['beta', 'gamma']
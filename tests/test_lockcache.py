@@ -0,0 +1,69 @@
+from typing import Dict
+from pathlib import Path
+from pipa.lockcache import LockCache
+
+
+def inputs(project: Path, prod: str, dev: str = '') -> Dict[str, str]:
+    (project / 'requirements.txt').write_text(prod)
+    (project / 'requirements-dev.txt').write_text(dev)
+
+    return LockCache.normalize(
+        project / 'requirements.txt', project / 'requirements-dev.txt'
+    )
+
+
+def test_normalize(project: Path):
+    assert inputs(
+        project,
+        '# web\nRequests[socks,security] >=2, <3  # pinned later\n',
+        '-r requirements.txt\nrequests; python_version >= "3.8"\n',
+    ) == {
+        'requests': (
+            'requests[security,socks]<3,>=2'
+            ' & requests; python_version >= "3.8"'
+        ),
+        '-r requirements.txt': '-r requirements.txt',
+    }
+
+
+def test_key_ignores_order_and_comments(project: Path):
+    cache: LockCache = LockCache(project / 'cache.json')
+    key: str = cache.key(inputs(project, 'b==1\na==1\n'), True)
+
+    assert cache.key(inputs(project, '# deps\na == 1\nb==1\n'), True) == key
+    assert cache.key(inputs(project, 'a==1\nb==2\n'), True) != key
+    assert cache.key(inputs(project, 'a==1\nb==1\n'), False) != key
+
+
+def test_hit(project: Path):
+    lock: Path = project / 'requirements.lock'
+    dev_lock: Path = project / 'requirements-dev.lock'
+    lock.write_text('a==1\n')
+    LockCache(project / 'cache.json').save('key', {}, lock, dev_lock)
+
+    cache: LockCache = LockCache(project / 'cache.json')
+    assert cache.hit('key', lock, dev_lock)
+    assert not cache.hit('other', lock, dev_lock)
+
+    dev_lock.write_text('b==1\n')
+    assert not cache.hit('key', lock, dev_lock)
+
+    dev_lock.unlink()
+    lock.write_text('a==2\n')
+    assert not cache.hit('key', lock, dev_lock)
+
+
+def test_changed(project: Path):
+    cache: LockCache = LockCache(project / 'cache.json')
+    cache.save('key', inputs(project, 'a==1\nb>=1\nc\n'))
+
+    assert LockCache(project / 'cache.json').changed(
+        inputs(project, 'a==1\nb>=2\nc[x]\nd\n')
+    ) == ['b', 'c']
+
+
+def test_missing_cache(project: Path):
+    cache: LockCache = LockCache(project / 'cache.json')
+
+    assert not cache.hit('key', project / 'requirements.lock')
+    assert cache.changed({'a': 'a==1'}) == []
@@ -0,0 +1,71 @@
+from pathlib import Path
+from pipa.lockfile import Lockfile
+
+LOCK: str = '''--index-url https://pypi.org/simple
+
+certifi==2024.2.2 \\
+    --hash=sha256:aaaa
+    # via requests
+click==8.1.7
+    # via
+    #   -r {root}/requirements.txt
+    #   black
+black==24.2.0
+    # via -r {root}/requirements-dev.txt
+mypy-extensions==1.0.0
+    # via black
+requests==2.31.0
+    # via -r {root}/requirements.txt (line 2)
+'''
+
+
+def lock(root: Path) -> Lockfile:
+    path: Path = root / 'requirements.lock'
+    path.write_text(LOCK.format(root=root))
+
+    return Lockfile(path)
+
+
+def test_parse(tmp_path: Path):
+    lockfile: Lockfile = lock(tmp_path)
+
+    assert lockfile.options == ['--index-url https://pypi.org/simple']
+    assert lockfile.entries['certifi'].hashes == {'sha256:aaaa'}
+    assert lockfile.entries['certifi'].version == '2024.2.2'
+    assert lockfile.entries['click'].via == [
+        f'-r {tmp_path}/requirements.txt',
+        'black',
+    ]
+
+
+def test_reached_from_follows_pins(tmp_path: Path):
+    lockfile: Lockfile = lock(tmp_path)
+
+    assert lockfile.reached_from(tmp_path / 'requirements.txt') == {
+        'certifi',
+        'click',
+        'requests',
+    }
+    assert lockfile.reached_from(tmp_path / 'requirements-dev.txt') == {
+        'black',
+        'click',
+        'mypy-extensions',
+    }
+
+
+def test_reached_from_relative_source(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    lockfile: Lockfile = lock(tmp_path)
+
+    assert 'requests' in lockfile.reached_from(Path('requirements.txt'))
+    assert not lockfile.reached_from(Path('other.txt'))
+
+
+def test_save_keeps_blocks(tmp_path: Path):
+    lockfile: Lockfile = lock(tmp_path)
+    lockfile.save(tmp_path / 'requirements-dev.lock', ['black'])
+    saved: Lockfile = Lockfile(tmp_path / 'requirements-dev.lock')
+
+    assert list(saved.entries) == ['black']
+    assert saved.options == lockfile.options
+    assert saved.entries['black'].via == lockfile.entries['black'].via
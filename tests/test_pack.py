@@ -0,0 +1,123 @@
+import os
+import json
+import hashlib
+import zipfile
+import pytest
+from typing import Any, Dict, List
+from pathlib import Path
+from pipa.pack import Pack, PackError
+
+BASE: str = '/usr/local/bin'
+
+
+def archive(
+    path: Path, entries: List[List[Any]], files: Dict[str, bytes]
+) -> Path:
+    with zipfile.ZipFile(path, 'w') as zf:
+        for rel, content in files.items():
+            zf.writestr(rel, content)
+        zf.writestr(Pack.MANIFEST_FILE, json.dumps({'entries': entries}))
+
+    return path
+
+
+def file(rel: str, content: bytes, mode: int = 0o644) -> List[Any]:
+    return [
+        rel,
+        'file',
+        hashlib.sha256(content).hexdigest(),
+        len(content),
+        mode,
+        1_600_000_000_123_456_789,
+    ]
+
+
+def link(rel: str, target: str) -> List[Any]:
+    return [rel, 'link', target, 0, 0o777, 0]
+
+
+def extract(
+    tmp_path: Path, entries: List[List[Any]], files: Dict[str, bytes]
+) -> Path:
+    home: Path = tmp_path / 'venv'
+    home.mkdir()
+    files = {'pyvenv.cfg': f'home = {BASE}\n'.encode(), **files}
+    entries = [file('pyvenv.cfg', files['pyvenv.cfg']), *entries]
+
+    Pack._extract(
+        archive(tmp_path / 'venv.zip', entries, files), home, entries
+    )
+
+    return home
+
+
+def test_extract(tmp_path: Path):
+    home: Path = extract(
+        tmp_path,
+        [
+            file('bin/tool', b'#!/bin/sh\n', 0o755),
+            link('bin/python', f'{BASE}/python3.11'),
+            link('bin/python3', 'python'),
+            link('lib64', 'lib'),
+            file('lib/site.py', b'x = 1\n'),
+            ['share/empty', 'dir', None, 0, 0o755, 0],
+        ],
+        {'bin/tool': b'#!/bin/sh\n', 'lib/site.py': b'x = 1\n'},
+    )
+
+    assert (home / 'bin' / 'tool').stat().st_mode & 0o777 == 0o755
+    assert (home / 'bin' / 'tool').stat().st_mtime_ns == (
+        1_600_000_000_123_456_789
+    )
+    assert os.readlink(home / 'bin' / 'python') == f'{BASE}/python3.11'
+    assert (home / 'lib64' / 'site.py').read_bytes() == b'x = 1\n'
+    assert (home / 'share' / 'empty').is_dir()
+
+
+@pytest.mark.parametrize(
+    'rel', ['/etc/passwd', '../outside', 'lib/../../outside', '/']
+)
+def test_unsafe_paths(tmp_path: Path, rel: str):
+    with pytest.raises(PackError, match='Unsafe path'):
+        extract(tmp_path, [file(rel, b'')], {rel: b''})
+
+
+def test_duplicate_paths(tmp_path: Path):
+    with pytest.raises(PackError, match='Duplicate path'):
+        extract(
+            tmp_path,
+            [file('lib/a.py', b''), link('lib//a.py', '/etc/passwd')],
+            {'lib/a.py': b''},
+        )
+
+
+@pytest.mark.parametrize(
+    'rel, target',
+    [
+        ('lib/escape', '../../outside'),
+        ('lib/escape', '/etc'),
+        ('lib/python', f'{BASE}/python3.11'),
+        ('bin/python', '/usr/bin/python3'),
+    ],
+)
+def test_links_outside_home(tmp_path: Path, rel: str, target: str):
+    with pytest.raises(PackError, match='Unsafe link'):
+        extract(tmp_path, [link(rel, target)], {})
+    assert not (tmp_path / 'venv' / rel).is_symlink()
+
+
+def test_link_over_a_parent(tmp_path: Path):
+    # A file below a link would be written wherever the link points.
+    with pytest.raises(PackError, match='Unsafe link'):
+        extract(
+            tmp_path,
+            [link('lib', 'share'), file('lib/a.py', b'')],
+            {'lib/a.py': b''},
+        )
+
+
+def test_corrupted_files(tmp_path: Path):
+    entry: List[Any] = file('lib/a.py', b'x = 1\n')
+
+    with pytest.raises(PackError, match='1 files do not match'):
+        extract(tmp_path, [entry], {'lib/a.py': b'x = 2\n'})
@@ -0,0 +1,51 @@
+import pytest
+from typing import Any, Callable, Dict, List, Tuple
+from pathlib import Path
+from pipa.packager import Packager
+from pipa.virtualenv import Virtualenv
+
+
+@pytest.fixture
+def pip_calls(
+    venv: Path, make_wheel: Callable, monkeypatch
+) -> List[Tuple[str, ...]]:
+    for name in ('alpha', 'beta'):
+        make_wheel(venv.parent / 'links', name, '1.0', {f'{name}.py': ''})
+    monkeypatch.setenv('PIP_NO_INDEX', '1')
+    monkeypatch.setenv('PIP_FIND_LINKS', str(venv.parent / 'links'))
+
+    calls: List[Tuple[str, ...]] = []
+    pip: Callable = Virtualenv.pip
+
+    def spy(*args: Tuple, **kwargs: Dict[str, Any]) -> Virtualenv:
+        calls.append(args)
+        return pip(*args, **kwargs)
+
+    monkeypatch.setattr(Virtualenv, 'pip', spy)
+
+    return calls
+
+
+def test_install_in_one_call(project: Path, pip_calls: List[Tuple]):
+    assert Packager.install('alpha', 'beta==1.0', 'alpha', quiet=True) == []
+
+    assert pip_calls == [('install', '--upgrade', 'alpha', 'beta==1.0')]
+    assert (project / 'requirements.txt').read_text().split() == [
+        'alpha',
+        'beta==1.0',
+    ]
+    assert (Virtualenv.site_packages() / 'beta.py').exists()
+
+
+def test_failed_batch_is_retried(project: Path, pip_calls: List[Tuple]):
+    assert Packager.install('alpha', 'missing', is_dev=True, quiet=True) == [
+        'missing'
+    ]
+
+    assert pip_calls == [
+        ('install', '--upgrade', 'alpha', 'missing'),
+        ('install', '--upgrade', 'alpha'),
+        ('install', '--upgrade', 'missing'),
+    ]
+    assert (project / 'requirements-dev.txt').read_text().split() == ['alpha']
+    assert not (project / 'requirements.txt').exists()
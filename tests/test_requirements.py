@@ -0,0 +1,64 @@
+from pathlib import Path
+from pipa.requirements import RequirementLine, RequirementsFile
+
+
+def test_names_are_normalized(tmp_path: Path):
+    path: Path = tmp_path / 'requirements.txt'
+    path.write_text('Django_Rest.Framework>=3\nrequests[socks]==2.31.0\n')
+    req_file: RequirementsFile = RequirementsFile(path)
+
+    assert list(req_file.index) == ['django-rest-framework', 'requests']
+    assert req_file.find('django-rest_framework') is req_file.lines[0]
+    assert req_file.find('REQUESTS==1.0') is req_file.lines[1]
+
+
+def test_comments_are_ignored_and_kept(tmp_path: Path):
+    path: Path = tmp_path / 'requirements.txt'
+    path.write_text(
+        '# Tools\n'
+        'rich==13.7.0  # pretty output\n'
+        '\n'
+        '-r requirements-base.txt\n'
+        'https://example.com/pkg#egg=pkg\n'
+    )
+    req_file: RequirementsFile = RequirementsFile(path)
+
+    assert [_.name for _ in req_file.lines] == [None, 'rich', None, None, None]
+    assert str(req_file.lines[1].req) == 'rich==13.7.0'
+    assert req_file.lines[1].comment == '  # pretty output'
+
+    req_file.lines[1].update('rich==13.8.0')
+    assert req_file.lines[1].text == 'rich==13.8.0  # pretty output'
+
+
+def test_continuations_make_one_line(tmp_path: Path):
+    path: Path = tmp_path / 'requirements.txt'
+    path.write_text(
+        'click==8.1.7 \\\n'
+        '    --hash=sha256:aaaa \\\n'
+        '    --hash=sha256:bbbb\n'
+        'toml\n'
+    )
+    req_file: RequirementsFile = RequirementsFile(path)
+
+    assert len(req_file.lines) == 2
+    assert str(req_file.find('click').req) == 'click==8.1.7'
+    assert req_file.find('click').text.count('\n') == 2
+
+
+def test_add_keeps_constraints_and_remove_normalizes(tmp_path: Path):
+    path: Path = tmp_path / 'requirements.txt'
+    path.write_text('Rich>=13\n')
+    req_file: RequirementsFile = RequirementsFile(path)
+
+    assert req_file.add('rich', 'toml') == ['toml']
+    assert str(req_file.find('rich').req) == 'Rich>=13'
+    assert req_file.remove('RICH', 'missing') == ['rich']
+
+    req_file.save()
+    assert path.read_text() == 'toml\n'
+
+
+def test_line_without_requirement():
+    assert RequirementLine('--index-url https://example.com').req is None
+    assert RequirementLine('not a requirement !').name is None
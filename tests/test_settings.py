@@ -0,0 +1,62 @@
+import os
+import pytest
+from typing import Any, Callable, Dict, List
+from pathlib import Path
+from pipa.settings import Settings
+
+
+def test_external_changes_are_reloaded(project: Path):
+    assert Settings.get('project', 'name') == 'demo'
+
+    Settings.FILE.write_text('[project]\nname = "renamed"\n')
+    assert Settings.get('project', 'name') == 'renamed'
+    assert Settings.get('core', 'encoding') == 'utf-8'
+
+
+def test_transaction_writes_once(project: Path, monkeypatch):
+    writes: List[Path] = []
+    write: Callable = Settings._write
+
+    def spy(cls, path: Path, settings: Dict[str, Any]) -> None:
+        writes.append(path)
+        write(path, settings)
+
+    monkeypatch.setattr(Settings, '_write', classmethod(spy))
+
+    with Settings.transaction():
+        Settings.set('store', 'enabled', val=True)
+        with Settings.transaction():
+            Settings.set('store', 'link', val='reflink')
+        # Pending changes win over the file until they are flushed.
+        Settings.FILE.write_text('[project]\nname = "renamed"\n')
+        assert Settings.get('project', 'name') == 'demo'
+        assert not writes
+
+    assert len(writes) == 1
+    assert 'link = "reflink"' in Settings.FILE.read_text()
+    assert Settings.get('store', 'enabled') is True
+
+
+def test_file_mode(project: Path):
+    Settings.FILE.chmod(0o600)
+    Settings.set('project', 'name', val='private')
+
+    assert Settings.FILE.stat().st_mode & 0o777 == 0o600
+    assert Settings.file_mode(project / 'missing') == 0o644 & ~Settings._UMASK
+
+
+def test_atomic_write(project: Path):
+    path: Path = project / 'state.json'
+    Settings.atomic_write(path, '{}')
+    Settings.atomic_write(path, b'[]', mode=0o640)
+
+    assert path.read_bytes() == b'[]'
+    assert path.stat().st_mode & 0o777 == 0o640
+
+    with pytest.raises(RuntimeError):
+        with Settings.atomic_open(path) as fh:
+            fh.write('{"torn": ')
+            raise RuntimeError()
+
+    assert path.read_bytes() == b'[]'
+    assert sorted(os.listdir(project)) == ['.pipa.toml', 'state.json']
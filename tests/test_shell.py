@@ -0,0 +1,66 @@
+import io
+import sys
+import pytest
+from pipa.shell import ProcessExecError, Shell, _Pipe
+
+
+def python(code: str, quiet: bool = True) -> Shell:
+    return (Shell(stdout=Shell.PIPE.SUBPROC) if quiet else Shell()).write_args(
+        sys.executable, '-c', code
+    )
+
+
+def test_large_output_does_not_block():
+    # Far more than a pipe buffer on both streams at once.
+    assert (
+        python(
+            'import sys\n'
+            'for i in range(20000):\n'
+            '    print("x" * 100)\n'
+            '    print("y" * 100, file=sys.stderr)\n'
+        ).run(is_err=lambda _: False)
+        == 0
+    )
+
+
+def test_error_keeps_the_last_lines():
+    with pytest.raises(ProcessExecError) as error:
+        python(
+            'import sys\n'
+            'for i in range(1000):\n'
+            '    print(f"error {i}", file=sys.stderr)\n'
+            'sys.exit(1)\n'
+        ).run()
+
+    assert str(error.value).split('\n') == [
+        f'error {_}' for _ in range(1000 - Shell.CONTEXT, 1000)
+    ]
+
+
+def test_error_falls_back_to_stdout():
+    with pytest.raises(ProcessExecError) as error:
+        python('print("out 1")\nprint("out 2")\nraise SystemExit(3)').run()
+    assert str(error.value) == 'out 1\nout 2'
+
+    with pytest.raises(ProcessExecError, match='exited with code 3'):
+        python('raise SystemExit(3)').run()
+
+
+def test_warnings_are_not_errors(monkeypatch):
+    stdout: io.StringIO = io.StringIO()
+    stderr: io.StringIO = io.StringIO()
+    monkeypatch.setattr(_Pipe, 'SYSOUT', stdout)
+    monkeypatch.setattr(_Pipe, 'SYSERR', stderr)
+
+    with pytest.raises(ProcessExecError) as error:
+        python(
+            'import sys\n'
+            'print("WARNING: old pip", file=sys.stderr)\n'
+            'print("ERROR: no such package", file=sys.stderr)\n'
+            'sys.exit(1)\n',
+            quiet=False,
+        ).run(is_err=lambda _: not _.startswith('WARNING'))
+
+    assert str(error.value) == 'ERROR: no such package'
+    assert stdout.getvalue() == 'WARNING: old pip\n'
+    assert stderr.getvalue() == 'ERROR: no such package\n'
@@ -0,0 +1,70 @@
+import sys
+import subprocess
+import pytest
+from typing import Callable, List
+from pathlib import Path
+from pipa.snapshot import Snapshot
+from pipa.virtualenv import Virtualenv
+
+
+@pytest.fixture
+def pkgs(project: Path, make_wheel: Callable, monkeypatch) -> List[str]:
+    # The interpreter's own pip, as for the venv fixture.
+    monkeypatch.setattr(
+        Virtualenv,
+        'deploy',
+        lambda home: subprocess.run(
+            [
+                sys.executable,
+                '-m',
+                'venv',
+                '--system-site-packages',
+                '--without-pip',
+                str(home),
+            ],
+            check=True,
+        ),
+    )
+    make_wheel(
+        project / 'links', 'tinypkg', '1.0', {'tinypkg.py': 'VALUE = 42\n'}
+    )
+
+    return ['--no-index', f'--find-links={project / "links"}', 'tinypkg']
+
+
+def test_ensure_builds_once(project: Path, pkgs: List[str], monkeypatch):
+    (stale := Snapshot.home() / 'stale').mkdir(parents=True)
+    path: Path = Snapshot.ensure(pkgs)
+
+    assert path == Snapshot.path(pkgs)
+    assert sorted(_.name for _ in Snapshot.home().iterdir()) == [path.name]
+
+    monkeypatch.setattr(Virtualenv, 'deploy', None)
+    assert Snapshot.ensure(pkgs) == path
+    assert not stale.exists()
+
+
+def test_clone(project: Path, pkgs: List[str]):
+    home: Path = project / 'venv'
+    Snapshot.clone(pkgs, home)
+
+    assert (
+        subprocess.run(
+            [
+                Virtualenv.python(home),
+                '-c',
+                'import sys, tinypkg; print(sys.prefix, tinypkg.VALUE)',
+            ],
+            capture_output=True,
+            check=True,
+            text=True,
+        ).stdout
+        == f'{home} 42\n'
+    )
+    # Built in a temporary directory, then moved and cloned.
+    assert (Snapshot.path(pkgs) / '.pipa-snapshot').read_text() not in (
+        Virtualenv.bin_dir(home) / 'activate'
+    ).read_text()
+    assert str(home) in (home / 'pyvenv.cfg').read_text()
+    # Shared with the snapshot, not copied.
+    assert (Virtualenv.site_packages(home) / 'tinypkg.py').stat().st_nlink > 1
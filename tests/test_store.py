@@ -0,0 +1,80 @@
+import sys
+import shutil
+import pytest
+from typing import Callable
+from pathlib import Path
+from pipa.settings import Settings
+from pipa.store import Store, StoreStats
+from pipa.wheel import Wheel, WheelInstaller
+
+
+@pytest.fixture
+def entry(project: Path, make_wheel: Callable) -> Path:
+    return Store.add(
+        Wheel(
+            make_wheel(
+                project / 'links', 'tinypkg', '1.0', {'tinypkg.py': 'X = 1\n'}
+            )
+        )
+    )
+
+
+def install(entry: Path, site_packages: Path) -> None:
+    WheelInstaller(
+        site_packages, site_packages / 'bin', Path(sys.executable), Store.link
+    ).install(entry / 'tree')
+    Store._ref(entry, site_packages)
+
+
+def test_add(project: Path, entry: Path):
+    assert (entry / 'tree' / 'tinypkg.py').read_text() == 'X = 1\n'
+    assert (
+        Store.add(Wheel(project / 'links' / 'tinypkg-1.0-py3-none-any.whl'))
+        == entry
+    )
+    assert not any((project / 'store' / 'tmp').iterdir())
+
+
+def test_hardlinks_are_referenced(project: Path, entry: Path):
+    install(entry, project / 'site-packages')
+    shutil.rmtree(entry / 'refs')
+
+    assert (project / 'site-packages' / 'tinypkg.py').stat().st_nlink == 2
+    assert Store.stats().referenced == 1
+    assert Store.prune().entries == 0
+
+
+def test_copies_are_referenced(project: Path, entry: Path):
+    Settings.set('store', 'link', val='reflink')
+    install(entry, project / 'site-packages')
+    install(entry, project / 'other')
+
+    assert (project / 'site-packages' / 'tinypkg.py').stat().st_nlink == 1
+    assert Store.stats().referenced == 1
+
+    # One environment is enough to keep the entry.
+    shutil.rmtree(project / 'other')
+    assert Store.prune().entries == 0
+    assert entry.exists()
+
+
+@pytest.mark.parametrize('link', ['hardlink', 'reflink'])
+def test_prune(project: Path, entry: Path, link: str):
+    Settings.set('store', 'link', val=link)
+    install(entry, project / 'site-packages')
+    shutil.rmtree(project / 'site-packages')
+
+    stats: StoreStats = Store.prune()
+
+    assert (stats.entries, stats.files) == (1, 4)
+    assert not entry.exists()
+    assert not (project / 'store' / 'objects' / 'tinypkg').exists()
+    assert Store.stats().entries == 0
+
+
+def test_replaced_version_is_pruned(project: Path, entry: Path):
+    Settings.set('store', 'link', val='reflink')
+    install(entry, project / 'site-packages')
+    shutil.rmtree(project / 'site-packages' / 'tinypkg-1.0.dist-info')
+
+    assert Store.prune().entries == 1
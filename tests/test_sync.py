@@ -0,0 +1,91 @@
+import json
+import hashlib
+import pytest
+from typing import Callable
+from pathlib import Path
+from packaging.requirements import Requirement
+from pipa.lockfile import Lockfile
+from pipa.sync import Sync, SyncPlan
+from pipa.virtualenv import Virtualenv
+from pipa.wheelhouse import Wheelhouse
+
+
+@pytest.fixture
+def lock(project: Path, venv: Path, make_wheel: Callable) -> Lockfile:
+    lines: str = ''
+
+    for name in ('alpha', 'beta'):
+        wheel: Path = make_wheel(
+            project / 'links', name, '1.0', {f'{name}.py': ''}
+        )
+        digest: str = hashlib.sha256(wheel.read_bytes()).hexdigest()
+        lines += f'{name}==1.0 \\\n    --hash=sha256:{digest}\n'
+    (project / 'requirements.lock').write_text(lines)
+
+    lock: Lockfile = Lockfile(project / 'requirements.lock')
+    Wheelhouse().build(lock, find_links=[project / 'links'])
+
+    return lock
+
+
+def sync(lock: Lockfile, **kwargs) -> SyncPlan:
+    return Sync.run(lock, wheelhouse=Wheelhouse(), **kwargs)
+
+
+def test_installs_then_nothing_to_do(lock: Lockfile):
+    assert sync(lock).install == ['alpha', 'beta']
+    assert (Virtualenv.site_packages() / 'alpha.py').exists()
+    assert Sync.plan(lock).empty
+
+    record: dict = json.loads(Sync._record_path().read_text())
+    assert record['alpha'] == sorted(lock.entries['alpha'].hashes)
+
+
+def test_extra_distributions_are_removed(lock: Lockfile, make_dist: Callable):
+    site_packages: Path = Virtualenv.site_packages()
+    make_dist(site_packages, 'stray', '1.0')
+    make_dist(site_packages, 'tool', '2.0', requires=['helper'])
+    make_dist(site_packages, 'helper', '1.0')
+
+    plan: SyncPlan = Sync.plan(lock, keep=[Requirement('tool')])
+
+    assert plan.install == ['alpha', 'beta']
+    assert plan.uninstall == ['stray']
+
+
+def test_version_drift(lock: Lockfile):
+    sync(lock)
+    site_packages: Path = Virtualenv.site_packages()
+    (site_packages / 'beta-1.0.dist-info').rename(
+        site_packages / 'beta-0.9.dist-info'
+    )
+
+    assert Sync.plan(lock).install == ['beta']
+
+
+def test_hash_drift(lock: Lockfile):
+    sync(lock)
+    record: dict = json.loads(Sync._record_path().read_text())
+    record['alpha'] = ['sha256:other']
+    Sync._write_record(record)
+
+    assert Sync.plan(lock).install == ['alpha']
+
+
+@pytest.mark.parametrize('damage', ['drop', 'truncate', 'delete'])
+def test_unrecorded_installs_are_not_trusted(lock: Lockfile, damage: str):
+    sync(lock)
+    path: Path = Sync._record_path()
+
+    if damage == 'drop':
+        Sync._write_record({'beta': json.loads(path.read_text())['beta']})
+    elif damage == 'truncate':
+        path.write_text(path.read_text()[:10])
+    else:
+        path.unlink()
+
+    assert Sync.plan(lock).install == (
+        ['alpha'] if damage == 'drop' else ['alpha', 'beta']
+    )
+    sync(lock)
+    assert Sync.plan(lock).empty
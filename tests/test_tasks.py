@@ -0,0 +1,73 @@
+import threading
+import pytest
+from typing import Dict, List
+from pipa.tasks import Task, TaskError, TaskGraph, TaskState
+
+
+def test_runs_in_dependency_order():
+    order: List[str] = []
+    graph: TaskGraph = (
+        TaskGraph()
+        .add('c', lambda: order.append('c'), 'a', 'b')
+        .add('a', lambda: order.append('a') or 1)
+        .add('b', lambda: order.append('b'), 'a')
+    )
+
+    graph.run()
+
+    assert order == ['a', 'b', 'c']
+    assert graph.result('a') == 1
+    assert set(graph.timings) == {'a', 'b', 'c'}
+
+
+def test_cycle_is_detected_before_running():
+    ran: List[str] = []
+    graph: TaskGraph = (
+        TaskGraph()
+        .add('a', lambda: ran.append('a'), 'c')
+        .add('b', lambda: ran.append('b'), 'a')
+        .add('c', lambda: ran.append('c'), 'b')
+    )
+
+    with pytest.raises(TaskError, match='cycle'):
+        graph.run()
+    assert not ran
+
+
+def test_unknown_dependency():
+    with pytest.raises(TaskError, match='Unknown task: b'):
+        TaskGraph().add('a', lambda: None, 'b').run()
+
+
+def test_failure_cancels_pending_tasks():
+    started: threading.Event = threading.Event()
+    release: threading.Event = threading.Event()
+
+    def fail() -> None:
+        started.wait(5)
+        raise ValueError('boom')
+
+    def slow() -> str:
+        started.set()
+        release.wait(5)
+        return 'done'
+
+    graph: TaskGraph = (
+        TaskGraph(workers=2)
+        .add('slow', slow)
+        .add('fail', fail)
+        .add('after', lambda: None, 'fail')
+        .add('later', lambda: None, 'slow')
+    )
+    threading.Timer(0.2, release.set).start()
+
+    with pytest.raises(TaskError, match='fail: boom') as info:
+        graph.run()
+
+    assert isinstance(info.value.__cause__, ValueError)
+    tasks: Dict[str, Task] = graph._tasks
+    # Running tasks finish, nothing new starts once one failed.
+    assert tasks['slow'].state == TaskState.DONE
+    assert tasks['fail'].state == TaskState.FAILED
+    assert tasks['after'].state == TaskState.CANCELLED
+    assert tasks['later'].state == TaskState.CANCELLED
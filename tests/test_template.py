@@ -0,0 +1,125 @@
+import zipfile
+import pytest
+from typing import Dict
+from pathlib import Path
+from datetime import datetime
+from pipa import template
+from pipa.template import (
+    DeployReport,
+    Template,
+    TemplateError,
+    TemplateSource,
+)
+
+
+@pytest.fixture
+def source(project: Path) -> Path:
+    path: Path = project / 'source'
+    (path / '.git').mkdir(parents=True)
+    (path / '.git' / 'HEAD').write_text('ref: main\n')
+    (path / '$pname_lower.py').write_text('class ${pname_cls}: pass\n')
+    (path / 'CHANGELOG').write_text('$date: created, $$HOME kept\n')
+    (path / 'run.sh').write_text('#!/bin/sh\necho $HOME\n')
+    (path / 'run.sh').chmod(0o755)
+
+    return path
+
+
+def today(monkeypatch, date: str) -> None:
+    monkeypatch.setattr(
+        template,
+        'datetime',
+        type(
+            'datetime',
+            (),
+            {'now': staticmethod(lambda: datetime.fromisoformat(date))},
+        ),
+    )
+
+
+def deploy(source: Path, root: Path) -> Dict[str, str]:
+    return Template('my_app', root, str(source)).deploy().results
+
+
+def test_render(project: Path, source: Path, monkeypatch):
+    root: Path = project / 'my_app'
+    today(monkeypatch, '2024-01-02')
+
+    assert deploy(source, root) == {
+        'my_app.py': DeployReport.WRITTEN,
+        'CHANGELOG': DeployReport.WRITTEN,
+        'run.sh': DeployReport.WRITTEN,
+    }
+    assert (root / 'my_app.py').read_text() == 'class MyApp: pass\n'
+    assert (
+        root / 'CHANGELOG'
+    ).read_text() == '2024-01-02: created, $HOME kept\n'
+    assert (root / 'run.sh').read_text() == '#!/bin/sh\necho $HOME\n'
+    assert (root / 'run.sh').stat().st_mode & 0o777 == 0o755
+    assert not (root / '.git').exists()
+
+
+def test_render_cache_ignores_the_date(
+    project: Path, source: Path, monkeypatch
+):
+    today(monkeypatch, '2024-01-02')
+    first, files = Template('my_app', project / 'a', str(source)).render()
+    today(monkeypatch, '2024-01-03')
+    second, dated = Template('my_app', project / 'b', str(source)).render()
+
+    assert first == second
+    assert len(list((project / 'templates').iterdir())) == 1
+    assert dated['CHANGELOG']['content'].startswith(b'2024-01-03')
+    assert dated['CHANGELOG']['sha256'] != files['CHANGELOG']['sha256']
+    assert dated['run.sh'] == files['run.sh']
+
+
+def test_redeploy(project: Path, source: Path):
+    root: Path = project / 'my_app'
+    deploy(source, root)
+    (root / 'run.sh').write_text('#!/bin/sh\necho mine\n')
+
+    assert set(deploy(source, root).values()) == {DeployReport.UNCHANGED}
+
+    (source / 'run.sh').write_text('#!/bin/sh\necho new\n')
+    (source / 'CHANGELOG').unlink()
+    (source / 'NOTICE').write_text('new\n')
+    assert deploy(source, root) == {
+        'my_app.py': DeployReport.UNCHANGED,
+        'run.sh': DeployReport.KEPT,
+        'NOTICE': DeployReport.WRITTEN,
+        'CHANGELOG': DeployReport.REMOVED,
+    }
+    assert (root / 'run.sh').read_text() == '#!/bin/sh\necho mine\n'
+    assert not (root / 'CHANGELOG').exists()
+
+
+def test_edited_files_are_kept_when_dropped(project: Path, source: Path):
+    root: Path = project / 'my_app'
+    deploy(source, root)
+    (root / 'my_app.py').write_text('class Mine: pass\n')
+    (source / '$pname_lower.py').unlink()
+
+    assert deploy(source, root)['my_app.py'] == DeployReport.KEPT
+    assert (root / 'my_app.py').exists()
+
+
+def test_archive(project: Path):
+    path: Path = project / 'template.zip'
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('repo-main/README.md', '# $pname\n')
+
+    deploy(path, project / 'my_app')
+    assert (project / 'my_app' / 'README.md').read_text() == '# my_app\n'
+
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('../README.md', '')
+    with pytest.raises(TemplateError, match='Unsafe path'):
+        deploy(path, project / 'other')
+
+
+def test_source_is_abstract():
+    with pytest.raises(TypeError):
+        TemplateSource()
+    with pytest.raises(TemplateError, match='not found'):
+        TemplateSource.of('/nonexistent')
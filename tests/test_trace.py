@@ -0,0 +1,74 @@
+import io
+import sys
+import json
+import threading
+import pytest
+from typing import Any, Dict, List
+from pathlib import Path
+from pipa.shell import Shell
+from pipa.trace import Trace
+
+
+@Trace.traced
+def resolve() -> str:
+    return 'resolved'
+
+
+def work() -> None:
+    with Trace.span('hash'):
+        pass
+
+
+@pytest.mark.parametrize(
+    'value, requested',
+    [('1', True), ('TRUE', True), ('0', False), ('', False)],
+)
+def test_requested(monkeypatch, value: str, requested: bool):
+    monkeypatch.setenv(Trace.ENV, value)
+
+    assert Trace.requested() == requested
+    assert not Trace.enabled()
+    with Trace.span('ignored') as span:
+        assert span is None
+
+
+def test_trace(tmp_path: Path, monkeypatch):
+    monkeypatch.setenv(Trace.ENV, str(tmp_path / 'trace.json'))
+    out: io.StringIO = io.StringIO()
+    Trace.start('pipa install')
+
+    try:
+        with Trace.span('lock', files=2):
+            assert resolve() == 'resolved'
+        worker: threading.Thread = threading.Thread(target=work)
+        worker.start()
+        worker.join()
+        Shell(stdout=Shell.PIPE.SUBPROC).write_args(
+            sys.executable, '-c', 'pass'
+        ).run()
+    finally:
+        Trace.finish(out)
+
+    events: List[Dict[str, Any]] = json.loads(
+        (tmp_path / 'trace.json').read_text()
+    )['traceEvents']
+    names: List[str] = [_['name'] for _ in events]
+
+    assert names[:4] == ['pipa install', 'lock', 'resolve', 'hash']
+    assert names[4].endswith(' -c pass')
+    assert events[1]['args']['files'] == 2
+    assert events[4]['args']['exit_code'] == 0
+    assert all(_['dur'] >= 0 and _['args']['cpu_s'] >= 0 for _ in events)
+    assert not Trace.enabled()
+
+    lines: List[str] = out.getvalue().split('\n')
+    assert lines[0].split() == ['span', 'wall', 'cpu', 'peak', 'rss', 'exit']
+    assert [_.split()[0] for _ in lines[1:4]] == [
+        'pipa',
+        'lock',
+        'resolve',
+    ]
+    assert lines[3].startswith('    resolve ')
+    # Worker threads hang under the command.
+    assert lines[4].startswith('  hash ')
+    assert lines[-2] == f'Trace written to {tmp_path / "trace.json"}'
@@ -0,0 +1,49 @@
+import sys
+import pytest
+from pathlib import Path
+from pipa.virtualenv import Virtualenv, VirtualenvError
+
+PROBE: str = (
+    'import os, sys\n'
+    'with open("probe.txt", "w") as fh:\n'
+    '    fh.write(f"{sys.prefix}\\n{os.environ.get(\'TOKEN\')}")\n'
+)
+
+
+def test_exec_uses_the_venv_interpreter(venv: Path):
+    (venv.parent / '.env').write_text('TOKEN=secret\n')
+
+    Virtualenv.exec('python', '-c', PROBE, quiet=True)
+    assert Path('probe.txt').read_text() == f'{venv}\nNone'
+
+    Virtualenv.exec('python', '-c', PROBE, quiet=True, with_env=True)
+    assert Path('probe.txt').read_text() == f'{venv}\nsecret'
+
+
+def test_exec_fails_with_the_error(venv: Path):
+    with pytest.raises(VirtualenvError, match='^boom$'):
+        Virtualenv.exec(
+            'python', '-c', 'import sys; sys.exit("boom")', quiet=True
+        )
+
+
+def test_pip_warnings_are_not_errors(venv: Path):
+    with pytest.raises(VirtualenvError) as error:
+        Virtualenv.exec(
+            'python',
+            '-c',
+            'import sys\n'
+            'print("WARNING: You are using pip version 1", file=sys.stderr)\n'
+            'print("ERROR: No matching distribution", file=sys.stderr)\n'
+            'print("[notice] A new release of pip", file=sys.stderr)\n'
+            'sys.exit(1)\n',
+            quiet=True,
+        )
+
+    assert str(error.value) == 'ERROR: No matching distribution'
+
+
+def test_which(venv: Path):
+    assert Virtualenv.which('python') == str(venv / 'bin' / 'python')
+    assert Virtualenv.which('no-such-tool') == 'no-such-tool'
+    assert Virtualenv.which(sys.executable) == sys.executable
@@ -0,0 +1,104 @@
+import sys
+import socket
+import subprocess
+import pytest
+from typing import Any, Dict, Iterator, List
+from pathlib import Path
+from pipa import warm
+from pipa.runner import Runner
+from pipa.virtualenv import Virtualenv
+from pipa.warm import WarmServer
+
+
+@pytest.fixture
+def server(tmp_path: Path) -> Iterator[subprocess.Popen]:
+    (tmp_path / 'requirements.lock').write_text('')
+    process: subprocess.Popen = subprocess.Popen(
+        [
+            sys.executable,
+            warm.__file__,
+            '--socket',
+            str(tmp_path / WarmServer.SOCKET_FILE),
+            '--watch',
+            str(tmp_path / 'requirements.lock'),
+            '--preload',
+            'json',
+        ],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    assert process.stdout.readline().startswith('Warm server ready')
+
+    yield process
+
+    process.terminate()
+    process.wait()
+
+
+def request(tmp_path: Path, spec: Dict[str, Any]) -> List[str]:
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(str(tmp_path / WarmServer.SOCKET_FILE))
+        WarmServer.request(
+            sock,
+            {'cwd': str(tmp_path), 'env': {'TOKEN': 'warm'}, **spec},
+        )
+        with sock.makefile('r') as reader:
+            return [_.strip() for _ in reader]
+
+
+def test_run(tmp_path: Path, server: subprocess.Popen, capfd):
+    (tmp_path / 'script.py').write_text(
+        'import os, sys\n'
+        'print(sys.argv[1:], os.environ["TOKEN"], os.getcwd())\n'
+        'sys.exit(3)\n'
+    )
+
+    pid, code = request(
+        tmp_path,
+        {
+            'mode': 'path',
+            'target': str(tmp_path / 'script.py'),
+            'argv': ['script.py', '--flag'],
+            'path': str(tmp_path),
+        },
+    )
+    assert pid.startswith('pid ') and code == 'exit 3'
+    assert capfd.readouterr().out == f"['--flag'] warm {tmp_path}\n"
+
+    assert request(
+        tmp_path,
+        {
+            'mode': 'code',
+            'target': 'raise SystemExit("failed")',
+            'argv': ['-c'],
+            'path': '',
+        },
+    )[1:] == ['exit 1']
+    assert capfd.readouterr().err == 'failed\n'
+
+
+def test_restart_on_change(tmp_path: Path, server: subprocess.Popen):
+    (tmp_path / 'requirements.lock').write_text('changed==1.0\n')
+
+    assert server.wait(timeout=10) == WarmServer.RESTART_CODE
+    assert not (tmp_path / WarmServer.SOCKET_FILE).exists()
+
+
+def test_spec(venv: Path):
+    tool: Path = Virtualenv.bin_dir() / 'tool'
+    tool.write_text(f'#!{Virtualenv.python()}\nprint(1)\n')
+    python: str = str(Virtualenv.python())
+
+    assert Runner._spec(['python', '-m', 'http.server', '80'], python, {})[
+        'argv'
+    ] == ['-m', '80']
+    assert Runner._spec(['python', 'app.py'], python, {})['target'] == str(
+        venv.parent / 'app.py'
+    )
+    assert Runner._spec(['tool', '-v'], str(tool), {})['argv'] == [
+        str(tool),
+        '-v',
+    ]
+    # Anything else starts cold.
+    assert Runner._spec(['python', '-i'], python, {}) is None
+    assert Runner._spec(['ls'], '/bin/ls', {}) is None
@@ -0,0 +1,103 @@
+import csv
+import base64
+import hashlib
+import pytest
+import zipfile
+from typing import Callable, Dict, List
+from pathlib import Path
+from pipa.wheel import Wheel, WheelError, WheelInstaller
+
+ENTRY_POINTS: str = '''[console_scripts]
+tool = tinypkg.cli:main.run [extra]
+
+[gui_scripts]
+tool-gui = tinypkg:main
+'''
+
+
+@pytest.fixture
+def installed(tmp_path: Path, make_wheel: Callable) -> Path:
+    tree: Path = tmp_path / 'tree'
+    Wheel(
+        make_wheel(
+            tmp_path,
+            'tinypkg',
+            '1.0',
+            {
+                'tinypkg/__init__.py': 'def main():\n    return 0\n',
+                'tinypkg-1.0.data/scripts/legacy': '#!python\nprint(1)\n',
+                'tinypkg-1.0.data/data/share/tinypkg.txt': 'shared\n',
+            },
+            entry_points=ENTRY_POINTS,
+        )
+    ).unpack(tree)
+
+    return WheelInstaller(
+        tmp_path / 'venv' / 'lib', tmp_path / 'venv' / 'bin', Path('/py')
+    ).install(tree)
+
+
+def test_layout(tmp_path: Path, installed: Path):
+    venv: Path = tmp_path / 'venv'
+
+    assert installed == venv / 'lib' / 'tinypkg-1.0.dist-info'
+    assert (venv / 'lib' / 'tinypkg' / '__init__.py').exists()
+    assert (venv / 'share' / 'tinypkg.txt').read_text() == 'shared\n'
+    assert (installed / 'INSTALLER').read_text() == 'pipa\n'
+    assert not (venv / 'lib' / 'tinypkg-1.0.data').exists()
+
+
+def test_scripts(tmp_path: Path, installed: Path):
+    bin_dir: Path = tmp_path / 'venv' / 'bin'
+
+    assert (bin_dir / 'legacy').read_text() == '#!/py\nprint(1)\n'
+    assert (bin_dir / 'legacy').stat().st_mode & 0o777 == 0o755
+    assert (bin_dir / 'tool').read_text().startswith('#!/py\n')
+    assert 'from tinypkg.cli import main\n' in (bin_dir / 'tool').read_text()
+    assert 'sys.exit(main.run())' in (bin_dir / 'tool').read_text()
+    assert 'sys.exit(main())' in (bin_dir / 'tool-gui').read_text()
+
+
+def test_record(tmp_path: Path, installed: Path):
+    site_packages: Path = tmp_path / 'venv' / 'lib'
+
+    with (installed / 'RECORD').open(newline='') as fh:
+        rows: Dict[str, List[str]] = {
+            row[0]: row[1:] for row in csv.reader(fh)
+        }
+
+    assert sorted(rows) == [
+        '../bin/legacy',
+        '../bin/tool',
+        '../bin/tool-gui',
+        '../share/tinypkg.txt',
+        'tinypkg-1.0.dist-info/INSTALLER',
+        'tinypkg-1.0.dist-info/METADATA',
+        'tinypkg-1.0.dist-info/RECORD',
+        'tinypkg-1.0.dist-info/WHEEL',
+        'tinypkg-1.0.dist-info/entry_points.txt',
+        'tinypkg/__init__.py',
+    ]
+    assert rows['tinypkg-1.0.dist-info/RECORD'] == ['', '']
+
+    for rel, (digest, size) in rows.items():
+        if digest:
+            content: bytes = (site_packages / rel).read_bytes()
+            assert (
+                digest
+                == 'sha256='
+                + base64.urlsafe_b64encode(hashlib.sha256(content).digest())
+                .rstrip(b'=')
+                .decode()
+            )
+            assert size == str(len(content))
+
+
+def test_unsafe_paths(tmp_path: Path):
+    path: Path = tmp_path / 'evil-1.0-py3-none-any.whl'
+    with zipfile.ZipFile(path, 'w') as zf:
+        zf.writestr('../evil.py', '')
+
+    with pytest.raises(WheelError, match='Unsafe path'):
+        Wheel(path).unpack(tmp_path / 'tree')
+    assert not (tmp_path / 'evil.py').exists()
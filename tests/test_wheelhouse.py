@@ -0,0 +1,65 @@
+import hashlib
+import pytest
+from typing import Callable
+from pathlib import Path
+from pipa.lockfile import Lockfile
+from pipa.virtualenv import Virtualenv
+from pipa.wheelhouse import Wheelhouse, WheelhouseError
+
+
+@pytest.fixture
+def lock(project: Path, venv: Path, make_wheel: Callable) -> Lockfile:
+    wheel: Path = make_wheel(
+        project / 'links', 'tinypkg', '1.0', {'tinypkg.py': 'VALUE = 42\n'}
+    )
+    digest: str = hashlib.sha256(wheel.read_bytes()).hexdigest()
+    (project / 'requirements.lock').write_text(
+        f'tinypkg==1.0 \\\n    --hash=sha256:{digest}\n'
+    )
+
+    return Lockfile(project / 'requirements.lock')
+
+
+def test_build_and_install_offline(project: Path, lock: Lockfile):
+    report = Wheelhouse().build(lock, find_links=[project / 'links'])
+
+    assert report.fetched == ['tinypkg']
+    assert (project / 'wheelhouse' / 'tinypkg-1.0-py3-none-any.whl').exists()
+    assert Wheelhouse().manifest['wheels']['tinypkg']['source'] == 'index'
+
+    # Reused as is on the next build, nothing is fetched.
+    assert Wheelhouse().build(lock, find_links=[]).reused == ['tinypkg']
+
+    Wheelhouse().install(lock, ['tinypkg'])
+    assert (Virtualenv.site_packages() / 'tinypkg.py').exists()
+
+
+def test_missing_artifact(project: Path, lock: Lockfile):
+    Wheelhouse().build(lock, find_links=[project / 'links'])
+    (project / 'wheelhouse' / 'tinypkg-1.0-py3-none-any.whl').unlink()
+
+    with pytest.raises(WheelhouseError, match='Missing .*: tinypkg'):
+        Wheelhouse().install(lock, ['tinypkg'])
+    assert not (Virtualenv.site_packages() / 'tinypkg.py').exists()
+
+
+def test_hash_mismatch(project: Path, lock: Lockfile):
+    Wheelhouse().build(lock, find_links=[project / 'links'])
+    with (project / 'wheelhouse' / 'tinypkg-1.0-py3-none-any.whl').open(
+        'ab'
+    ) as fh:
+        fh.write(b'tampered')
+
+    with pytest.raises(WheelhouseError, match='Hash mismatch .*: tinypkg'):
+        Wheelhouse().install(lock, ['tinypkg'])
+    assert not (Virtualenv.site_packages() / 'tinypkg.py').exists()
+
+
+def test_torn_manifest_trusts_nothing(project: Path, lock: Lockfile):
+    Wheelhouse().build(lock, find_links=[project / 'links'])
+    manifest: Path = project / 'wheelhouse' / Wheelhouse.MANIFEST_FILE
+    manifest.write_text(manifest.read_text()[:20])
+
+    assert Wheelhouse().manifest == {'lock': None, 'wheels': {}}
+    with pytest.raises(WheelhouseError, match='Missing'):
+        Wheelhouse().install(lock, ['tinypkg'])
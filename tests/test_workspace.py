@@ -0,0 +1,79 @@
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
+from pathlib import Path
+from pipa.settings import Settings
+from pipa.workspace import Workspace
+
+
+@pytest.fixture
+def root(tmp_path: Path) -> Path:
+    # Each project and its requirements, None when its lock is up to date.
+    projects: Dict[str, str] = {
+        'api': 'flask',
+        'web': 'flask',
+        'jobs/worker': 'celery',
+        'jobs/fresh': None,
+        'jobs/broken': 'broken',
+    }
+    for rel, reqs in projects.items():
+        (tmp_path / rel).mkdir(parents=True)
+        (tmp_path / rel / Settings.FILE.name).write_text('')
+        (tmp_path / rel / 'requirements.txt').write_text(reqs or 'fresh')
+        if reqs is None:
+            (tmp_path / rel / 'requirements.lock').write_text('')
+
+    for rel in ('.git', 'node_modules/pkg', 'api/venv'):
+        (tmp_path / rel).mkdir(parents=True)
+        (tmp_path / rel / Settings.FILE.name).write_text('')
+    (tmp_path / 'api' / 'venv' / 'pyvenv.cfg').write_text('')
+
+    return tmp_path
+
+
+def test_discover(root: Path):
+    assert [
+        _.relative_to(root).as_posix() for _ in Workspace.discover(root)
+    ] == [
+        'api',
+        'jobs/broken',
+        'jobs/fresh',
+        'jobs/worker',
+        'web',
+    ]
+
+
+def test_lock_once_per_input(root: Path, monkeypatch):
+    calls: List[Tuple[str, str, Tuple]] = []
+
+    def in_project(
+        cls, path: Path, task: str, *args: Tuple, **kwargs: Dict[str, Any]
+    ) -> Tuple[Any, float]:
+        calls.append((path.name, task, args))
+        reqs: str = (path / 'requirements.txt').read_text()
+
+        if task == 'lock_state':
+            return (reqs, 'digest', reqs == 'fresh'), 1.0
+        if task == 'lock' and reqs == 'broken':
+            raise RuntimeError('no such package')
+
+        return True, 1.0
+
+    monkeypatch.setattr(Workspace, '_in_project', classmethod(in_project))
+    workspace: Workspace = Workspace(root)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        workspace._lock(pool)
+
+    locks: List[str] = sorted(_[0] for _ in calls if _[1] == 'lock')
+    adopted: List[Tuple[str, str, Tuple]] = [
+        _ for _ in calls if _[1] == 'adopt_lock'
+    ]
+
+    assert locks == ['api', 'broken', 'worker']
+    assert adopted == [('web', 'adopt_lock', (root / 'api',))]
+    assert workspace.reports[root / 'web'].shared
+    assert workspace.reports[root / 'web'].timings == {'lock': 2.0}
+    assert workspace.reports[root / 'jobs' / 'broken'].error == (
+        'lock: no such package'
+    )